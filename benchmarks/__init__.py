@@ -0,0 +1,7 @@
+"""
+⏱️ Benchmarks de base de datos - ReflectApp
+Ejecutar desde la raíz del proyecto: python -m benchmarks.<nombre>
+
+bench_service mide todos los métodos públicos de DatabaseService sobre un diario
+sintético (journal_generator) y guarda JSON comparable entre commits.
+"""
@@ -0,0 +1,95 @@
+"""
+⏱️ Benchmark: tamaño y latencia antes/después de archivar el texto de entradas antiguas
+Uso: python -m benchmarks.bench_archive [--years 10] [--horizon-days 365] [--repeat 200]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.bench_search import build_journal
+from services.database_service import DatabaseService
+
+SCAN_SQL = "SELECT COUNT(*), AVG(mood_score), SUM(word_count) FROM daily_entries WHERE user_id = 1"
+
+
+def storage(db: DatabaseService) -> dict:
+    """Tamaño del fichero tras VACUUM y páginas de cada tabla (dbstat si está disponible)"""
+    conn = db._connections.connection()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    sizes = {"file": os.path.getsize(db.db_path)}
+    try:
+        for table in ("daily_entries", "entry_archive"):
+            sizes[table] = conn.execute(
+                "SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name = ?", (table,)
+            ).fetchone()[0]
+    except Exception:
+        pass
+    return sizes
+
+
+def latency_ms(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def measure(db: DatabaseService, old_day: date, recent_day: date, repeat: int) -> dict:
+    conn = db._connections.connection()
+    return {
+        "scan": latency_ms(lambda: conn.execute(SCAN_SQL).fetchone(), repeat),
+        "day_old": latency_ms(lambda: db.get_day_entry(1, old_day.year, old_day.month, old_day.day), repeat),
+        "day_recent": latency_ms(lambda: db.get_day_entry(1, recent_day.year, recent_day.month, recent_day.day), repeat),
+        "search": latency_ms(lambda: db.search_entries(1, "jardin", limit=20), repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del archivo en frío")
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--horizon-days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    old_day = date.today() - timedelta(days=365 * args.years - 30)
+    recent_day = date.today() - timedelta(days=10)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = DatabaseService(os.path.join(tmp, "archive.db"))
+            # Medir la base de datos, no la caché de consultas
+            db.query_cache.max_bytes = 0
+            entries = build_journal(db, args.years)
+
+            before_size = storage(db)
+            before = measure(db, old_day, recent_day, args.repeat)
+
+            report = db.archive_old_entries(args.horizon_days)
+
+            after_size = storage(db)
+            after = measure(db, old_day, recent_day, args.repeat)
+            db.close()
+
+    print(f"🧊 {entries} entradas ({args.years} años) | horizonte {args.horizon_days} días | "
+          f"{report['archived']} archivadas")
+    print(f"   texto archivado       {report['text_bytes'] / 1024:9.1f} KB → "
+          f"{report['compressed_bytes'] / 1024:.1f} KB (x{report['text_bytes'] / report['compressed_bytes']:.1f})")
+    for key, label in (("file", "fichero (tras VACUUM)"), ("daily_entries", "tabla daily_entries"),
+                       ("entry_archive", "tabla entry_archive")):
+        if key in before_size:
+            print(f"   {label:<21} {before_size[key] / 1024:9.1f} KB → {after_size[key] / 1024:.1f} KB")
+    for key, label in (("scan", "escaneo de la tabla"), ("day_old", "get_day_entry archivado"),
+                       ("day_recent", "get_day_entry reciente"), ("search", "search_entries")):
+        print(f"   {label:<21} {before[key]:9.3f} ms → {after[key]:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+⏱️ Benchmark: lecturas de entradas como dicts vs filas compactas con proyección
+Uso: python -m benchmarks.bench_compact_rows [--years 5] [--repeat 5]
+
+Para cada modo mide el tiempo por lectura y la memoria (tracemalloc) que
+ocupa el resultado y el pico durante la lectura.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.journal_generator import generate_journal
+from services.database_service import DatabaseService
+
+# Lo que usa una lista de días (fecha, ánimo y si valió la pena)
+LIST_COLUMNS = ("entry_date", "mood_score", "worth_it")
+
+
+def measure(read, repeat: int):
+    """(ms por lectura, bytes retenidos por el resultado, pico en bytes)"""
+    read()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        read()
+    ms = (time.perf_counter() - start) / repeat * 1000
+
+    tracemalloc.start()
+    result = read()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return ms, retained, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de filas compactas")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = DatabaseService(os.path.join(tmp, "reflect_zen.db"))
+            db.query_cache.max_bytes = 0
+            dataset = generate_journal(db, users=1, days=args.years * 365)
+
+        user_id = dataset["user_ids"][0]
+        limit = dataset["entries"]
+        print(f"🪶 {limit} entradas ({args.years} años), {args.repeat} repeticiones")
+
+        modes = [
+            ("dicts, todas las columnas", {}),
+            ("compactas, todas las columnas", {"compact": True}),
+            ("dicts, 3 columnas", {"columns": LIST_COLUMNS}),
+            ("compactas, 3 columnas", {"columns": LIST_COLUMNS, "compact": True}),
+        ]
+        print(f"   {'modo':<32} {'ms':>8} {'retenido KB':>12} {'pico KB':>10}")
+        for label, options in modes:
+            def read():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    return db.get_user_entries(user_id, limit=limit, **options)
+
+            ms, retained, peak = measure(read, args.repeat)
+            print(f"   {label:<32} {ms:8.2f} {retained / 1024:12.1f} {peak / 1024:10.1f}")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+⏱️ Benchmark: conexión por llamada vs conexiones persistentes con WAL
+Uso: python -m benchmarks.bench_connections [--iterations 2000] [--profile mobile|server]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date
+
+from services.db_connection_manager import ConnectionManager, DB_PROFILES
+
+READ_SQL = "SELECT COUNT(*) FROM daily_entries WHERE user_id = ? AND entry_date = ?"
+WRITE_SQL = """
+    INSERT INTO interactive_moments (
+        user_id, moment_id, emoji, text, moment_type,
+        intensity, category, time_str, entry_date, is_active
+    ) VALUES (?, ?, '😊', 'Café con calma', 'positive', 5, 'general', '09:00', ?, 1)
+"""
+
+SCHEMA = """
+    CREATE TABLE daily_entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        free_reflection TEXT NOT NULL,
+        entry_date DATE DEFAULT CURRENT_DATE
+    );
+    CREATE TABLE interactive_moments (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        moment_id TEXT NOT NULL,
+        emoji TEXT NOT NULL,
+        text TEXT NOT NULL,
+        moment_type TEXT NOT NULL,
+        intensity INTEGER NOT NULL,
+        category TEXT NOT NULL DEFAULT 'general',
+        time_str TEXT NOT NULL,
+        entry_date DATE DEFAULT CURRENT_DATE,
+        is_active INTEGER DEFAULT 1
+    );
+    CREATE INDEX idx_daily_entries_user_date ON daily_entries(user_id, entry_date);
+"""
+
+
+def create_database(path: str) -> None:
+    """Crear esquema mínimo con algo de historial"""
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            "INSERT INTO daily_entries (user_id, free_reflection, entry_date) VALUES (?, ?, ?)",
+            [(user_id, "Un día tranquilo", f"2024-01-{day:02d}") for user_id in range(1, 51) for day in range(1, 29)]
+        )
+
+
+def per_call_read(path: str, today: str) -> None:
+    """Comportamiento anterior: sqlite3.connect en cada llamada"""
+    with sqlite3.connect(path) as conn:
+        conn.execute(READ_SQL, (1, today)).fetchone()
+
+
+def per_call_write(path: str, today: str, i: int) -> None:
+    with sqlite3.connect(path) as conn:
+        conn.execute(WRITE_SQL, (1, str(i), today))
+
+
+def timed(label: str, iterations: int, fn) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    print(f"   {label:<38} {elapsed * 1000:9.1f} ms  ({iterations / elapsed:10.0f} ops/s)")
+    return elapsed
+
+
+def concurrent_run(label: str, threads: int, iterations: int, read_fn, write_fn) -> float:
+    """Un hilo escribe mientras el resto lee (simula varios usuarios en modo web)"""
+    errors = []
+
+    def reader():
+        try:
+            for i in range(iterations):
+                read_fn(i)
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+
+    def writer():
+        try:
+            for i in range(iterations):
+                write_fn(i)
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(threads - 1)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    total_ops = threads * iterations
+    print(f"   {label:<38} {elapsed * 1000:9.1f} ms  ({total_ops / elapsed:10.0f} ops/s, errores: {len(errors)})")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de conexiones SQLite")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--profile", choices=sorted(DB_PROFILES), default="mobile")
+    args = parser.parse_args()
+
+    today = date.today().isoformat()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        pooled_path = os.path.join(tmp, "pooled.db")
+        create_database(legacy_path)
+        create_database(pooled_path)
+
+        manager = ConnectionManager(pooled_path, args.profile)
+
+        def pooled_read(i):
+            with manager.transaction() as conn:
+                conn.execute(READ_SQL, (1, today)).fetchone()
+
+        def pooled_write(i):
+            with manager.transaction(immediate=True) as conn:
+                conn.execute(WRITE_SQL, (1, str(i), today))
+
+        print(f"🔌 Perfil: {args.profile} | iteraciones: {args.iterations}")
+        print("📖 Lecturas (has_submitted_today)")
+        legacy = timed("conexión por llamada", args.iterations, lambda i: per_call_read(legacy_path, today))
+        pooled = timed("conexión persistente + WAL", args.iterations, pooled_read)
+        print(f"   ⚡ mejora: x{legacy / pooled:.1f}")
+
+        print("✍️ Escrituras (save_interactive_moment)")
+        legacy = timed("conexión por llamada", args.iterations, lambda i: per_call_write(legacy_path, today, i))
+        pooled = timed("conexión persistente + WAL", args.iterations, pooled_write)
+        print(f"   ⚡ mejora: x{legacy / pooled:.1f}")
+
+        print(f"👥 Concurrencia ({args.threads} hilos, 1 escritor)")
+        iterations = max(1, args.iterations // 4)
+        legacy = concurrent_run("conexión por llamada", args.threads, iterations,
+                                lambda i: per_call_read(legacy_path, today),
+                                lambda i: per_call_write(legacy_path, today, i))
+        pooled = concurrent_run("conexión persistente + WAL", args.threads, iterations, pooled_read, pooled_write)
+        print(f"   ⚡ mejora: x{legacy / pooled:.1f}")
+
+        manager.close_all()
+
+
+if __name__ == "__main__":
+    main()
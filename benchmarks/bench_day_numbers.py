@@ -0,0 +1,107 @@
+"""
+⏱️ Benchmark: fechas como texto (julianday/substr/fromisoformat) vs day_number entero
+Uso: python -m benchmarks.bench_day_numbers [--years 10] [--repeat 200]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+from datetime import date
+
+from benchmarks.bench_search import build_journal
+from services.database_service import DatabaseService
+from services.day_numbers import month_range, today_number
+
+TEXT_STREAK_SQL = """
+    WITH days AS (
+        SELECT DISTINCT entry_date FROM daily_entries WHERE user_id = ?
+    ),
+    islands AS (
+        SELECT entry_date,
+               julianday(entry_date) - ROW_NUMBER() OVER (ORDER BY entry_date) AS island
+        FROM days
+    )
+    SELECT MAX(entry_date) AS last_date, COUNT(*) AS length
+    FROM islands
+    GROUP BY island
+    ORDER BY last_date DESC
+"""
+INT_STREAK_SQL = """
+    WITH islands AS (
+        SELECT day_number, day_number - ROW_NUMBER() OVER (ORDER BY day_number) AS island
+        FROM daily_entries
+        WHERE user_id = ?
+    )
+    SELECT MAX(day_number) AS last_day, COUNT(*) AS length
+    FROM islands
+    GROUP BY island
+    ORDER BY last_day DESC
+"""
+TEXT_MONTH_SQL = """
+    SELECT CAST(substr(entry_date, 9, 2) AS INTEGER), worth_it, positive_count, negative_count
+    FROM daily_rollups
+    WHERE user_id = ? AND entry_date >= ? AND entry_date <= ? AND has_entry = 1
+    ORDER BY entry_date
+"""
+INT_MONTH_SQL = """
+    SELECT day_number - ? + 1, worth_it, positive_count, negative_count
+    FROM daily_rollups
+    WHERE user_id = ? AND entry_date >= ? AND entry_date <= ? AND has_entry = 1
+    ORDER BY entry_date
+"""
+
+
+def per_call_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def report(label: str, before: float, after: float) -> None:
+    print(f"   {label:<34} {before:9.1f} µs → {after:9.1f} µs  (x{before / after:.1f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de day_number")
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = DatabaseService(os.path.join(tmp, "reflect_zen.db"))
+            entries = build_journal(db, args.years)
+            db.rebuild_rollups(1)
+
+        print(f"📅 {entries} entradas ({args.years} años)")
+        conn = db._connections.connection()
+        repeat = args.repeat
+
+        print("🔥 Recalcular rachas (islas de días consecutivos)")
+        report("julianday(entry_date) vs day_number",
+               per_call_us(lambda: conn.execute(TEXT_STREAK_SQL, (1,)).fetchall(), max(1, repeat // 10)),
+               per_call_us(lambda: conn.execute(INT_STREAK_SQL, (1,)).fetchall(), max(1, repeat // 10)))
+
+        print("🗓️ Calendario de un mes (daily_rollups)")
+        first, last = month_range(date.today().year, date.today().month)
+        first_text, last_text = date.today().replace(day=1).isoformat(), date.today().isoformat()
+        report("substr(entry_date) vs day_number",
+               per_call_us(lambda: conn.execute(TEXT_MONTH_SQL, (1, first_text, last_text)).fetchall(), repeat * 10),
+               per_call_us(lambda: conn.execute(INT_MONTH_SQL, (first, 1, first_text, last_text)).fetchall(), repeat * 10))
+
+        print("⏳ Días desde la última entrada (get_streak_info)")
+        last_entry = conn.execute("SELECT MAX(entry_date), MAX(day_number) FROM daily_entries").fetchone()
+        report("date.fromisoformat vs resta entera",
+               per_call_us(lambda: (date.today() - date.fromisoformat(last_entry[0])).days, repeat * 100),
+               per_call_us(lambda: today_number() - last_entry[1], repeat * 100))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+⏱️ Benchmark: auto-guardado de momentos uno a uno vs cola con group commit
+Uso: python -m benchmarks.bench_moment_queue [--moments 2000] [--batch 32] [--interval-ms 250]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from services.database_service import DatabaseService
+
+
+def make_moment(i: int) -> dict:
+    return {
+        'id': str(1_000_000 + i),
+        'emoji': '😊' if i % 3 else '😔',
+        'text': f'Momento rápido {i}',
+        'type': 'positive' if i % 3 else 'negative',
+        'intensity': 1 + i % 10,
+        'category': 'quick',
+        'time': f"{9 + i % 12:02d}:{i % 60:02d}",
+    }
+
+
+def run_direct(db: DatabaseService, moments: int) -> float:
+    """Comportamiento anterior: una transacción (y un fsync) por toque"""
+    start = time.perf_counter()
+    for i in range(moments):
+        db.save_interactive_moment(1, make_moment(i))
+    return time.perf_counter() - start
+
+
+def run_queued(db: DatabaseService, moments: int) -> float:
+    """Cola write-behind: los toques se agrupan en transacciones de hasta N momentos"""
+    start = time.perf_counter()
+    for i in range(moments):
+        db.queue_interactive_moment(1, make_moment(i))
+    db.flush_pending_moments()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la cola de momentos")
+    parser.add_argument("--moments", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--interval-ms", type=int, default=250)
+    parser.add_argument("--profile", default="mobile")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # DatabaseService imprime en cada llamada: se silencia durante la medición
+        with contextlib.redirect_stdout(io.StringIO()):
+            direct_db = DatabaseService(os.path.join(tmp, "direct.db"), profile=args.profile)
+            direct = run_direct(direct_db, args.moments)
+            direct_db.close()
+
+            queued_db = DatabaseService(os.path.join(tmp, "queued.db"), profile=args.profile)
+            queued_db.moment_queue.max_batch = args.batch
+            queued_db.moment_queue.flush_interval = args.interval_ms / 1000
+            queued = run_queued(queued_db, args.moments)
+            stored = len(queued_db.get_interactive_moments_today(1))
+            flushes = queued_db.moment_queue.flush_count
+            queued_db.close()
+
+    print(f"📝 {args.moments} momentos | lote máx: {args.batch} | intervalo: {args.interval_ms} ms")
+    print(f"   uno a uno         {direct * 1000:9.1f} ms  ({args.moments / direct:9.0f} momentos/s)")
+    print(f"   cola agrupada     {queued * 1000:9.1f} ms  ({args.moments / queued:9.0f} momentos/s, "
+          f"{flushes} transacciones)")
+    print(f"   ⚡ mejora: x{direct / queued:.1f} | guardados: {stored}")
+
+
+if __name__ == "__main__":
+    main()
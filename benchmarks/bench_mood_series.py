@@ -0,0 +1,62 @@
+"""
+⏱️ Benchmark: get_mood_series en Python puro vs NumPy (si está instalado)
+Uso: python -m benchmarks.bench_mood_series [--years 5] [--window 14] [--repeat 50]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.journal_generator import generate_journal
+from services.database_service import DatabaseService
+from services.day_numbers import today_number
+from services.mood_series import MOOD_ROWS_SQL, build_mood_series, np
+
+
+def per_call_ms(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las series de ánimo")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--window", type=int, default=14)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = DatabaseService(os.path.join(tmp, "reflect_zen.db"))
+            db.query_cache.max_bytes = 0
+            dataset = generate_journal(db, users=1, days=args.years * 365)
+
+        user_id = dataset["user_ids"][0]
+        last = today_number()
+        first = last - args.years * 365
+        conn = db._connections.connection()
+        rows = conn.execute(MOOD_ROWS_SQL, (user_id, first, last)).fetchall()
+        print(f"📈 {len(rows)} días con ánimo en {last - first + 1} días (ventana {args.window})")
+
+        print(f"   {'lectura SQL (proyección indexada)':<36} "
+              f"{per_call_ms(lambda: conn.execute(MOOD_ROWS_SQL, (user_id, first, last)).fetchall(), args.repeat):8.2f} ms")
+        python_ms = per_call_ms(lambda: build_mood_series(rows, first, last, args.window, use_numpy=False), args.repeat)
+        print(f"   {'series en Python puro':<36} {python_ms:8.2f} ms")
+        if np is not None:
+            numpy_ms = per_call_ms(lambda: build_mood_series(rows, first, last, args.window, use_numpy=True), args.repeat)
+            print(f"   {'series con NumPy':<36} {numpy_ms:8.2f} ms  (x{python_ms / numpy_ms:.1f})")
+        else:
+            print("   ⚠️ NumPy no está instalado: solo se mide Python puro")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
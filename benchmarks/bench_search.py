@@ -0,0 +1,117 @@
+"""
+⏱️ Benchmark: búsqueda FTS5 vs LIKE sobre un diario sintético de 10 años
+Uso: python -m benchmarks.bench_search [--years 10] [--queries 200] [--users 1]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from services.database_service import DatabaseService
+
+WORDS = [
+    "café", "mañana", "paseo", "jardín", "lluvia", "trabajo", "reunión", "familia", "mamá",
+    "amigos", "cansancio", "alegría", "música", "canción", "lectura", "montaña", "playa",
+    "estrés", "calma", "meditación", "cocina", "tortilla", "árbol", "sol", "nublado",
+    "proyecto", "entrega", "risa", "abrazo", "tarde", "noche", "sueño", "gimnasio", "bici",
+]
+TAGS = ["Café con calma", "Paseo por el parque", "Discusión en el trabajo", "Llamada con mamá",
+        "Dormí mal", "Clase de yoga", "Cena con amigos", "Atasco en la autopista"]
+COMMON = ["que", "de", "el", "la", "hoy", "con", "en", "muy", "me", "un", "una", "por", "y", "fue", "día"]
+QUERIES = ["cafe", "jardin", "mama", "cancion lectura", "arbol", "trabajo estres", "yoga", "tortil"]
+
+
+def make_vocabulary(rng: random.Random):
+    """Palabras frecuentes + temáticas + muchas raras, con pesos tipo Zipf como un texto real"""
+    rare = ["".join(rng.choice("aeioubcdfglmnprstv") for _ in range(rng.randint(5, 9))) for _ in range(4000)]
+    vocabulary = COMMON + WORDS + rare
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    return vocabulary, weights
+
+
+def build_journal(db: DatabaseService, years: int, seed: int = 7, user_id: int = 1) -> int:
+    """Una entrada por día con 40-120 palabras y 2-5 tags (semilla fija: resultados repetibles)"""
+    rng = random.Random(seed)
+    vocabulary, weights = make_vocabulary(rng)
+    start = date.today() - timedelta(days=365 * years)
+    days = 365 * years
+
+    with db._connections.transaction(immediate=True) as conn:
+        cursor = conn.cursor()
+        for offset in range(days):
+            text = " ".join(rng.choices(vocabulary, weights, k=rng.randint(40, 120)))
+            cursor.execute("""
+                INSERT INTO daily_entries (user_id, free_reflection, mood_score, word_count, entry_date)
+                VALUES (?, ?, ?, ?, ?)
+            """, (user_id, text, rng.randint(1, 10), len(text.split()),
+                  (start + timedelta(days=offset)).isoformat()))
+            tags = [{"name": rng.choice(TAGS), "context": "", "emoji": "✨"} for _ in range(rng.randint(2, 5))]
+            db._insert_entry_tags(cursor, cursor.lastrowid, user_id, tags[:2], tags[2:])
+    return days
+
+
+def run_fts(db: DatabaseService, queries: int) -> float:
+    start = time.perf_counter()
+    for i in range(queries):
+        db.search_entries(1, QUERIES[i % len(QUERIES)], limit=20)
+    return time.perf_counter() - start
+
+
+def run_like(db: DatabaseService, queries: int) -> float:
+    """Lo que haría una búsqueda sin índice: escanear reflexiones y tags"""
+    start = time.perf_counter()
+    with db._connections.transaction() as conn:
+        for i in range(queries):
+            pattern = f"%{QUERIES[i % len(QUERIES)]}%"
+            conn.execute("""
+                SELECT id, entry_date FROM daily_entries
+                WHERE user_id = 1 AND (free_reflection LIKE ?
+                      OR id IN (SELECT entry_id FROM entry_tags WHERE user_id = 1 AND name LIKE ?))
+                ORDER BY entry_date DESC LIMIT 20
+            """, (pattern, pattern)).fetchall()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda de texto completo")
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--profile", default="mobile")
+    parser.add_argument("--users", type=int, default=1,
+                        help="Usuarios con el mismo diario (modo web): se busca solo en el primero")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = DatabaseService(os.path.join(tmp, "search.db"), profile=args.profile)
+            if not db.capabilities["search_index"]:
+                raise SystemExit("SQLite sin FTS5: nada que medir")
+
+            start = time.perf_counter()
+            entries = sum(build_journal(db, args.years, seed=6 + user_id, user_id=user_id)
+                          for user_id in range(1, args.users + 1))
+            load = time.perf_counter() - start
+
+            start = time.perf_counter()
+            db.rebuild_search_index()
+            rebuild = time.perf_counter() - start
+
+            fts = run_fts(db, args.queries)
+            like = run_like(db, args.queries)
+            db.close()
+
+    print(f"🔎 {entries} entradas ({args.years} años, {args.users} usuarios) | {args.queries} búsquedas")
+    print(f"   carga con triggers  {load * 1000:9.1f} ms")
+    print(f"   reconstrucción      {rebuild * 1000:9.1f} ms")
+    print(f"   FTS5 (bm25+snippet) {fts * 1000 / args.queries:9.2f} ms/búsqueda")
+    print(f"   LIKE '%…%'          {like * 1000 / args.queries:9.2f} ms/búsqueda (sin acentos ni ranking)")
+    print(f"   ⚡ mejora: x{like / fts:.1f}")
+
+
+if __name__ == "__main__":
+    main()
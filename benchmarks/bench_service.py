@@ -0,0 +1,369 @@
+"""
+⏱️ Benchmark de todos los métodos públicos de DatabaseService sobre un diario sintético
+✅ NUEVO: Latencia p50/p95/p99, filas/s y tamaño de la base de datos por método
+✅ NUEVO: Salida JSON para comparar entre commits (--json / --compare)
+
+Uso:
+    python -m benchmarks.bench_service [--scale user5y] [--repeat 50] [--json antes.json]
+    python -m benchmarks.bench_service --scale user5y --compare antes.json --json despues.json
+"""
+
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.journal_generator import BENCH_PASSWORD, SCALES, generate_journal, make_moment, make_reflection
+from services.database_service import DatabaseService
+from services.db_backup import BackupService
+from services.db_maintenance import MaintenanceService
+
+# Métodos que no se miden en el bucle (close se mide una vez al final)
+EXCLUDED_METHODS = {"close"}
+
+
+def case(name: str, call: Callable, rows: Optional[Callable] = None,
+         setup: Optional[Callable] = None, heavy: bool = False) -> Dict[str, Any]:
+    """
+    Un caso del benchmark
+
+    Args:
+        call: (db, ctx, i) → resultado; solo esto se cronometra
+        rows: resultado → filas procesadas (por defecto len() de las listas y 1 para lo demás)
+        setup: (db, ctx, i) → None, se ejecuta antes de cada llamada sin cronometrar
+        heavy: Recorre todo el diario; se repite menos veces
+    """
+    return {"name": name, "call": call, "rows": rows, "setup": setup, "heavy": heavy}
+
+
+def default_rows(result: Any) -> int:
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return 1
+
+
+def moment_data(ctx: Dict[str, Any], i: int) -> Dict[str, Any]:
+    emoji, text, moment_type, intensity, category, time_str = make_moment(ctx["rng"])
+    return {"id": f"bench-{i}-{ctx['rng'].random()}", "emoji": emoji, "text": text, "type": moment_type,
+            "intensity": intensity, "category": category, "time": time_str}
+
+
+def pick_user(ctx: Dict[str, Any], i: int) -> int:
+    return ctx["user_ids"][i % len(ctx["user_ids"])]
+
+
+def pick_day(ctx: Dict[str, Any], i: int) -> date:
+    return date.today() - timedelta(days=1 + ctx["rng"].randrange(ctx["days"]))
+
+
+def import_setup(db: DatabaseService, ctx: Dict[str, Any], i: int) -> None:
+    """Un fichero exportado (una vez) y una cuenta vacía por llamada"""
+    if "export_path" not in ctx:
+        ctx["export_path"] = os.path.join(ctx["tmp"], "import_source.ndjson.gz")
+        db.export_user(ctx["user_ids"][0], ctx["export_path"])
+    ctx["import_user"] = db.create_user(f"import-{i}@reflect.app", BENCH_PASSWORD, f"Importado {i}")
+
+
+def with_moments(count: int) -> Callable:
+    """setup: guardar `count` momentos de hoy para el usuario de la llamada"""
+    def setup(db: DatabaseService, ctx: Dict[str, Any], i: int) -> None:
+        for n in range(count):
+            db.save_interactive_moment(pick_user(ctx, i), moment_data(ctx, n))
+    return setup
+
+
+# Primero las lecturas, después las escrituras (que cambian los datos) y al final lo que recorre todo
+CASES: List[Dict[str, Any]] = [
+    # Estado y caché
+    case("get_connection_stats", lambda db, ctx, i: db.get_connection_stats()),
+    case("get_cache_stats", lambda db, ctx, i: db.get_cache_stats()),
+    case("shard_name", lambda db, ctx, i: db.shard_name(pick_user(ctx, i))),
+    case("get_query_stats", lambda db, ctx, i: db.get_query_stats()),
+    case("get_slow_queries", lambda db, ctx, i: db.get_slow_queries()),
+    case("reset_query_stats", lambda db, ctx, i: db.reset_query_stats()),
+    case("idle_seconds", lambda db, ctx, i: db.idle_seconds()),
+    case("database_files", lambda db, ctx, i: db.database_files(), rows=len),
+    case("database_connections", lambda db, ctx, i: db.database_connections(), rows=len),
+
+    # Usuarios
+    case("login_user", lambda db, ctx, i: db.login_user(ctx["emails"][i % len(ctx["emails"])], BENCH_PASSWORD)),
+    case("get_user_by_email", lambda db, ctx, i: db.get_user_by_email(ctx["emails"][i % len(ctx["emails"])])),
+    case("get_user_by_id", lambda db, ctx, i: db.get_user_by_id(pick_user(ctx, i))),
+
+    # Estadísticas y rachas
+    case("get_user_comprehensive_statistics", lambda db, ctx, i: db.get_user_comprehensive_statistics(pick_user(ctx, i))),
+    case("calculate_current_streak", lambda db, ctx, i: db.calculate_current_streak(pick_user(ctx, i))),
+    case("get_streak_info", lambda db, ctx, i: db.get_streak_info(pick_user(ctx, i))),
+    case("get_tag_counts", lambda db, ctx, i: db.get_tag_counts(pick_user(ctx, i))),
+    case("get_mood_series", lambda db, ctx, i: db.get_mood_series(
+        pick_user(ctx, i), date.today() - timedelta(days=ctx["days"]), date.today(), 14),
+         rows=lambda series: series["days"] if series else 0),
+
+    # Entradas y calendario
+    case("get_interactive_moments_today", lambda db, ctx, i: db.get_interactive_moments_today(pick_user(ctx, i))),
+    case("get_draft", lambda db, ctx, i: db.get_draft(pick_user(ctx, i))),
+    case("get_today_entry_with_temp_tags", lambda db, ctx, i: db.get_today_entry_with_temp_tags(pick_user(ctx, i))),
+    case("has_submitted_today", lambda db, ctx, i: db.has_submitted_today(pick_user(ctx, i))),
+    case("get_entry_count", lambda db, ctx, i: db.get_entry_count(pick_user(ctx, i))),
+    case("get_user_entries", lambda db, ctx, i: db.get_user_entries(
+        pick_user(ctx, i), 20, ctx["rng"].randrange(max(1, ctx["entries_per_user"] - 20)))),
+    case("get_year_summary", lambda db, ctx, i: db.get_year_summary(pick_user(ctx, i), pick_day(ctx, i).year),
+         rows=len),
+    case("get_month_summary", lambda db, ctx, i: db.get_month_summary(
+        pick_user(ctx, i), *(lambda d: (d.year, d.month))(pick_day(ctx, i))), rows=len),
+    case("get_year_heatmap", lambda db, ctx, i: db.get_year_heatmap(pick_user(ctx, i), pick_day(ctx, i).year),
+         rows=lambda heatmap: heatmap["days"]),
+    case("get_history_heatmap", lambda db, ctx, i: db.get_history_heatmap(pick_user(ctx, i)),
+         rows=lambda heatmap: heatmap["days"]),
+    case("get_day_bundle", lambda db, ctx, i: db.get_day_bundle(pick_user(ctx, i), pick_day(ctx, i))),
+    case("get_day_entry", lambda db, ctx, i: db.get_day_entry(
+        pick_user(ctx, i), *(lambda d: (d.year, d.month, d.day))(pick_day(ctx, i)))),
+    case("search_entries", lambda db, ctx, i: db.search_entries(
+        pick_user(ctx, i), ctx["rng"].choice(["correr", "reunión", "cansada", "café", "médico lluvia", "amigos"]))),
+    case("iter_user_entries", lambda db, ctx, i: sum(1 for _ in db.iter_user_entries(pick_user(ctx, i))),
+         rows=lambda result: result, heavy=True),
+
+    # Escrituras
+    case("create_user", lambda db, ctx, i: db.create_user(f"nuevo-{i}@reflect.app", BENCH_PASSWORD, f"Nuevo {i}")),
+    case("update_user_profile", lambda db, ctx, i: db.update_user_profile(
+        pick_user(ctx, i), name=f"Usuario {i}", bio=make_reflection(ctx["rng"])[:120])),
+    case("save_interactive_moment", lambda db, ctx, i: db.save_interactive_moment(pick_user(ctx, i), moment_data(ctx, i))),
+    case("queue_interactive_moment", lambda db, ctx, i: db.queue_interactive_moment(pick_user(ctx, i), moment_data(ctx, i))),
+    case("flush_pending_moments", lambda db, ctx, i: db.flush_pending_moments(pick_user(ctx, i)),
+         rows=lambda result: result,
+         setup=lambda db, ctx, i: [db.queue_interactive_moment(pick_user(ctx, i), moment_data(ctx, n)) for n in range(5)]),
+    case("save_draft", lambda db, ctx, i: db.save_draft(pick_user(ctx, i), reflection=make_reflection(ctx["rng"]))),
+    case("save_temp_tag", lambda db, ctx, i: db.save_temp_tag(
+        pick_user(ctx, i), moment_data(ctx, i)["text"], f"Momento {i}", "positive", "☕")),
+    case("flush_drafts", lambda db, ctx, i: db.flush_drafts(pick_user(ctx, i)), rows=lambda result: result,
+         setup=lambda db, ctx, i: db.save_draft(pick_user(ctx, i), reflection=make_reflection(ctx["rng"]))),
+    case("discard_draft", lambda db, ctx, i: db.discard_draft(pick_user(ctx, i)),
+         setup=lambda db, ctx, i: db.save_draft(pick_user(ctx, i), worth_it=True)),
+    case("save_daily_entry", lambda db, ctx, i: db.save_daily_entry(
+        pick_user(ctx, i), make_reflection(ctx["rng"]),
+        [{"name": "Café con calma", "context": "Momento general", "emoji": "☕"}],
+        [{"name": "Atasco", "context": "Momento general", "emoji": "🚗"}], True, 7)),
+    case("create_daily_entry_from_moments", lambda db, ctx, i: db.create_daily_entry_from_moments(
+        pick_user(ctx, i), make_reflection(ctx["rng"]), True), setup=with_moments(4)),
+    case("clear_interactive_moments_today", lambda db, ctx, i: db.clear_interactive_moments_today(pick_user(ctx, i)),
+         setup=with_moments(4)),
+    case("recompute_streak", lambda db, ctx, i: db.recompute_streak(pick_user(ctx, i)), heavy=True),
+    case("check_user_statistics", lambda db, ctx, i: db.check_user_statistics(pick_user(ctx, i)), heavy=True),
+    case("rebuild_rollups", lambda db, ctx, i: db.rebuild_rollups(pick_user(ctx, i)), heavy=True),
+
+    # Todo el diario
+    case("export_user", lambda db, ctx, i: db.export_user(
+        pick_user(ctx, i), os.path.join(ctx["tmp"], f"export_{i}.ndjson.gz")),
+         rows=lambda report: report["total_rows"] if report else 0, heavy=True),
+    case("import_user", lambda db, ctx, i: db.import_user(ctx["export_path"], ctx["import_user"]),
+         rows=lambda report: report["total_rows"] if report else 0, setup=import_setup, heavy=True),
+    case("rebuild_search_index", lambda db, ctx, i: db.rebuild_search_index(), heavy=True),
+    # El horizonte avanza 30 días por llamada: cada una archiva entradas nuevas
+    case("archive_old_entries", lambda db, ctx, i: db.archive_old_entries(
+        max(1, ctx["days"] - 30 * (i + 2)), pick_user(ctx, i)),
+         rows=lambda report: report["archived"] if report else 0, heavy=True),
+    # Copia completa (sin pausa entre tramos) con verificación y rotación
+    case("backup_now", lambda db, ctx, i: BackupService(
+        db, os.path.join(ctx["tmp"], "backups", "reflect_zen.db"), keep=2, step_pause_ms=0).backup_now(),
+         rows=lambda report: sum(item["pages"] for item in report["files"]), heavy=True),
+    case("maintenance_run_now", lambda db, ctx, i: MaintenanceService(db, slice_pause_ms=0).run_now(),
+         rows=lambda report: sum(stats["slices"] for stats in report["jobs"].values()), heavy=True),
+]
+
+
+# ===============================
+# MEDICIÓN
+# ===============================
+def percentile(samples: List[float], fraction: float) -> float:
+    """Percentil por rango más cercano (sin interpolar: es un valor realmente medido)"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run_case(db: DatabaseService, ctx: Dict[str, Any], bench: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    samples, rows = [], 0
+    count_rows = bench["rows"] or default_rows
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Una llamada de calentamiento (sentencias preparadas, páginas en caché)
+        for i in range(-1, repeat):
+            if bench["setup"]:
+                bench["setup"](db, ctx, i)
+            start = time.perf_counter()
+            result = bench["call"](db, ctx, i)
+            elapsed = time.perf_counter() - start
+            if i >= 0:
+                samples.append(elapsed)
+                rows += count_rows(result)
+
+    total = sum(samples)
+    return {
+        "calls": len(samples),
+        "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+        "mean_ms": round(total / len(samples) * 1000, 3),
+        "rows": rows,
+        "rows_per_second": round(rows / total) if total else 0,
+    }
+
+
+def database_size(directory: str) -> int:
+    """Bytes de todos los ficheros SQLite (catálogo, shards y WAL; sin las copias de seguridad)"""
+    total = 0
+    for root, directories, files in os.walk(directory):
+        directories[:] = [name for name in directories if name != "backups"]
+        for name in files:
+            if name.endswith((".db", ".db-wal")):
+                total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def uncovered_methods() -> List[str]:
+    """Métodos públicos de DatabaseService sin caso (para no olvidar los nuevos)"""
+    covered = {bench["name"] for bench in CASES} | EXCLUDED_METHODS
+    return sorted(name for name, _ in inspect.getmembers(DatabaseService, inspect.isfunction)
+                  if not name.startswith("_") and name not in covered)
+
+
+# ===============================
+# INFORME
+# ===============================
+def print_results(results: Dict[str, Dict[str, Any]], previous: Optional[Dict[str, Any]]) -> None:
+    previous_results = (previous or {}).get("results", {})
+    print(f"   {'método':<36} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'filas/s':>10}")
+    for name, result in results.items():
+        line = (f"   {name:<36} {result['p50_ms']:9.3f} {result['p95_ms']:9.3f} "
+                f"{result['p99_ms']:9.3f} {result['rows_per_second']:10d}")
+        before = previous_results.get(name)
+        if before and before["p50_ms"]:
+            line += f"   p50 {(result['p50_ms'] / before['p50_ms'] - 1) * 100:+6.1f}%"
+            if before["p95_ms"]:
+                line += f"  p95 {(result['p95_ms'] / before['p95_ms'] - 1) * 100:+6.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los métodos públicos de DatabaseService")
+    parser.add_argument("--scale", default="user5y", choices=sorted(SCALES))
+    parser.add_argument("--users", type=int, help="Sobrescribe los usuarios de la escala")
+    parser.add_argument("--days", type=int, help="Sobrescribe los días por usuario de la escala")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--profile", default="mobile")
+    parser.add_argument("--sharding", help="'user' o 'hash:N' (por defecto una base de datos única)")
+    parser.add_argument("--with-cache", action="store_true",
+                        help="Mantener la caché de consultas (por defecto se mide SQLite)")
+    parser.add_argument("--slow-query-ms", type=float, default=None,
+                        help="Medir con la instrumentación de consultas activa (su coste incluido)")
+    parser.add_argument("--only", nargs="+", help="Medir solo estos métodos")
+    parser.add_argument("--json", help="Guardar los resultados en este fichero")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior para mostrar diferencias")
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale])
+    if args.users:
+        scale["users"] = args.users
+    if args.days:
+        scale["days"] = args.days
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            previous = json.load(handle)
+        # En JSON las tuplas son listas
+        if previous.get("dataset", {}).get("scale") != json.loads(json.dumps(scale)):
+            print("⚠️ La ejecución anterior usó otra escala: las diferencias no son comparables")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = DatabaseService(os.path.join(tmp, "reflect_zen.db"), profile=args.profile,
+                                 sharding=args.sharding,
+                                 shard_directory=os.path.join(tmp, "shards") if args.sharding else None,
+                                 slow_query_ms=args.slow_query_ms)
+            if not args.with_cache:
+                db.query_cache.max_bytes = 0
+            dataset = generate_journal(db, seed=args.seed, **scale)
+
+        user_ids = dataset.pop("user_ids")
+        initial_size = database_size(tmp)
+        print(f"📚 {dataset['users']} usuarios × {dataset['days']} días: {dataset['entries']} entradas, "
+              f"{dataset['tags']} tags, {dataset['moments']} momentos "
+              f"({dataset['seconds']} s, {initial_size / 1024 / 1024:.1f} MB)")
+
+        ctx = {
+            "tmp": tmp,
+            "rng": random.Random(args.seed),
+            "user_ids": user_ids,
+            "emails": [f"bench-{args.seed}-{n}@reflect.app" for n in range(len(user_ids))],
+            "days": scale["days"],
+            "entries_per_user": dataset["entries"] // max(1, len(user_ids)),
+        }
+
+        results = {}
+        for bench in CASES:
+            if args.only and bench["name"] not in args.only:
+                continue
+            repeat = max(3, args.repeat // 10) if bench["heavy"] else args.repeat
+            results[bench["name"]] = run_case(db, ctx, bench, repeat)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.close()
+        close_ms = round((time.perf_counter() - start) * 1000, 3)
+        results["close"] = {"calls": 1, "p50_ms": close_ms, "p95_ms": close_ms, "p99_ms": close_ms,
+                            "mean_ms": close_ms, "rows": 0, "rows_per_second": 0}
+
+        final_size = database_size(tmp)
+
+    print_results(results, previous)
+    print(f"💾 Tamaño: {initial_size} → {final_size} bytes")
+
+    missing = uncovered_methods()
+    if missing:
+        print(f"⚠️ Métodos públicos sin benchmark: {', '.join(missing)}")
+
+    if args.json:
+        output = {
+            "meta": {
+                "commit": git_commit(),
+                "date": date.today().isoformat(),
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "profile": args.profile,
+                "sharding": args.sharding,
+                "with_cache": args.with_cache,
+                "slow_query_ms": args.slow_query_ms,
+                "repeat": args.repeat,
+                "seed": args.seed,
+            },
+            "dataset": {"scale": scale, **dataset, "db_size_bytes": initial_size},
+            "db_size_bytes": final_size,
+            "results": results,
+        }
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(output, handle, indent=2, ensure_ascii=False, default=list)
+        print(f"📝 Resultados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+⏱️ Benchmark: escrituras concurrentes de varios usuarios con una base de datos única vs sharding
+Uso: python -m benchmarks.bench_shards [--users 8] [--moments 200] [--shards hash:4]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+
+from services.database_service import DatabaseService
+
+
+def concurrent_writes(db: DatabaseService, user_ids, moments: int) -> float:
+    """Un hilo por usuario guardando momentos con save_interactive_moment (como en modo web)"""
+    failures = []
+
+    def writer(user_id):
+        for i in range(moments):
+            if db.save_interactive_moment(user_id, {"id": f"{user_id}-{i}", "emoji": "😊",
+                                                    "text": "Café con calma", "type": "positive"}) is None:
+                failures.append(user_id)
+
+    workers = [threading.Thread(target=writer, args=(user_id,)) for user_id in user_ids]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    elapsed = time.perf_counter() - start
+
+    if failures:
+        print(f"   ⚠️ {len(failures)} escrituras fallidas")
+    return elapsed
+
+
+def run(label: str, db: DatabaseService, users: int, moments: int) -> float:
+    with contextlib.redirect_stdout(io.StringIO()):
+        user_ids = [db.create_user(f"bench{i}@reflect.app", "bench", f"Bench {i}") for i in range(users)]
+
+    elapsed = concurrent_writes(db, user_ids, moments)
+    total = users * moments
+    print(f"   {label:<28} {elapsed * 1000:9.1f} ms  ({total / elapsed:8.0f} escrituras/s)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de sharding por usuario")
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--moments", type=int, default=200)
+    parser.add_argument("--shards", default="hash:4", help="Modo de sharding a comparar ('user' o 'hash:N')")
+    parser.add_argument("--profile", default="server")
+    args = parser.parse_args()
+
+    print(f"👥 {args.users} usuarios escribiendo {args.moments} momentos cada uno (perfil {args.profile})")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            single = DatabaseService(os.path.join(tmp, "single", "reflect_zen.db"), profile=args.profile)
+            sharded = DatabaseService(os.path.join(tmp, "sharded", "catalog.db"), profile=args.profile,
+                                      sharding=args.shards)
+
+        baseline = run("base de datos única", single, args.users, args.moments)
+        result = run(f"sharding {args.shards}", sharded, args.users, args.moments)
+        print(f"   ⚡ mejora: x{baseline / result:.1f}")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            single.close()
+            sharded.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+🔍 Comprobación: una lectura fallida no se sirve después desde la caché de consultas
+Uso: python -m benchmarks.check_query_cache
+
+Con la tabla daily_entries renombrada desde otra conexión, las lecturas caen
+en su except y devuelven el valor de respaldo (False, 0...). Al restaurarla,
+la siguiente llamada debe leer la base de datos, no el respaldo cacheado.
+"""
+
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+
+from services.database_service import DatabaseService
+
+# (método, argumentos tras user_id, valor de respaldo del except)
+READS = [
+    ("has_submitted_today", (), False),
+    ("get_entry_count", (), 0),
+    ("get_user_entries", (), []),
+]
+
+
+def break_table(db_path: str, broken: bool) -> None:
+    conn = sqlite3.connect(db_path)
+    try:
+        if broken:
+            conn.execute("ALTER TABLE daily_entries RENAME TO daily_entries_broken")
+        else:
+            conn.execute("ALTER TABLE daily_entries_broken RENAME TO daily_entries")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "check.db")
+        with contextlib.redirect_stdout(io.StringIO()):
+            db = DatabaseService(db_path)
+            user_id = db.create_user("cache@reflect.app", "clave-segura", "Caché")
+            db.save_daily_entry(user_id, "Un día tranquilo", worth_it=True, mood_score=7)
+            expected = {name: getattr(db, name)(user_id, *args) for name, args, _ in READS}
+
+            # Vaciar la caché para que la lectura con la tabla rota sea un fallo de caché
+            db.query_cache.clear()
+            break_table(db_path, broken=True)
+            during = {name: getattr(db, name)(user_id, *args) for name, args, _ in READS}
+            break_table(db_path, broken=False)
+            after = {name: getattr(db, name)(user_id, *args) for name, args, _ in READS}
+            db.close()
+
+    for name, _, fallback in READS:
+        if during[name] != fallback:
+            failures.append(f"{name}: con la tabla rota devolvió {during[name]!r}, se esperaba {fallback!r}")
+        elif after[name] != expected[name]:
+            failures.append(f"{name}: tras restaurar devolvió {after[name]!r} (respaldo cacheado), "
+                            f"se esperaba {expected[name]!r}")
+        else:
+            print(f"✅ {name}: el respaldo {fallback!r} no quedó en caché")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
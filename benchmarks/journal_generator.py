@@ -0,0 +1,204 @@
+"""
+🏭 Generador de diarios sintéticos - ReflectApp
+✅ NUEVO: Reflexiones en español, tags y momentos con aspecto real (plantillas + vocabulario del diario)
+✅ NUEVO: Determinista: misma semilla y escala → mismos datos, para comparar entre commits
+✅ NUEVO: Carga masiva con executemany por usuario (miles de usuarios en un fichero o con sharding)
+
+Uso desde un benchmark:
+    stats = generate_journal(db, users=1, days=5 * 365, seed=42)
+"""
+
+import hashlib
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from services.day_numbers import day_number
+
+BENCH_PASSWORD = "benchmark"
+
+# Escalas predefinidas: (usuarios, días por usuario, momentos por día)
+SCALES: Dict[str, Dict[str, Any]] = {
+    "smoke": {"users": 3, "days": 90, "moments_per_day": (0, 4)},
+    "user5y": {"users": 1, "days": 5 * 365, "moments_per_day": (1, 8)},
+    "users100": {"users": 100, "days": 365, "moments_per_day": (0, 5)},
+    "users10k": {"users": 10_000, "days": 30, "moments_per_day": (0, 4)},
+}
+
+OPENERS = [
+    "Hoy", "Esta mañana", "Por la tarde", "Al final del día", "Después del trabajo",
+    "Durante la comida", "Antes de dormir", "A primera hora",
+]
+EVENTS = [
+    "tuve una reunión larga con el equipo", "salí a correr por el parque", "llamé a mi madre",
+    "cociné una tortilla para la cena", "terminé por fin la entrega del proyecto",
+    "me quedé atascado en el tráfico", "leí un buen rato en el sofá", "fui al gimnasio",
+    "quedé con amigos para tomar algo", "discutí con un compañero", "paseé al perro bajo la lluvia",
+    "hice meditación diez minutos", "estudié para el examen", "ordené la casa",
+    "vi una película con mi pareja", "tuve cita con el médico", "trabajé desde casa",
+    "ayudé a mi hermana con la mudanza", "escuché música mientras cocinaba", "dormí la siesta",
+]
+FEELINGS = [
+    "me sentí tranquilo", "estuve bastante cansada", "me noté con ansiedad", "me sentí agradecido",
+    "estuve de muy buen humor", "me costó concentrarme", "me sentí orgullosa de mí misma",
+    "noté el estrés en el cuerpo", "estuve un poco triste", "tuve mucha energía",
+]
+REASONS = [
+    "porque dormí mal", "porque hacía sol", "después de tantos días de lluvia", "por la falta de tiempo",
+    "gracias a la gente que tengo cerca", "porque no paré en todo el día", "sin saber muy bien por qué",
+    "porque cumplí lo que me propuse", "por las noticias", "porque por fin descansé",
+]
+CLOSERS = [
+    "Mañana quiero ir con más calma.", "Ha sido un buen día.", "Necesito descansar más.",
+    "Me apunto hacerlo más a menudo.", "Podría haber sido peor.", "Agradezco los pequeños momentos.",
+    "Tengo que hablarlo con calma.", "Poco a poco.",
+]
+
+POSITIVE_MOMENTS = [
+    ("☕", "Café con calma"), ("🌳", "Paseo por el parque"), ("📞", "Llamada con mamá"),
+    ("🧘", "Clase de yoga"), ("🍝", "Cena con amigos"), ("📚", "Leer antes de dormir"),
+    ("🎵", "Canción favorita en la radio"), ("🌞", "Sol en la terraza"), ("🏃", "Salir a correr"),
+    ("🤗", "Abrazo inesperado"), ("✅", "Entrega terminada"), ("🐶", "Jugar con el perro"),
+]
+NEGATIVE_MOMENTS = [
+    ("😤", "Discusión en el trabajo"), ("🚗", "Atasco en la autopista"), ("😴", "Dormí mal"),
+    ("🌧️", "Lluvia sin paraguas"), ("📧", "Correo urgente de última hora"), ("🤕", "Dolor de cabeza"),
+    ("💸", "Gasto inesperado"), ("⏰", "Llegar tarde"),
+]
+CATEGORIES = ["general", "quick", "mood", "timeline"]
+
+
+# ===============================
+# TEXTO
+# ===============================
+def make_reflection(rng: random.Random) -> str:
+    """2-6 frases encadenadas con las plantillas del diario"""
+    sentences = []
+    for _ in range(rng.randint(2, 6)):
+        sentence = f"{rng.choice(OPENERS)} {rng.choice(EVENTS)} y {rng.choice(FEELINGS)} {rng.choice(REASONS)}."
+        sentences.append(sentence)
+    sentences.append(rng.choice(CLOSERS))
+    return " ".join(sentences)
+
+
+def make_moment(rng: random.Random) -> Tuple[str, str, str, int, str, str]:
+    """(emoji, texto, tipo, intensidad, categoría, hora)"""
+    if rng.random() < 0.7:
+        emoji, text = rng.choice(POSITIVE_MOMENTS)
+        moment_type = "positive"
+    else:
+        emoji, text = rng.choice(NEGATIVE_MOMENTS)
+        moment_type = "negative"
+    time_str = f"{rng.randint(7, 23):02d}:{rng.randint(0, 59):02d}"
+    return emoji, text, moment_type, rng.randint(1, 10), rng.choice(CATEGORIES), time_str
+
+
+# ===============================
+# CARGA
+# ===============================
+def _create_users(db, count: int, seed: int) -> List[int]:
+    """Usuarios bench-<semilla>-<n>@reflect.app con la contraseña BENCH_PASSWORD"""
+    password_hash = hashlib.sha256(BENCH_PASSWORD.encode()).hexdigest()
+    rows = [(f"bench-{seed}-{n}@reflect.app", password_hash, f"Usuario {n}", "🦫") for n in range(count)]
+
+    with db._connections.transaction(immediate=True) as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (email, password_hash, name, avatar_emoji) VALUES (?, ?, ?, ?)", rows
+        )
+        return [row[0] for row in conn.execute(
+            "SELECT id FROM users WHERE email LIKE ? ORDER BY id", (f"bench-{seed}-%@reflect.app",)
+        )]
+
+
+def _load_user(db, rng: random.Random, user_id: int, days: int, entry_rate: float,
+               moments_per_day: Tuple[int, int], counts: Dict[str, int]) -> None:
+    """Historial de un usuario en una sola transacción (ids explícitos: tags y momentos sin lastrowid)"""
+    today = date.today()
+    entries, tags, moments = [], [], []
+
+    with db._user_connections(user_id).transaction(immediate=True) as conn:
+        next_entry_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM daily_entries").fetchone()[0]
+
+        for offset in range(days, -1, -1):
+            day = today - timedelta(days=offset)
+            entry_date = day.isoformat()
+            day_moments = [make_moment(rng) for _ in range(rng.randint(*moments_per_day))]
+
+            # Hoy sin entrada: los momentos quedan pendientes (pantalla de momentos)
+            has_entry = offset > 0 and rng.random() < entry_rate
+            entry_id = None
+            if has_entry:
+                entry_id = next_entry_id
+                next_entry_id += 1
+                reflection = make_reflection(rng)
+                created_at = datetime.combine(day, datetime.min.time()) + timedelta(hours=rng.randint(19, 23))
+                entries.append((
+                    entry_id, user_id, reflection, rng.choice([1, 1, 1, 0, None]), rng.randint(1, 10),
+                    len(reflection.split()), entry_date, day_number(day), created_at.isoformat(" ")
+                ))
+                for position, (emoji, text, moment_type, _, category, time_str) in enumerate(day_moments):
+                    tags.append((entry_id, user_id, moment_type, position, text,
+                                 f"Momento {category} a las {time_str}", emoji))
+
+            for emoji, text, moment_type, intensity, category, time_str in day_moments:
+                moments.append((
+                    user_id, f"{user_id}-{entry_date}-{time_str}-{rng.randint(0, 1 << 30)}", emoji, text,
+                    moment_type, intensity, category, time_str, entry_date, day_number(day),
+                    entry_id, 0 if has_entry else 1
+                ))
+
+        conn.executemany("""
+            INSERT INTO daily_entries (
+                id, user_id, free_reflection, worth_it, mood_score, word_count,
+                entry_date, day_number, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, entries)
+        conn.executemany("""
+            INSERT INTO entry_tags (entry_id, user_id, tag_type, position, name, context, emoji)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, tags)
+        conn.executemany("""
+            INSERT INTO interactive_moments (
+                user_id, moment_id, emoji, text, moment_type, intensity, category,
+                time_str, entry_date, day_number, entry_id, is_active
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, moments)
+        conn.execute("INSERT OR IGNORE INTO user_statistics (user_id, stat_date) VALUES (?, CURRENT_DATE)",
+                     (user_id,))
+
+    counts["entries"] += len(entries)
+    counts["tags"] += len(tags)
+    counts["moments"] += len(moments)
+
+
+def generate_journal(db, users: int = 1, days: int = 365, seed: int = 42, entry_rate: float = 0.85,
+                     moments_per_day: Tuple[int, int] = (1, 8)) -> Dict[str, Any]:
+    """
+    Llenar `db` con `users` usuarios y `days` días de historial cada uno
+
+    Returns:
+        Dict con ids de usuario, filas generadas y segundos
+    """
+    start = time.perf_counter()
+    counts = {"entries": 0, "tags": 0, "moments": 0}
+
+    user_ids = _create_users(db, users, seed)
+    for user_id in user_ids:
+        # Una semilla por usuario: añadir usuarios no cambia el historial de los demás
+        _load_user(db, random.Random(f"{seed}-{user_id}"), user_id, days, entry_rate, moments_per_day, counts)
+
+    # Datos derivados en bloque (rollups, rachas y estadísticas), igual que tras una migración
+    for connections in db._data_connections():
+        with connections.transaction(immediate=True) as conn:
+            db._rebuild_rollups(conn.cursor())
+            db._rebuild_all_statistics(conn.cursor())
+    db.query_cache.clear()
+
+    return {
+        "user_ids": user_ids,
+        "users": len(user_ids),
+        "days": days,
+        **counts,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
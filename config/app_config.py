@@ -22,7 +22,19 @@ class AppConfig:
     # ===============================
     DATABASE_PATH = "data/reflect_zen.db"
     BACKUP_DATABASE_PATH = "data/reflect_zen_backup.db"
+    # ✅ NUEVO: Copias en caliente programadas en reposo (services/db_backup.py)
+    BACKUP_INTERVAL_HOURS = 24
+    BACKUP_KEEP = 5  # Copias rotadas que se conservan (la última + .1 ... .4)
+    BACKUP_IDLE_SECONDS = 30  # Segundos sin transacciones antes de empezar una copia
+    # ✅ NUEVO: Mantenimiento en reposo (services/db_maintenance.py)
+    MAINTENANCE_INTERVAL_HOURS = 24
+    MAINTENANCE_IDLE_SECONDS = 60  # Sin cambios de pantalla ni transacciones
     DATA_DIRECTORY = "data"
+    ARCHIVE_AFTER_DAYS = 365  # ✅ NUEVO: Texto de entradas más antiguas → archivo comprimido
+    # ✅ NUEVO: Sharding opcional (REFLECT_DB_SHARDING=user|hash:N): catálogo de usuarios + shards
+    SHARD_CATALOG_PATH = "data/reflect_catalog.db"
+    SHARD_DIRECTORY = "data/shards"
+    MAX_OPEN_SHARDS = 64
 
     # ===============================
     # CONFIGURACIÓN DE SESIONES
@@ -0,0 +1,194 @@
+"""
+🛠️ Administración de la base de datos - ReflectApp
+Tareas de mantenimiento que se lanzan a mano desde la terminal
+
+Uso:
+    python db_admin.py rebuild-rollups [--user-id ID] [--db data/reflect_zen.db]
+    python db_admin.py rebuild-fts [--db data/reflect_zen.db]
+    python db_admin.py export --user-id ID --out diario.ndjson.gz [--format ndjson|csv]
+    python db_admin.py import --file diario.ndjson.gz [--user-id ID] [--batch-size 1000]
+    python db_admin.py archive [--older-than-days 365] [--user-id ID]
+    python db_admin.py check-stats [--user-id ID] [--repair]
+    python db_admin.py backup [--out data/reflect_zen_backup.db] [--keep 5]
+    python db_admin.py maintenance
+    python db_admin.py vacuum
+    python db_admin.py --db data/reflect_catalog.db --sharding hash:16 shard-split --source data/reflect_zen.db
+
+Con --sharding, --db es el catálogo de usuarios y las tareas recorren todos los shards.
+Con --slow-query-ms, al terminar se muestra el tiempo SQL por método y las consultas lentas.
+"""
+
+import argparse
+
+from config.app_config import AppConfig
+from services.database_service import DatabaseService
+from services.db_backup import DEFAULT_PAGES_PER_STEP, BackupService
+from services.db_maintenance import MaintenanceService, enable_incremental_vacuum
+from services.db_shards import split_database
+
+
+def cmd_rebuild_rollups(db: DatabaseService, args) -> bool:
+    """Regenerar daily_rollups y monthly_rollups desde las tablas crudas"""
+    return db.rebuild_rollups(args.user_id)
+
+
+def cmd_rebuild_fts(db: DatabaseService, args) -> bool:
+    """Regenerar el índice de búsqueda journal_fts desde las tablas crudas"""
+    return db.rebuild_search_index()
+
+
+def cmd_export(db: DatabaseService, args) -> bool:
+    """Exportar el diario de un usuario en streaming"""
+    report = db.export_user(args.user_id, args.out, args.format)
+    if report:
+        print(f"   {report['rows']} en {report['seconds']} s")
+    return report is not None
+
+
+def cmd_import(db: DatabaseService, args) -> bool:
+    """Importar un diario exportado"""
+    report = db.import_user(args.file, args.user_id, batch_size=args.batch_size)
+    if report:
+        print(f"   {report['rows']} en {report['seconds']} s")
+    return report is not None
+
+
+def cmd_archive(db: DatabaseService, args) -> bool:
+    """Comprimir el texto de las entradas anteriores al horizonte"""
+    return db.archive_old_entries(args.older_than_days, args.user_id) is not None
+
+
+def cmd_check_stats(db: DatabaseService, args) -> bool:
+    """Comparar user_statistics con un recálculo desde cero (y repararlas)"""
+    report = db.check_user_statistics(args.user_id, repair=args.repair)
+    for user_id, drift in report["drift"].items():
+        fields = ", ".join(f"{field} {values['stored']} → {values['actual']}" for field, values in drift.items())
+        print(f"   usuario {user_id}: {fields}")
+    print(f"📊 {report['checked']} usuarios, {report['drifted']} con diferencias, {report['repaired']} reparados")
+    return "error" not in report and (args.repair or not report["drifted"])
+
+
+def cmd_backup(db: DatabaseService, args) -> bool:
+    """Copia en caliente verificada y rotada de todos los ficheros"""
+    report = BackupService(db, args.out, keep=args.keep, pages_per_step=args.pages_per_step).backup_now()
+    for item in report["files"]:
+        status = "✅" if item["ok"] else f"❌ {item['error']}"
+        print(f"   {item['source']} → {item['destination']}: {item['pages']} páginas en {item['steps']} tramos, "
+              f"{item['restarts']} reinicios, bloqueo máx. {item['max_stall_ms']:.1f} ms {status}")
+    print(f"💾 {report['bytes'] / 1024:.0f} KB en {report['seconds']} s ({report['mb_per_second']} MB/s), "
+          f"bloqueo total {report['stall_ms']:.1f} ms")
+    return report["ok"]
+
+
+def cmd_maintenance(db: DatabaseService, args) -> bool:
+    """Todas las tareas de mantenimiento ahora (las mismas que se hacen en reposo)"""
+    # A mano se puede vaciar el -wal (TRUNCATE); el programador en reposo solo hace PASSIVE
+    report = MaintenanceService(db, truncate_wal=True).run_now()
+    for job, stats in report["jobs"].items():
+        details = ", ".join(f"{key} {value}" for key, value in stats.items() if key not in ("seconds", "slices"))
+        print(f"   {job:<20} {stats['seconds'] * 1000:9.1f} ms en {stats['slices']} tramos  {details}")
+    return report["completed"] and not any(stats.get("errors") for stats in report["jobs"].values())
+
+
+def cmd_vacuum(db: DatabaseService, args) -> bool:
+    """VACUUM completo con auto_vacuum incremental (una vez, para ficheros creados antes)"""
+    for path in db.database_files():
+        report = enable_incremental_vacuum(path)
+        print(f"   {path}: {report['bytes_before']} → {report['bytes_after']} bytes, "
+              f"auto_vacuum {report['auto_vacuum']}")
+    return True
+
+
+def cmd_shard_split(db: DatabaseService, args) -> bool:
+    """Repartir una base de datos única entre el catálogo y los shards"""
+    if db.shards is None:
+        print("❌ shard-split necesita --sharding")
+        return False
+    report = split_database(db, args.source)
+    print(f"🧩 {report['users']} usuarios repartidos en {report['shards']} shards: {report['rows']}")
+    return True
+
+
+def print_query_stats(db: DatabaseService) -> None:
+    """Resumen de la instrumentación al terminar la tarea"""
+    print("🔬 Tiempo SQL por método:")
+    for method, stats in db.get_query_stats().items():
+        print(f"   {method:<32} {stats['statements']:6d} sentencias {stats['total_ms']:10.1f} ms "
+              f"{stats['rows']:8d} filas  {stats['slow']} lentas")
+    for query in db.get_slow_queries(5):
+        print(f"🐢 {query['ms']:.1f} ms en {query['method']}: {query['sql'][:100]}")
+        for detail in query["plan"]:
+            print(f"      {detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Administración de la base de datos de ReflectApp")
+    parser.add_argument("--db", default="data/reflect_zen.db", help="Ruta de la base de datos (o del catálogo)")
+    parser.add_argument("--sharding", default=None, help="'user' o 'hash:N' para bases de datos con shards")
+    parser.add_argument("--shard-dir", default=AppConfig.SHARD_DIRECTORY, help="Carpeta de los shards")
+    parser.add_argument("--slow-query-ms", type=float, default=None,
+                        help="Instrumentar las consultas y registrar las que superen este tiempo")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser("rebuild-rollups", help="Regenerar los rollups del calendario")
+    rebuild.add_argument("--user-id", type=int, default=None, help="Solo este usuario")
+    rebuild.set_defaults(handler=cmd_rebuild_rollups)
+
+    rebuild_fts = subparsers.add_parser("rebuild-fts", help="Regenerar el índice de búsqueda")
+    rebuild_fts.set_defaults(handler=cmd_rebuild_fts)
+
+    export = subparsers.add_parser("export", help="Exportar el diario de un usuario")
+    export.add_argument("--user-id", type=int, required=True)
+    export.add_argument("--out", required=True, help="Fichero .ndjson o .csv (añadir .gz para comprimir)")
+    export.add_argument("--format", choices=["ndjson", "csv"], default=None)
+    export.set_defaults(handler=cmd_export)
+
+    import_parser = subparsers.add_parser("import", help="Importar un diario exportado")
+    import_parser.add_argument("--file", required=True)
+    import_parser.add_argument("--user-id", type=int, default=None, help="Por defecto, la cuenta con el mismo email")
+    import_parser.add_argument("--batch-size", type=int, default=1000)
+    import_parser.set_defaults(handler=cmd_import)
+
+    archive = subparsers.add_parser("archive", help="Archivar (comprimir) el texto de entradas antiguas")
+    archive.add_argument("--older-than-days", type=int, default=AppConfig.ARCHIVE_AFTER_DAYS)
+    archive.add_argument("--user-id", type=int, default=None, help="Solo este usuario")
+    archive.set_defaults(handler=cmd_archive)
+
+    check_stats = subparsers.add_parser("check-stats", help="Comprobar las estadísticas de usuario")
+    check_stats.add_argument("--user-id", type=int, default=None, help="Solo este usuario")
+    check_stats.add_argument("--repair", action="store_true", help="Sobrescribir las filas con diferencias")
+    check_stats.set_defaults(handler=cmd_check_stats)
+
+    backup = subparsers.add_parser("backup", help="Copia de seguridad verificada (con rotación)")
+    backup.add_argument("--out", default=AppConfig.BACKUP_DATABASE_PATH, help="Copia del fichero principal")
+    backup.add_argument("--keep", type=int, default=AppConfig.BACKUP_KEEP, help="Copias rotadas a conservar")
+    backup.add_argument("--pages-per-step", type=int, default=DEFAULT_PAGES_PER_STEP,
+                        help="Páginas por tramo (-1: de una vez)")
+    backup.set_defaults(handler=cmd_backup)
+
+    maintenance = subparsers.add_parser("maintenance", help="ANALYZE, checkpoint, vacuum incremental y purga")
+    maintenance.set_defaults(handler=cmd_maintenance)
+
+    vacuum = subparsers.add_parser("vacuum", help="Activar el vacuum incremental (VACUUM completo, con la app cerrada)")
+    vacuum.set_defaults(handler=cmd_vacuum)
+
+    shard_split = subparsers.add_parser("shard-split", help="Repartir una base de datos única en shards")
+    shard_split.add_argument("--source", required=True, help="Base de datos única (no se modifica)")
+    shard_split.set_defaults(handler=cmd_shard_split)
+
+    args = parser.parse_args()
+
+    db = DatabaseService(args.db, sharding=args.sharding, shard_directory=args.shard_dir,
+                         max_open_shards=AppConfig.MAX_OPEN_SHARDS, slow_query_ms=args.slow_query_ms)
+    try:
+        ok = args.handler(db, args)
+        if args.slow_query_ms is not None:
+            print_query_stats(db)
+    finally:
+        db.close()
+
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
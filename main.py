@@ -86,6 +86,9 @@ class ReflectApp:
         # Inicializar notificaciones móviles
         self.initialize_mobile_notification_system()
 
+        # ✅ NUEVO: Copias de seguridad y mantenimiento en reposo
+        self.start_database_background_tasks()
+
         # Aplicar tema inicial
         self.apply_current_theme()
 
@@ -96,6 +99,8 @@ class ReflectApp:
         page.on_route_change = self.handle_route_change
         page.on_view_pop = self.handle_view_pop
         page.on_window_event = self.handle_window_event
+        # ✅ NUEVO: Modo web: la sesión del navegador se cierra sin cambiar de pantalla
+        page.on_disconnect = self.handle_disconnect
 
         # ✅ NUEVO: Verificar auto-login antes de ir a login
         print("🔑 Verificando auto-login...")
@@ -152,6 +157,15 @@ class ReflectApp:
         except Exception as e:
             print(f"⚠️ Error inicializando notificaciones móviles: {e}")
 
+    def start_database_background_tasks(self):
+        """✅ NUEVO: Programar copias de seguridad y mantenimiento (se hacen cuando la app está en reposo)"""
+        try:
+            from services import backup_service, maintenance_service
+            backup_service.start()
+            maintenance_service.start()
+        except Exception as e:
+            print(f"⚠️ Error programando tareas de base de datos: {e}")
+
     def start_mobile_notifications_for_user(self, user_data):
         """Activar notificaciones para usuario"""
         if not self.mobile_notification_service:
@@ -179,6 +193,10 @@ class ReflectApp:
 
     def handle_window_event(self, e):
         """Manejar eventos de ventana"""
+        if e.data == "close":
+            # ✅ NUEVO: Lo que quede en memoria se escribe antes de cerrar (services cierra la base de datos al salir)
+            self.flush_pending_writes()
+
         if e.data == "close" and self.mobile_notification_service and self.current_user:
             user_name = self.current_user.get('name', 'Viajero')
             user_emoji = self.current_user.get('avatar_emoji', '🦫')
@@ -193,6 +211,8 @@ class ReflectApp:
     def handle_route_change(self, route):
         """Manejar cambios de ruta con sistema de perfil"""
         print(f"🛣️ === NAVEGACIÓN A: {self.page.route} ===")
+        self.mark_ui_activity()
+        self.flush_pending_writes()
         self.page.views.clear()
 
         # Aplicar tema actual
@@ -252,6 +272,36 @@ class ReflectApp:
         self.page.update()
         print(f"✅ Navegación a {self.page.route} completada")
 
+    def mark_ui_activity(self):
+        """✅ NUEVO: Avisar al mantenimiento de que el usuario está usando la app"""
+        try:
+            from services import maintenance_service
+            maintenance_service.touch()
+        except Exception as e:
+            print(f"⚠️ Error registrando actividad: {e}")
+
+    def flush_pending_writes(self):
+        """
+        ✅ MEJORADO: Escribir los momentos en cola y el borrador del día del usuario
+
+        Al cambiar de pantalla, al cerrar sesión y al cerrar la ventana o la
+        sesión web: los hilos de volcado solo escriben cada pocos segundos.
+        """
+        if not self.current_user:
+            return
+
+        try:
+            from services import db
+            user_id = self.current_user.get('id')
+            db.flush_pending_moments(user_id)
+            db.flush_drafts(user_id)
+        except Exception as e:
+            print(f"⚠️ Error escribiendo cambios pendientes: {e}")
+
+    def handle_disconnect(self, e):
+        """✅ NUEVO: Sesión web cerrada: escribir lo pendiente (la base de datos es compartida, no se cierra)"""
+        self.flush_pending_writes()
+
     def handle_view_pop(self, view):
         """Manejar navegación hacia atrás"""
         print(f"⬅️ VIEW POP desde {getattr(view, 'route', 'unknown')}")
@@ -308,6 +358,9 @@ class ReflectApp:
                     priority="low"
                 )
 
+            # ✅ NUEVO: Escribir momentos y borrador antes de olvidar al usuario
+            self.flush_pending_writes()
+
             # Limpiar sesión del sistema
             logout_user()
 
@@ -3,6 +3,11 @@
 Ejecuta este archivo para acceder desde tu móvil
 """
 
+import os
+
+# 🌐 Modo servidor: conexiones con más caché y mmap para varios usuarios a la vez
+os.environ.setdefault("REFLECT_DB_PROFILE", "server")
+
 import flet as ft
 from main import create_improved_app
 
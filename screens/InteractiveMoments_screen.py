@@ -183,13 +183,37 @@ class InteractiveMomentsScreen:
             return False
 
     def auto_save_moment(self, moment):
-        """Auto-guardar momento si está habilitado"""
-        if self.auto_save_enabled:
-            success = self.save_moment_to_db(moment)
-            if success:
-                print(f"🔄 Auto-guardado: {moment.emoji} {moment.text}")
-            return success
-        return True
+        """Auto-guardar momento si está habilitado (encolado y escrito en lote)"""
+        if not self.auto_save_enabled:
+            return True
+
+        if not self.current_user:
+            print("⚠️ No hay usuario para guardar momento")
+            return False
+
+        try:
+            from services import db
+            db.queue_interactive_moment(
+                user_id=self.current_user['id'],
+                moment_data=moment.to_dict()
+            )
+            print(f"🔄 Auto-guardado: {moment.emoji} {moment.text}")
+            return True
+
+        except Exception as e:
+            print(f"❌ Error auto-guardando momento: {e}")
+            return False
+
+    def flush_pending_moments(self):
+        """✅ NUEVO: Escribir ya los momentos encolados (al salir de la pantalla)"""
+        if not self.current_user:
+            return
+
+        try:
+            from services import db
+            db.flush_pending_moments(self.current_user['id'])
+        except Exception as e:
+            print(f"❌ Error escribiendo momentos pendientes: {e}")
 
     def build(self):
         """✅ COMPLETAMENTE CORREGIDO: Layout móvil con padding superior y centrado perfecto"""
@@ -1046,8 +1070,8 @@ class InteractiveMomentsScreen:
             theme=self.theme
         )
 
-    def save_moments(self, e=None):
-        """✅ CORREGIDO: Guardar todos los momentos"""
+    async def save_moments(self, e=None):
+        """✅ CORREGIDO: Guardar todos los momentos (la escritura va al hilo escritor)"""
         if not self.moments:
             self.show_message("⚠️ No hay momentos para guardar", is_error=True)
             return
@@ -1055,11 +1079,12 @@ class InteractiveMomentsScreen:
         print(f"💾 Preparando {len(self.moments)} momentos para guardar")
 
         try:
-            from services import db
+            from services import async_db
             user_id = self.current_user['id']
 
             # ✅ Usar el nuevo método para convertir momentos a entrada diaria
-            entry_id = db.create_daily_entry_from_moments(
+            # (escribe antes los momentos encolados)
+            entry_id = await async_db.create_daily_entry_from_moments(
                 user_id=user_id,
                 free_reflection="Entrada creada desde Momentos Interactivos",
                 worth_it=len([m for m in self.moments if m.type == "positive"]) > len([m for m in self.moments if m.type == "negative"])
@@ -1108,16 +1133,19 @@ class InteractiveMomentsScreen:
     # ===============================
     def go_to_calendar(self, e=None):
         """Ir al calendario"""
+        self.flush_pending_moments()
         if self.page:
             self.page.go("/calendar")
 
     def go_to_theme_selector(self, e=None):
         """Ir al selector de temas"""
+        self.flush_pending_moments()
         if self.page:
             self.page.go("/theme_selector")
 
     def go_to_mobile_notification_settings(self, e=None):
         """Ir a configuración de notificaciones móviles"""
+        self.flush_pending_moments()
         if self.page:
             self.page.go("/mobile_notification_settings")
         else:
@@ -1126,6 +1154,7 @@ class InteractiveMomentsScreen:
     def go_back(self, e=None):
         """Volver"""
         print("🔙 Volviendo...")
+        self.flush_pending_moments()
         if self.on_go_back:
             self.on_go_back()
         elif self.page:
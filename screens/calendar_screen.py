@@ -3,11 +3,15 @@
 ✅ ARREGLADO: Navegación correcta entre días
 ✅ ARREGLADO: Datos específicos por día
 ✅ ARREGLADO: Paso correcto de parámetros entre pantallas
+✅ NUEVO: Tarjetas de mes y rejillas de días desde un único mapa de calor por año (arrays por día)
+✅ NUEVO: Vista de todo el historial con una sola lectura
 """
 
 import flet as ft
 from datetime import datetime, date, timedelta
 import calendar
+from services.calendar_heatmap import day_balance, day_index, empty_heatmap, month_totals
+from services.day_numbers import day_number
 from services.reflect_themes_system import (
     get_theme, create_themed_container, create_themed_button,
     create_gradient_header
@@ -21,13 +25,13 @@ class CalendarScreen:
         self.on_view_day = on_view_day            # Callback para ver día específico
 
         # Estado de la vista
-        self.current_view = "months"  # "months" o "days"
+        self.current_view = "months"  # "months", "days" o "history"
         self.selected_year = datetime.now().year
         self.selected_month = None    # None = vista de meses, int = vista de días
 
         # Datos del calendario (se llenarán con métodos de negocio)
+        self.heatmap = None           # Arrays por día del año (o del historial), ver calendar_heatmap
         self.months_data = {}         # {month: {"positive": int, "negative": int, "total": int}}
-        self.days_data = {}           # {day: {"positive": int, "negative": int, "submitted": bool}}
 
         # UI Components
         self.page = None
@@ -42,61 +46,51 @@ class CalendarScreen:
     # ====== MÉTODOS DE NEGOCIO (SIN CAMBIOS) ======
 
     def load_year_data(self, year):
-        try:
-            from services import db
-
-            if not self.user_data:
-                print("⚠️ Sin datos de usuario para cargar año")
-                return self._get_empty_year_data()
-
-            user_id = self.user_data.get('id')
-            if not user_id:
-                print("⚠️ ID de usuario no encontrado")
-                return self._get_empty_year_data()
-
-            print(f"🔍 Cargando datos del año {year} para usuario {user_id}")
-
-            year_data = db.get_year_summary(user_id, year)
+        """Totales de los 12 meses, sumados sobre el mapa de calor del año"""
+        if not self._heatmap_covers(year):
+            self.heatmap = self.load_heatmap(year)
 
-            print(f"✅ Datos del año cargados: {year_data}")
-            return year_data
+        year_data = {month: month_totals(self.heatmap, year, month) for month in range(1, 13)}
+        print(f"✅ Datos del año {year} cargados: {sum(m['entries'] for m in year_data.values())} días con entrada")
+        return year_data
 
-        except Exception as e:
-            print(f"❌ Error cargando datos del año {year}: {e}")
-            return self._get_empty_year_data()
-
-    def _get_empty_year_data(self):
-        """Retornar estructura vacía para el año"""
-        empty_data = {}
-        for month in range(1, 13):
-            empty_data[month] = {"positive": 0, "negative": 0, "total": 0}
-        return empty_data
-
-    def load_month_data(self, year, month):
+    def load_heatmap(self, year=None):
+        """✅ NUEVO: Mapa de calor del año (o de todo el historial con year=None) en una lectura"""
         try:
             from services import db
 
-            if not self.user_data:
-                print("⚠️ Sin datos de usuario para cargar mes")
-                return {}
-
-            user_id = self.user_data.get('id')
+            user_id = self.user_data.get('id') if self.user_data else None
             if not user_id:
-                print("⚠️ ID de usuario no encontrado")
-                return {}
+                print("⚠️ Sin datos de usuario para cargar el calendario")
+                return self._get_empty_heatmap(year)
 
-            print(f"🔍 Cargando datos del mes {year}-{month} para usuario {user_id}")
+            print(f"🔍 Cargando mapa de calor {year or 'del historial'} para usuario {user_id}")
 
-            month_data = db.get_month_summary(user_id, year, month)
-
-            print(f"✅ Datos del mes cargados: {month_data}")
-            return month_data
+            if year is None:
+                return db.get_history_heatmap(user_id)
+            return db.get_year_heatmap(user_id, year)
 
         except Exception as e:
-            print(f"❌ Error cargando datos del mes {year}-{month}: {e}")
-            return {}
+            print(f"❌ Error cargando mapa de calor {year or 'del historial'}: {e}")
+            return self._get_empty_heatmap(year)
+
+    def _get_empty_heatmap(self, year):
+        year = year or date.today().year
+        return empty_heatmap(day_number(date(year, 1, 1)), day_number(date(year, 12, 31)))
+
+    def _heatmap_covers(self, year):
+        """El mapa cargado (del año o del historial) ya incluye el año entero"""
+        return (self.heatmap is not None
+                and day_index(self.heatmap, date(year, 1, 1)) is not None
+                and day_index(self.heatmap, date(year, 12, 31)) is not None)
 
     def get_day_details(self, year, month, day):
+        """
+        ✅ MEJORADO: Entrada, momentos y racha del día en una sola lectura (get_day_bundle)
+
+        Mantiene las claves de la entrada (reflection, tags, worth_it, mood_score)
+        y añade has_entry, moments y streak para que DailyReviewScreen no consulte.
+        """
         try:
             from services import db
 
@@ -111,14 +105,13 @@ class CalendarScreen:
 
             print(f"🔍 Obteniendo detalles del día {year}-{month}-{day}")
 
-            day_entry = db.get_day_entry(user_id, year, month, day)
+            bundle = db.get_day_bundle(user_id, date(year, month, day))
+            details = bundle["entry"] or self._get_empty_day_details()
+            details.update(has_entry=bundle["has_entry"], moments=bundle["moments"], streak=bundle["streak"])
 
-            if not day_entry:
-                print(f"ℹ️ No hay datos para el día {year}-{month}-{day}")
-                return self._get_empty_day_details()
-
-            print(f"✅ Detalles del día obtenidos: {day_entry}")
-            return day_entry
+            if not bundle["has_entry"]:
+                print(f"ℹ️ No hay entrada para el día {year}-{month}-{day}")
+            return details
 
         except Exception as e:
             print(f"❌ Error obteniendo detalles del día {year}-{month}-{day}: {e}")
@@ -156,25 +149,25 @@ class CalendarScreen:
         else:
             return self.theme.surface_variant
 
-    def calculate_day_color(self, day_data, year, month, day):
+    def calculate_day_color(self, balance, is_future, is_current):
+        """
+        Color de una celda a partir del balance del mapa de calor
+
+        balance: 1 = más positivos, -1 = más negativos, 0 = empate, None = sin entrada
+        """
         # Día futuro = surface
-        if self.is_future_day(year, month, day):
+        if is_future:
             return self.theme.surface
 
-        # Día actual sin submitear = accent secundario
-        if self.is_current_day(year, month, day) and not day_data.get("submitted", False):
-            return self.theme.accent_secondary
+        # Sin entrada: hoy = accent secundario, resto = surface variant
+        if balance is None:
+            return self.theme.accent_secondary if is_current else self.theme.surface_variant
 
         # Día con datos = color según balance
-        if day_data.get("submitted", False):
-            if day_data["positive"] > day_data["negative"]:
-                return self.theme.positive_main
-            elif day_data["negative"] > day_data["positive"]:
-                return self.theme.negative_main
-            else:
-                return self.theme.surface_variant
-
-        # Sin datos = surface variant
+        if balance > 0:
+            return self.theme.positive_main
+        elif balance < 0:
+            return self.theme.negative_main
         return self.theme.surface_variant
 
     # ====== UI METHODS ACTUALIZADOS CON TEMAS ======
@@ -282,10 +275,20 @@ class CalendarScreen:
             horizontal_alignment=ft.CrossAxisAlignment.CENTER
         )
 
+        history_button = create_themed_button(
+            "📜 Todo el historial",
+            lambda e: self.go_to_history_view(),
+            theme=self.theme,
+            button_type="primary",
+            height=40
+        )
+
         return ft.Column(
             [
                 year_header,
-                ft.Container(height=30),
+                ft.Container(height=12),
+                history_button,
+                ft.Container(height=18),
                 months_grid,
                 ft.Container(height=30),
                 self.build_legend()
@@ -444,20 +447,19 @@ class CalendarScreen:
     def create_day_cell(self, day):
         """Crear celda de día individual CON TEMAS"""
 
-        # Obtener datos REALES del día
-        if hasattr(self, 'days_data') and self.days_data:
-            day_data = self.days_data.get(day, {"positive": 0, "negative": 0, "submitted": False})
-        else:
-            # Cargar datos si no están disponibles
-            self.days_data = self.load_month_data(self.selected_year, self.selected_month)
-            day_data = self.days_data.get(day, {"positive": 0, "negative": 0, "submitted": False})
+        # Datos REALES del día: una posición de los arrays del mapa de calor
+        if not self._heatmap_covers(self.selected_year):
+            self.months_data = self.load_year_data(self.selected_year)
 
-        day_color = self.calculate_day_color(day_data, self.selected_year, self.selected_month, day)
+        i = day_index(self.heatmap, date(self.selected_year, self.selected_month, day))
+        balance = day_balance(self.heatmap, i) if i is not None else None
 
         # Determinar si es clickeable
         is_future = self.is_future_day(self.selected_year, self.selected_month, day)
         is_current = self.is_current_day(self.selected_year, self.selected_month, day)
 
+        day_color = self.calculate_day_color(balance, is_future, is_current)
+
         # Color del texto CON TEMA
         if day_color == self.theme.surface:
             text_color = self.theme.text_hint
@@ -555,14 +557,11 @@ class CalendarScreen:
             self.page.update()
 
     def select_month(self, month):
-        """Seleccionar mes para ver días"""
+        """Seleccionar mes para ver días (sin consulta: los días están en el mapa de calor)"""
         self.selected_month = month
         self.current_view = "days"
         print(f"📅 Seleccionando mes {month} del año {self.selected_year}")
 
-        # Cargar datos del mes
-        self.days_data = self.load_month_data(self.selected_year, month)
-
         # Cambiar a vista de días
         if self.page:
             self.main_container.content = self.build_days_view()
@@ -576,6 +575,77 @@ class CalendarScreen:
             self.main_container.content = self.build_months_view()
             self.page.update()
 
+    def go_to_history_view(self):
+        """✅ NUEVO: Todo el historial (una lectura; al elegir un mes no se vuelve a consultar)"""
+        self.selected_month = None
+        self.current_view = "history"
+        self.heatmap = self.load_heatmap(None)
+        if self.page:
+            self.main_container.content = self.build_history_view()
+            self.page.update()
+
+    def select_history_month(self, year, month):
+        """Abrir un mes desde el historial reutilizando su mapa de calor"""
+        self.selected_year = year
+        self.months_data = self.load_year_data(year)
+        self.select_month(month)
+
+    def build_history_view(self):
+        """✅ NUEVO: Una fila por año con los 12 meses coloreados según su balance"""
+        header = ft.Row(
+            [
+                create_themed_button(
+                    "← Año",
+                    lambda e: self.go_to_months_view(),
+                    theme=self.theme,
+                    button_type="primary",
+                    width=100,
+                    height=40
+                ),
+                ft.Text(
+                    "Todo el historial",
+                    size=24,
+                    weight=ft.FontWeight.BOLD,
+                    color=self.theme.text_primary,
+                    expand=True,
+                    text_align=ft.TextAlign.CENTER
+                ),
+                ft.Container(width=100)
+            ],
+            alignment=ft.MainAxisAlignment.CENTER
+        )
+
+        first_year = int(self.heatmap["start"][:4])
+        last_year = int(self.heatmap["end"][:4])
+
+        year_rows = []
+        for year in range(last_year, first_year - 1, -1):
+            cells = [ft.Text(str(year), size=12, weight=ft.FontWeight.BOLD,
+                             color=self.theme.text_primary, width=44)]
+            for month in range(1, 13):
+                totals = month_totals(self.heatmap, year, month)
+                cells.append(ft.Container(
+                    width=20,
+                    height=20,
+                    bgcolor=self.calculate_month_color(totals),
+                    border_radius=4,
+                    tooltip=f"{calendar.month_abbr[month]} {year}: +{totals['positive']} -{totals['negative']}",
+                    on_click=lambda e, y=year, m=month: self.select_history_month(y, m)
+                ))
+            year_rows.append(ft.Row(cells, spacing=4, alignment=ft.MainAxisAlignment.CENTER))
+
+        return ft.Column(
+            [
+                header,
+                ft.Container(height=20),
+                ft.Column(year_rows, spacing=6),
+                ft.Container(height=30),
+                self.build_legend()
+            ],
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            scroll=ft.ScrollMode.AUTO
+        )
+
     def go_to_current_day(self):
         """Ir al día actual (entry screen)"""
         print("Ir a entry screen del día actual")
@@ -616,9 +686,9 @@ class CalendarScreen:
         year_data = self.load_year_data(current_year)
         print(f"📅 Datos del año {current_year}: {year_data}")
 
-        # Test 2: Datos del mes actual
+        # Test 2: Datos del mes actual (del mismo mapa de calor)
         current_month = datetime.now().month
-        month_data = self.load_month_data(current_year, current_month)
+        month_data = month_totals(self.heatmap, current_year, current_month)
         print(f"📆 Datos del mes {current_month}: {month_data}")
 
         # Test 3: Verificar si submiteó hoy
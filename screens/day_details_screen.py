@@ -39,6 +39,7 @@ class DailyReviewScreen:
         self.reflection_field = None
         self.worth_it_value = None
         self.mood_score = 5
+        self.streak_info = {}  # Racha actual y si el día forma parte de ella
 
         # UI Components
         self.worth_it_buttons = []
@@ -100,6 +101,10 @@ class DailyReviewScreen:
 
             # ✅ Mood score del día
             self.build_mood_section(),
+            ft.Container(height=16),
+
+            # ✅ NUEVO: Racha del usuario y si el día forma parte de ella
+            self.build_streak_section(),
             ft.Container(height=20),
 
             # ✅ Botones según el modo
@@ -142,7 +147,7 @@ class DailyReviewScreen:
             return f"📅 {formatted_date}"
 
     def load_target_day_data(self):
-        """✅ CORREGIDO: Cargar datos del día específico (no siempre hoy)"""
+        """✅ MEJORADO: Cargar el día (entrada, momentos y racha) con una sola lectura"""
         if not self.user_data:
             print("⚠️ No hay datos de usuario")
             return
@@ -151,40 +156,30 @@ class DailyReviewScreen:
             from services import db
             user_id = self.user_data['id']
 
-            if self.target_date:
-                year, month, day = self.target_date
-                print(f"📚 Cargando datos del día específico: {year}-{month}-{day}")
-
-                # ✅ Usar datos precargados si están disponibles
-                if self.day_details:
-                    print("📋 Usando datos precargados del día")
-                    self._process_day_details(self.day_details)
-                else:
-                    # Cargar desde base de datos
-                    day_entry = db.get_day_entry(user_id, year, month, day)
-                    if day_entry:
-                        self._process_day_details(day_entry)
-                        print(f"📄 Entrada del día cargada desde DB")
-                    else:
-                        print(f"ℹ️ No hay entrada para el día {year}-{month}-{day}")
-
-                # Cargar momentos interactivos del día específico (si los hay)
-                # TODO: Implementar carga de momentos por fecha específica
+            target = date(*self.target_date) if self.target_date else date.today()
+            print(f"📚 Cargando datos del día {target.isoformat()}")
 
+            # ✅ Usar datos precargados si ya traen el día completo (CalendarScreen.get_day_details)
+            if self.day_details and "moments" in self.day_details:
+                print("📋 Usando datos precargados del día")
+                bundle = {
+                    "entry": self.day_details if self.day_details.get("has_entry") else None,
+                    "moments": self.day_details["moments"],
+                    "streak": self.day_details.get("streak", {}),
+                }
             else:
-                # Es hoy - cargar datos actuales
-                print(f"📚 Cargando datos del día actual")
+                bundle = db.get_day_bundle(user_id, target)
 
-                # Cargar momentos interactivos de hoy
-                moments = db.get_interactive_moments_today(user_id)
-                self._process_interactive_moments(moments)
+            self.streak_info = bundle["streak"]
 
-                # Cargar entrada existente si existe
-                entries = db.get_user_entries(user_id, limit=1)
-                if entries and entries[0]['entry_date'] == date.today().isoformat():
-                    entry = entries[0]
-                    self._process_day_details(entry)
-                    print(f"📄 Entrada de hoy cargada")
+            if bundle["entry"]:
+                self._process_day_details(bundle["entry"])
+                print(f"📄 Entrada del día cargada")
+            else:
+                # Sin entrada: los momentos del día que aún no se convirtieron
+                self._set_empty_day_data()
+                self._process_interactive_moments([m for m in bundle["moments"] if m.get("active", True)])
+                print(f"ℹ️ No hay entrada para el día {target.isoformat()}")
 
         except Exception as e:
             print(f"❌ Error cargando datos del día: {e}")
@@ -594,6 +589,41 @@ class DailyReviewScreen:
                 theme=self.theme
             )
 
+    def build_streak_section(self):
+        """✅ NUEVO: Racha actual y récord (del bundle del día, sin otra consulta)"""
+        current_streak = self.streak_info.get('current_streak', 0)
+        longest_streak = self.streak_info.get('longest_streak', 0)
+
+        if self.streak_info.get('in_streak'):
+            streak_text = "Este día forma parte de tu racha actual."
+        elif current_streak > 0:
+            streak_text = "Este día no forma parte de tu racha actual."
+        else:
+            streak_text = "Ahora mismo no tienes una racha activa."
+
+        return create_themed_container(
+            content=ft.Column([
+                ft.Text("🔥 Racha", size=16, weight=ft.FontWeight.W_600,
+                        color=self.theme.text_primary),
+                ft.Container(height=16),
+                ft.Row([
+                    ft.Column([
+                        ft.Text(f"{current_streak}", size=24, weight=ft.FontWeight.BOLD,
+                                color=self.theme.text_primary),
+                        ft.Text("días seguidos", size=14, color=self.theme.text_secondary)
+                    ], expand=True),
+                    ft.Column([
+                        ft.Text(f"{longest_streak}", size=24, weight=ft.FontWeight.BOLD,
+                                color=self.theme.text_primary),
+                        ft.Text("mejor racha", size=14, color=self.theme.text_secondary)
+                    ], expand=True)
+                ]),
+                ft.Container(height=8),
+                ft.Text(streak_text, size=14, color=self.theme.text_secondary)
+            ]),
+            theme=self.theme
+        )
+
     def build_action_buttons(self):
         """✅ CORREGIDO: Botones de acción según el modo"""
         if self.is_view_mode:
@@ -844,8 +844,8 @@ def open_interactive_moments(self, e):
 
         print(f"🏷️ === ON_TAG_CREATED COMPLETADO ===")
 
-    def save_entry(self, e):
-        """Guardar entrada zen - MEJORADO CON BLOQUEO"""
+    async def save_entry(self, e):
+        """Guardar entrada zen - MEJORADO CON BLOQUEO (la escritura va al hilo escritor)"""
         print("💾 === SAVE ENTRY MEJORADO ===")
         self.page = e.page
 
@@ -866,12 +866,12 @@ def open_interactive_moments(self, e):
             return
 
         try:
-            from services import db
+            from services import async_db
 
             if self.current_user:
                 user_id = self.current_user['id']
 
-                entry_id = db.save_daily_entry(
+                entry_id = await async_db.save_daily_entry(
                     user_id=user_id,
                     free_reflection=reflection_text,
                     positive_tags=self.positive_tags,
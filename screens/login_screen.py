@@ -8,6 +8,7 @@
 import flet as ft
 from services.reflect_themes_system import get_theme, apply_theme_to_page
 from services.session_service import save_user_session, get_auto_login_data
+import asyncio
 import threading
 import time
 
@@ -525,9 +526,10 @@ class LoginScreen:
     def perform_auto_login(self, auto_login_data):
         """Realizar auto-login con datos guardados"""
         try:
-            from services import db
+            from services import async_db
             email = auto_login_data.get('email')
-            user_data = db.get_user_by_email(email)
+            # ✅ MEJORADO: Hilo lector de async_db en lugar de compartir db sin coordinación
+            user_data = async_db.submit("get_user_by_email", email).result()
 
             if user_data:
                 print(f"✅ Auto-login exitoso para: {user_data.get('name')}")
@@ -590,8 +592,8 @@ class LoginScreen:
             snackbar.open = True
             self.page.update()
 
-    def login_click(self, e):
-        """Login con sistema de sesiones"""
+    async def login_click(self, e):
+        """✅ MEJORADO: Login con sistema de sesiones (handler asíncrono: no bloquea la UI)"""
         self.page = e.page
         email = self.email_field.value.strip() if self.email_field.value else ""
         password = self.password_field.value if self.password_field.value else ""
@@ -613,8 +615,9 @@ class LoginScreen:
         self.hide_error()
 
         try:
-            from services import db
-            usuario = db.login_user(email, password)
+            from services import async_db
+            # ✅ MEJORADO: login_user actualiza last_login: va al hilo escritor de async_db
+            usuario = await async_db.login_user(email, password)
 
             if usuario:
                 # Guardar sesión con opción "recordarme"
@@ -648,11 +651,11 @@ class LoginScreen:
         if self.page:
             self.show_success("🔄 Función en desarrollo - Contacta con soporte")
 
-    def create_test_user(self, e):
-        """✅ MEJORADO: Crear usuario de prueba con nutria"""
+    async def create_test_user(self, e):
+        """✅ MEJORADO: Crear usuario de prueba con nutria (handler asíncrono)"""
         self.page = e.page
         try:
-            from services import db
+            from services import async_db
             email = "zen@reflect.app"
             password = "reflect123"
             name = "Viajero Zen"
@@ -660,7 +663,8 @@ class LoginScreen:
             # Mostrar mensaje de creación
             self.show_success("🧪 Creando perfil de desarrollador...")
 
-            user_id = db.create_user(email, password, name, avatar_emoji="🦫")
+            # ✅ MEJORADO: Escritura serializada en el hilo escritor de async_db
+            user_id = await async_db.create_user(email, password, name, avatar_emoji="🦫")
             if user_id:
                 self.show_success("✅ Perfil zen creado exitosamente")
             else:
@@ -675,19 +679,10 @@ class LoginScreen:
 
             self.page.update()
 
-            # Auto-login después de 2 segundos
-            import threading
-            import time
-
-            def auto_login():
-                time.sleep(2)
-                if self.page:
-                    try:
-                        self.login_click(e)
-                    except:
-                        pass
-
-            threading.Thread(target=auto_login, daemon=True).start()
+            # Auto-login después de 2 segundos (sin hilo: el handler ya es asíncrono)
+            await asyncio.sleep(2)
+            if self.page:
+                await self.login_click(e)
 
         except Exception as ex:
             print(f"Error creando usuario: {ex}")
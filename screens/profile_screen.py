@@ -6,7 +6,7 @@
 """
 
 import flet as ft
-from datetime import datetime, date, timedelta
+from datetime import datetime
 from typing import Dict, Any, Callable, Optional
 from services.reflect_themes_system import (
     get_theme, create_themed_container, create_themed_button,
@@ -453,27 +453,14 @@ class ProfileScreen:
             from services import db
             user_id = self.user_data['id']
 
-            # Obtener estadísticas básicas
-            total_entries = db.get_entry_count(user_id)
-
-            # Obtener entradas del usuario para calcular más estadísticas
-            entries = db.get_user_entries(user_id, limit=100)
-
-            positive_count = 0
-            negative_count = 0
-
-            for entry in entries:
-                positive_count += len(entry.get('positive_tags', []))
-                negative_count += len(entry.get('negative_tags', []))
-
-            # Calcular racha de días consecutivos
-            streak_days = self.calculate_streak_days(entries)
+            # Una sola lectura de user_statistics (se mantiene al guardar cada entrada)
+            stats = db.get_user_comprehensive_statistics(user_id)
 
             self.user_stats = {
-                'total_entries': total_entries,
-                'positive_count': positive_count,
-                'negative_count': negative_count,
-                'streak_days': streak_days
+                'total_entries': stats['total_entries'],
+                'positive_count': stats['positive_count'],
+                'negative_count': stats['negative_count'],
+                'streak_days': stats['streak_days']
             }
 
             print(f"📊 Estadísticas cargadas: {self.user_stats}")
@@ -482,32 +469,6 @@ class ProfileScreen:
             print(f"❌ Error cargando estadísticas: {e}")
             self.user_stats = {}
 
-    def calculate_streak_days(self, entries):
-        """Calcular días consecutivos de reflexión"""
-        if not entries:
-            return 0
-
-        # Ordenar entradas por fecha
-        sorted_entries = sorted(entries, key=lambda x: x.get('entry_date', ''), reverse=True)
-
-        streak = 0
-        current_date = date.today()
-
-        for entry in sorted_entries:
-            try:
-                entry_date = datetime.strptime(entry['entry_date'], '%Y-%m-%d').date()
-
-                if entry_date == current_date:
-                    streak += 1
-                    current_date -= timedelta(days=1)
-                else:
-                    break
-
-            except:
-                continue
-
-        return streak
-
     def show_avatar_picker(self, e=None):
         """Mostrar selector de avatar"""
         avatar_options = ['🦫', '🧘‍♀️', '🧘‍♂️', '😊', '🌟', '🎯', '🦋', '🌸', '🌿', '⭐', '🔮', '🕊️']
@@ -667,8 +628,25 @@ class ProfileScreen:
         self.show_message("ℹ️ Configuración en desarrollo")
 
     def export_user_data(self):
-        """Exportar datos del usuario"""
-        self.show_message("📊 Exportación en desarrollo")
+        """Exportar datos del usuario (NDJSON comprimido, en segundo plano)"""
+        user_id = self.user_data.get('id')
+        if not user_id:
+            self.show_message("❌ Usuario no identificado", is_error=True)
+            return
+
+        from services import async_db
+
+        export_path = f"exports/reflect_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson.gz"
+        self.show_message("📊 Exportando tus reflexiones...")
+
+        def on_done(future):
+            report = future.result() if not future.exception() else None
+            if report:
+                self.show_message(f"✅ {report['rows']['entry']} entradas exportadas a {export_path}")
+            else:
+                self.show_message("❌ Error exportando datos", is_error=True)
+
+        async_db.submit("export_user", user_id, export_path).add_done_callback(on_done)
 
     def show_privacy_options(self):
         """Mostrar opciones de privacidad"""
@@ -282,7 +282,9 @@ class EntryScreen:
             color=self.theme.text_primary,
             label_style=ft.TextStyle(color=self.theme.text_secondary),
             # NUEVO: Hacer readonly si ya guardó hoy
-            read_only=self.is_saved_today
+            read_only=self.is_saved_today,
+            # NUEVO: Autoguardado en el borrador mientras se escribe
+            on_change=self.on_reflection_change
         )
 
         # Contenedores para tags dinámicos
@@ -828,12 +830,28 @@ class EntryScreen:
         print(f"💭 SET WORTH IT: {value}")
         self.page = e.page
         self.worth_it = value
+        self.save_draft(worth_it=value)
 
         self.update_worth_it_buttons()
 
         if self.page:
             self.page.update()
 
+    def on_reflection_change(self, e):
+        """NUEVO: Guardar el texto en el borrador (como mucho una escritura por segundo)"""
+        self.save_draft(reflection=e.control.value or "")
+
+    def save_draft(self, reflection=None, worth_it=None):
+        """NUEVO: Cambios en el borrador de hoy, se escriben en diferido"""
+        if not self.current_user or self.is_saved_today:
+            return
+
+        try:
+            from services import db
+            db.save_draft(self.current_user['id'], reflection=reflection, worth_it=worth_it)
+        except Exception as e:
+            print(f"❌ Error guardando borrador: {e}")
+
     def save_entry(self, e):
         """Guardar entrada zen - MEJORADO CON BLOQUEO"""
         print("💾 === SAVE ENTRY MEJORADO ===")
@@ -4,19 +4,57 @@
 Inicialización de servicios de base de datos e IA contemplativos
 """
 
+import atexit
+import os
+
 from .ai_service import analyze_tag, get_daily_summary, get_mood_score, get_zen_quote
 from .database_service import DatabaseService
+from .async_database_service import AsyncDatabaseService
+from .db_backup import BackupService
+from .db_maintenance import MaintenanceService
+from config.app_config import AppConfig
 
 # Instancia global de la base de datos zen
 print("🧘‍♀️ Inicializando servicios zen...")
 
+# Perfil de conexión: "mobile" (por defecto) o "server" (modo web multiusuario)
+DB_PROFILE = os.getenv("REFLECT_DB_PROFILE", "mobile")
+
+# ✅ NUEVO: Sharding opcional (modo web): "user" o "hash:N"; sin valor, una sola base de datos
+DB_SHARDING = os.getenv("REFLECT_DB_SHARDING") or None
+
+# ✅ NUEVO: Instrumentación de consultas (REFLECT_DB_SLOW_QUERY_MS=50): db.get_query_stats(), db.get_slow_queries()
+DB_SLOW_QUERY_MS = float(os.getenv("REFLECT_DB_SLOW_QUERY_MS")) if os.getenv("REFLECT_DB_SLOW_QUERY_MS") else None
+
 try:
-    db = DatabaseService()
+    if DB_SHARDING:
+        # Con sharding la base de datos principal es solo el catálogo de usuarios
+        db = DatabaseService(AppConfig.SHARD_CATALOG_PATH, profile=DB_PROFILE, sharding=DB_SHARDING,
+                             shard_directory=AppConfig.SHARD_DIRECTORY,
+                             max_open_shards=AppConfig.MAX_OPEN_SHARDS,
+                             slow_query_ms=DB_SLOW_QUERY_MS)
+    else:
+        db = DatabaseService(profile=DB_PROFILE, slow_query_ms=DB_SLOW_QUERY_MS)
     print("✨ Base de datos zen conectada")
 except Exception as e:
     print(f"❌ Error inicializando base de datos zen: {e}")
+    if DB_SHARDING:
+        # ✅ NUEVO: Sin respaldo con sharding: un catálogo vacío ocultaría shards que no coinciden
+        raise
     # Crear instancia de respaldo
-    db = DatabaseService("reflect_zen_backup.db")
+    db = DatabaseService("reflect_zen_backup.db", profile=DB_PROFILE)
+
+# ✅ NUEVO: Fachada asíncrona para handlers de Flet (un hilo escritor + lectores)
+async_db = AsyncDatabaseService(db)
+
+# ✅ NUEVO: Copias en caliente en reposo; las arranca la app (backup_service.start())
+backup_service = BackupService(db, os.getenv("REFLECT_DB_BACKUP_PATH", AppConfig.BACKUP_DATABASE_PATH),
+                               keep=AppConfig.BACKUP_KEEP, interval_hours=AppConfig.BACKUP_INTERVAL_HOURS,
+                               idle_seconds=AppConfig.BACKUP_IDLE_SECONDS)
+
+# ✅ NUEVO: Mantenimiento en reposo; la app lo arranca y le avisa de cada cambio de pantalla (touch())
+maintenance_service = MaintenanceService(db, idle_seconds=AppConfig.MAINTENANCE_IDLE_SECONDS,
+                                         interval_hours=AppConfig.MAINTENANCE_INTERVAL_HOURS)
 
 # Verificar funcionamiento zen
 try:
@@ -26,9 +64,32 @@ try:
 except Exception as e:
     print(f"⚠️ Advertencia en servicios zen: {e}")
 
+
+
+def shutdown_services() -> None:
+    """
+    ✅ NUEVO: Al salir del proceso: detener las tareas en segundo plano y cerrar la base de datos
+
+    db.close() escribe los borradores y momentos que aún estaban en memoria
+    (sus hilos de volcado son daemon y no llegan a ejecutarse al salir).
+    """
+    try:
+        maintenance_service.stop()
+        backup_service.stop()
+        async_db.close()
+        db.close()
+    except Exception as e:
+        print(f"⚠️ Error cerrando servicios zen: {e}")
+
+
+atexit.register(shutdown_services)
+
 # Exportar servicios principales zen
 __all__ = [
     'db',
+    'async_db',
+    'backup_service',
+    'maintenance_service',
     'analyze_tag',
     'get_daily_summary',
     'get_mood_score',
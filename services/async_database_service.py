@@ -0,0 +1,113 @@
+"""
+⚡ Fachada asíncrona de la base de datos - ReflectApp
+✅ NUEVO: Versiones awaitable de todos los métodos públicos de DatabaseService
+✅ NUEVO: Un único hilo escritor: las escrituras se serializan y no compiten por el lock
+✅ NUEVO: Con sharding, un hilo escritor por grupo de shards: usuarios de shards
+          distintos escriben en paralelo y cada shard sigue teniendo un solo escritor
+✅ NUEVO: Pool pequeño de hilos lectores (WAL permite leer mientras se escribe)
+
+Uso desde un handler de Flet:
+    async def save_entry(self, e):
+        entry_id = await async_db.save_daily_entry(user_id, texto, ...)
+"""
+
+import asyncio
+import functools
+import itertools
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable
+
+from .db_connection_manager import DB_PROFILES
+
+# Métodos de solo lectura: van al pool de lectores. Todo lo demás se trata como escritura.
+READ_PREFIXES = ("get_", "has_", "search_", "calculate_", "export_")
+
+
+class AsyncDatabaseService:
+    """Envoltorio asíncrono de DatabaseService con un escritor y varios lectores"""
+
+    def __init__(self, db_service, reader_threads: int = None, writer_threads: int = None):
+        self.db = db_service
+        if reader_threads is None:
+            reader_threads = DB_PROFILES[db_service.profile]["reader_threads"]
+        if writer_threads is None:
+            writer_threads = DB_PROFILES[db_service.profile]["writer_threads"] if db_service.shards else 1
+
+        self._writers = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"reflect-db-writer-{index}")
+            for index in range(writer_threads)
+        ]
+        self._readers = ThreadPoolExecutor(max_workers=reader_threads, thread_name_prefix="reflect-db-reader")
+
+    # ===============================
+    # ENVÍO A LOS HILOS
+    # ===============================
+    @staticmethod
+    def is_read(name: str) -> bool:
+        return name.startswith(READ_PREFIXES)
+
+    def submit(self, name: str, *args, **kwargs) -> Future:
+        """
+        Ejecutar db.<name>(...) en el hilo que le corresponde
+
+        Para hilos sin event loop (p. ej. los de login_screen):
+            user = async_db.submit("get_user_by_email", email).result()
+        """
+        method = self._public_method(name)
+        executor = self._readers if self.is_read(name) else self._writer_for(args, kwargs)
+        return executor.submit(method, *args, **kwargs)
+
+    def _writer_for(self, args: tuple, kwargs: dict) -> ThreadPoolExecutor:
+        """Mismo shard → mismo escritor; las escrituras sin usuario van al primero"""
+        user_id = kwargs.get("user_id", args[0] if args else None)
+        if len(self._writers) == 1 or not isinstance(user_id, int):
+            return self._writers[0]
+        shard = self.db.shard_name(user_id).encode("utf-8")
+        return self._writers[zlib.crc32(shard) % len(self._writers)]
+
+    async def run(self, name: str, *args, **kwargs) -> Any:
+        """Versión awaitable de submit"""
+        return await asyncio.wrap_future(self.submit(name, *args, **kwargs))
+
+    def _public_method(self, name: str) -> Callable:
+        if name.startswith("_"):
+            raise AttributeError(f"{name} no es un método público de DatabaseService")
+        method = getattr(self.db, name)
+        if not callable(method):
+            raise AttributeError(f"{name} no es un método de DatabaseService")
+        return method
+
+    def __getattr__(self, name: str):
+        """async_db.get_month_summary(...) -> corrutina que corre en el pool de lectores"""
+        if name.startswith("iter_"):
+            return functools.partial(self._iterate, name)
+
+        method = self._public_method(name)
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            return await self.run(name, *args, **kwargs)
+
+        return call
+
+    async def _iterate(self, name: str, *args, page_size: int = 100, **kwargs) -> AsyncIterator[Any]:
+        """Generadores (iter_*): cada página se lee en un hilo lector"""
+        iterator = self._public_method(name)(*args, page_size=page_size, **kwargs)
+        next_page = lambda: list(itertools.islice(iterator, page_size))
+
+        while True:
+            page = await asyncio.wrap_future(self._readers.submit(next_page))
+            for item in page:
+                yield item
+            if len(page) < page_size:
+                return
+
+    # ===============================
+    # CIERRE
+    # ===============================
+    def close(self) -> None:
+        """Esperar a las escrituras en curso y detener los hilos (no cierra el DatabaseService)"""
+        for writer in self._writers:
+            writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
@@ -0,0 +1,111 @@
+"""
+🗓️ Mapa de calor del calendario - ReflectApp
+✅ NUEVO: Un hueco por día del periodo en arrays compactos (array.array), sin un dict por día
+✅ NUEVO: Tarjetas de los 12 meses, rejilla de días e historial completo desde una sola lectura
+✅ NUEVO: Totales de mes por sumas de tramos del array (en C, sin bucle por día en Python)
+
+Todos los arrays se indexan por día: posición i = first_day_number + i.
+"""
+
+from array import array
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .day_numbers import day_from_number, day_number, month_range
+
+# Valores de relleno de los días sin entrada
+NO_WORTH_IT = -1
+NO_MOOD = 0
+
+# Días con entrada de un rango de fechas: rango sobre la clave primaria (user_id, entry_date)
+HEATMAP_ROWS_SQL = """
+    SELECT day_number, positive_count, negative_count, worth_it, mood_score
+    FROM daily_rollups
+    WHERE user_id = ? AND entry_date >= ? AND entry_date <= ? AND has_entry = 1
+"""
+
+
+def build_heatmap(rows: Iterable[Tuple[int, int, int, Optional[int], Optional[int]]],
+                  first: int, last: int) -> Dict[str, Any]:
+    """
+    Arrays densos entre los day_number first y last (incluidos)
+
+    Returns:
+        Dict con start, end, first_day_number, days y los arrays positive,
+        negative (H), worth_it (b: 1, 0 o NO_WORTH_IT), mood (b: 1-10 o
+        NO_MOOD) y submitted (bytearray: 1 si el día tiene entrada)
+    """
+    days = last - first + 1
+    positive = array("H", bytes(2 * days))
+    negative = array("H", bytes(2 * days))
+    worth_it = array("b", [NO_WORTH_IT]) * days
+    mood = array("b", bytes(days))
+    submitted = bytearray(days)
+
+    for number, positive_count, negative_count, worth, mood_score in rows:
+        i = number - first
+        positive[i] = positive_count
+        negative[i] = negative_count
+        worth_it[i] = NO_WORTH_IT if worth is None else worth
+        mood[i] = mood_score or NO_MOOD
+        submitted[i] = 1
+
+    return {
+        "start": day_from_number(first).isoformat(),
+        "end": day_from_number(last).isoformat(),
+        "first_day_number": first,
+        "days": days,
+        "positive": positive,
+        "negative": negative,
+        "worth_it": worth_it,
+        "mood": mood,
+        "submitted": submitted,
+    }
+
+
+def empty_heatmap(first: int, last: int) -> Dict[str, Any]:
+    return build_heatmap((), first, last)
+
+
+def day_index(heatmap: Dict[str, Any], day: date) -> Optional[int]:
+    """Posición de un día en los arrays (None si cae fuera del periodo)"""
+    i = day_number(day) - heatmap["first_day_number"]
+    return i if 0 <= i < heatmap["days"] else None
+
+
+def day_balance(heatmap: Dict[str, Any], i: int) -> Optional[int]:
+    """1 = más positivos, -1 = más negativos, 0 = empate, None = sin entrada"""
+    if not heatmap["submitted"][i]:
+        return None
+    difference = heatmap["positive"][i] - heatmap["negative"][i]
+    return (difference > 0) - (difference < 0)
+
+
+def month_totals(heatmap: Dict[str, Any], year: int, month: int) -> Dict[str, int]:
+    """Totales de un mes (mismo formato que get_year_summary) sumando su tramo de los arrays"""
+    first, last = month_range(year, month)
+    start = max(first - heatmap["first_day_number"], 0)
+    end = min(last - heatmap["first_day_number"] + 1, heatmap["days"])
+    if start >= end:
+        return {"positive": 0, "negative": 0, "total": 0, "entries": 0}
+
+    positive = sum(heatmap["positive"][start:end])
+    negative = sum(heatmap["negative"][start:end])
+    return {
+        "positive": positive,
+        "negative": negative,
+        "total": positive + negative,
+        "entries": heatmap["submitted"][start:end].count(1),
+    }
+
+
+def months(heatmap: Dict[str, Any]) -> List[Tuple[int, int]]:
+    """(año, mes) de todos los meses que toca el periodo, en orden"""
+    first = day_from_number(heatmap["first_day_number"])
+    last = day_from_number(heatmap["first_day_number"] + heatmap["days"] - 1)
+    return [
+        (year, month)
+        for year in range(first.year, last.year + 1)
+        for month in range(1, 13)
+        if (first.year, first.month) <= (year, month) <= (last.year, last.month)
+    ]
@@ -0,0 +1,91 @@
+"""
+🪶 Filas compactas - ReflectApp
+✅ NUEVO: Modo opcional de lectura con filas respaldadas por una tupla (sin __dict__ por fila)
+✅ NUEVO: Una clase por proyección de columnas, creada una vez y reutilizada
+✅ NUEVO: worth_it y los tags se convierten al leer el campo, no al cargar la fila
+
+Las filas se leen como atributos (row.mood_score) o como un dict de solo
+lectura (row["mood_score"], row.get("worth_it")), así que las pantallas que
+reciben dicts pueden recibir filas compactas sin cambios. to_dict() devuelve
+el dict completo del modo normal.
+"""
+
+import functools
+from collections import namedtuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Tags sin convertir: (name, context, emoji) tal como salen de entry_tags
+RawTags = Tuple[Tuple[str, Optional[str], Optional[str]], ...]
+
+TAG_COLUMNS = ("positive_tags", "negative_tags")
+
+
+def decode_tags(raw: RawTags) -> List[Dict[str, str]]:
+    """Tags en el formato name/context/emoji de las lecturas normales"""
+    return [{"name": name, "context": context or "", "emoji": emoji or "✨"} for name, context, emoji in raw]
+
+
+def _raw_field(index: int):
+    return lambda row: tuple.__getitem__(row, index)
+
+
+def _worth_it_field(index: int):
+    def worth_it(row) -> Optional[bool]:
+        value = tuple.__getitem__(row, index)
+        return None if value is None else bool(value)
+    return worth_it
+
+
+def _tags_field(index: int):
+    return lambda row: decode_tags(tuple.__getitem__(row, index))
+
+
+class CompactRowMixin:
+    """Acceso tipo dict sobre los campos de la tupla"""
+    __slots__ = ()
+    _fields: Tuple[str, ...]  # lo pone namedtuple
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in self._fields:
+                raise KeyError(key)
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self._fields else default
+
+    def __contains__(self, key) -> bool:
+        return key in self._fields
+
+    def keys(self) -> Tuple[str, ...]:
+        return self._fields
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self._fields}
+
+
+@functools.lru_cache(maxsize=64)
+def row_class(columns: Tuple[str, ...]) -> type:
+    """
+    Clase de fila para una proyección: namedtuple (slots vacíos) con
+    propiedades que convierten worth_it y los tags al leerlos
+    """
+    base = namedtuple("EntryRowBase", columns)
+    converters = {}
+    for index, column in enumerate(columns):
+        if column == "worth_it":
+            converters[column] = property(_worth_it_field(index))
+        elif column in TAG_COLUMNS:
+            converters[column] = property(_tags_field(index))
+    # Los valores sin convertir siguen accesibles con el prefijo raw_
+    raw = {f"raw_{column}": property(_raw_field(columns.index(column))) for column in converters}
+
+    return type("EntryRow", (CompactRowMixin, base), {"__slots__": (), **converters, **raw})
+
+
+def make_rows(columns: Sequence[str], rows: Sequence[tuple]) -> List[Any]:
+    """Envolver tuplas ya ordenadas como `columns` sin copiar sus valores"""
+    cls = row_class(tuple(columns))
+    new = tuple.__new__
+    return [new(cls, row) for row in rows]
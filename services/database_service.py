@@ -4,124 +4,512 @@
 ✅ NUEVO: Método get_user_by_email para auto-login
 ✅ NUEVO: Método update_user_profile para perfil
 ✅ NUEVO: Mejores estadísticas de usuario
+✅ NUEVO: Conexiones persistentes por hilo con WAL (ver db_connection_manager)
+✅ NUEVO: Esquema versionado con migraciones (ver db_migrations)
+✅ NUEVO: Auto-guardado de momentos agrupado en lotes (ver moment_write_queue)
+✅ NUEVO: Caché de lecturas con invalidación desde las escrituras (ver query_cache)
+✅ NUEVO: Iterador de entradas con paginación por clave (iter_user_entries)
+✅ NUEVO: Búsqueda de texto completo con FTS5 (search_entries)
+✅ NUEVO: Exportación/importación en streaming del diario (ver journal_transfer)
+✅ NUEVO: Texto de entradas antiguas comprimido en archivo frío (ver entry_archive)
+✅ NUEVO: Sharding opcional por usuario con catálogo de usuarios (ver db_shards)
+✅ NUEVO: Fechas también como enteros (day_number) para rachas y rangos (ver day_numbers)
+✅ NUEVO: Instrumentación opcional y registro de consultas lentas (ver db_instrumentation)
+✅ NUEVO: Borradores de la entrada del día con guardado diferido (ver draft_store)
+✅ NUEVO: Series del estado de ánimo con medias móviles y agregados (ver mood_series)
 """
 
 import sqlite3
 import json
 import hashlib
 import os
+import re
 from datetime import datetime, date, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+
+from .calendar_heatmap import HEATMAP_ROWS_SQL, build_heatmap, empty_heatmap
+from .compact_rows import make_rows
+from .db_connection_manager import ConnectionManager, DB_PROFILES, DEFAULT_PROFILE
+from .db_instrumentation import QueryInstrumentation
+from .db_migrations import run_migrations, get_schema_version
+from .db_shards import DEFAULT_MAX_OPEN_SHARDS, ShardRouter
+from .day_numbers import day_from_number, day_number, month_range, today_number
+from .draft_store import DraftStore
+from .mood_series import DEFAULT_EWMA_ALPHA, DEFAULT_WINDOW, MOOD_ROWS_SQL, build_mood_series
+from .moment_write_queue import MomentWriteQueue
+from .query_cache import QueryCache, cached_query, mark_read_failed
+from . import journal_transfer
+from .entry_archive import (
+    ARCHIVE_JOIN_SQL, DEFAULT_ARCHIVE_HORIZON_DAYS, REFLECTION_SQL,
+    archive_entries, register_sql_functions
+)
+
+# Columnas que pueden proyectar iter_user_entries y get_user_entries
+ENTRY_COLUMNS = (
+    "id", "entry_date", "free_reflection", "positive_tags", "negative_tags",
+    "worth_it", "mood_score", "word_count", "created_at", "updated_at",
+)
+
+# Consultas cacheadas que dependen de cada tipo de escritura
+USER_QUERIES = ("get_user_by_id", "get_user_by_email")
+ENTRY_QUERIES = (
+    "has_submitted_today", "get_month_summary", "get_year_summary", "get_day_entry",
+    "get_user_entries", "get_entry_count", "get_user_comprehensive_statistics",
+    "get_streak_info", "get_tag_counts", "get_mood_series", "get_year_heatmap", "get_history_heatmap",
+    "get_day_bundle",
+)
+MOMENT_QUERIES = (
+    "get_interactive_moments_today", "get_month_summary", "get_year_summary", "get_day_bundle",
+)
+
+# Contadores de user_statistics que cambia cada entrada (suma de lo que aporta cada día)
+STATISTICS_COUNTERS = (
+    "entries_count", "positive_moments", "negative_moments", "total_words", "mood_total", "mood_entries",
+)
+# Columnas de user_statistics derivadas de las entradas (las que comprueba check_user_statistics)
+STATISTICS_FIELDS = STATISTICS_COUNTERS + (
+    "avg_mood_score", "best_mood_score", "best_mood_date", "month_start_day", "month_entries",
+    "streak_days", "longest_streak", "last_entry_date", "last_day_number",
+)
+
 
 class DatabaseService:
     """Servicio de base de datos zen ACTUALIZADO con sistema de sesiones"""
 
-    def __init__(self, db_path: str = "data/reflect_zen.db"):
+    def __init__(self, db_path: str = "data/reflect_zen.db", profile: str = DEFAULT_PROFILE,
+                 sharding: Optional[str] = None, shard_directory: Optional[str] = None,
+                 max_open_shards: int = DEFAULT_MAX_OPEN_SHARDS,
+                 slow_query_ms: Optional[float] = None, explain_slow_queries: bool = True):
+        """
+        Args:
+            db_path: Base de datos única o, con sharding, el catálogo de usuarios
+            profile: "mobile" o "server" (ver db_connection_manager)
+            sharding: None (una sola base de datos), "user" (un fichero por usuario)
+                      o "hash:N" (N ficheros, usuario → user_id % N)
+            shard_directory: Carpeta de los shards (por defecto <carpeta de db_path>/shards)
+            max_open_shards: Shards con conexiones abiertas a la vez (el resto se cierra por LRU)
+            slow_query_ms: Activa la instrumentación de consultas con este umbral de consulta lenta
+                           (None = sin instrumentación ni coste añadido)
+            explain_slow_queries: Guardar el EXPLAIN QUERY PLAN de las consultas lentas
+        """
         self.db_path = db_path
+        self.profile = profile
         self._ensure_directory()
+
+        self.instrumentation = None
+        if slow_query_ms is not None:
+            self.instrumentation = QueryInstrumentation(slow_query_ms, explain_slow_queries)
+        factory = self.instrumentation.connection_factory if self.instrumentation else None
+
+        self._connections = ConnectionManager(db_path, profile, on_open=register_sql_functions,
+                                              factory=factory)
+        self.query_cache = QueryCache(max_bytes=DB_PROFILES[profile]["query_cache_kb"] * 1024)
         self._initialize_database()
 
+        self.shards = None
+        if sharding:
+            self.shards = ShardRouter(
+                shard_directory or os.path.join(os.path.dirname(db_path), "shards"),
+                sharding, profile,
+                on_open=register_sql_functions,
+                on_create=lambda manager: run_migrations(self, manager),
+                max_open=max_open_shards,
+                factory=factory
+            )
+            print(f"🧩 Sharding activo: {sharding} en {self.shards.directory}")
+
+        self.moment_queue = MomentWriteQueue(self)
+        self.drafts = DraftStore(self)
+
+    def close(self) -> None:
+        """Escribir los momentos y borradores pendientes y cerrar todas las conexiones persistentes"""
+        self.drafts.stop()
+        self.moment_queue.stop()
+        if self.shards:
+            self.shards.close_all()
+        self._connections.close_all()
+        print(f"🔌 Conexiones cerradas: {self.db_path}")
+
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """Estado del gestor de conexiones (perfil y conexiones abiertas)"""
+        stats = self._connections.get_stats()
+        if self.shards:
+            stats["shards"] = self.shards.get_stats()
+        return stats
+
+    # ===============================
+    # ✅ NUEVO: ENRUTADO A LA BASE DE DATOS DE CADA USUARIO
+    # ===============================
+    def _user_connections(self, user_id: int) -> ConnectionManager:
+        """Conexiones de la base de datos con los datos del usuario (su shard o la única)"""
+        if self.shards is None:
+            return self._connections
+        return self.shards.for_user(user_id)
+
+    def _data_connections(self, user_id: Optional[int] = None) -> Iterator[ConnectionManager]:
+        """Bases de datos con datos de diario: la del usuario o, sin user_id, todas"""
+        if user_id is not None:
+            yield self._user_connections(user_id)
+        elif self.shards is None:
+            yield self._connections
+        else:
+            yield from self.shards.iter_shards()
+
+    def idle_seconds(self) -> float:
+        """✅ NUEVO: Segundos sin transacciones en ninguna base de datos abierta (0 = ocupada)"""
+        managers = [self._connections] + (self.shards.open_managers() if self.shards else [])
+        return min(manager.idle_seconds() for manager in managers)
+
+    def database_files(self) -> List[str]:
+        """✅ NUEVO: Ficheros de la base de datos: el principal (o catálogo) y los shards en disco"""
+        files = [self.db_path]
+        if self.shards:
+            files += [os.path.join(self.shards.directory, name) for name in self.shards.shard_files()]
+        return files
+
+    def database_connections(self) -> List[ConnectionManager]:
+        """✅ NUEVO: Gestores de todas las bases de datos (la principal o catálogo y cada shard)"""
+        managers = [self._connections]
+        if self.shards:
+            managers += list(self.shards.iter_shards())
+        return managers
+
+    def shard_name(self, user_id: int) -> str:
+        """Fichero donde viven los datos del usuario (las escrituras de ficheros distintos no compiten)"""
+        if self.shards is None:
+            return os.path.basename(self.db_path)
+        return self.shards.shard_name(user_id)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """✅ NUEVO: Aciertos, fallos y memoria de la caché de consultas"""
+        return self.query_cache.get_stats()
+
+    # ===============================
+    # ✅ NUEVO: INSTRUMENTACIÓN DE CONSULTAS (ver db_instrumentation)
+    # ===============================
+    def get_query_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Sentencias, tiempo y filas por método del servicio (vacío sin instrumentación)"""
+        if self.instrumentation is None:
+            return {}
+        return self.instrumentation.get_stats()
+
+    def get_slow_queries(self, limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """Últimas consultas lentas con su plan y las tablas recorridas enteras"""
+        if self.instrumentation is None:
+            return []
+        return self.instrumentation.get_slow_queries(limit)
+
+    def reset_query_stats(self) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.reset()
+
+    # ===============================
+    # ✅ NUEVO: INVALIDACIÓN DE LA CACHÉ DE CONSULTAS
+    # ===============================
+    def _invalidate_entry_cache(self, user_id: int, entry_date: str) -> None:
+        """Tras escribir la entrada de un día (se ejecuta después del commit)"""
+        self._user_connections(user_id).after_commit(
+            lambda: self.query_cache.invalidate_user(user_id, entry_date, ENTRY_QUERIES + MOMENT_QUERIES)
+        )
+
+    def _invalidate_moment_cache(self, user_id: int, entry_date: str) -> None:
+        """Tras añadir, encolar o borrar momentos de un día"""
+        self._user_connections(user_id).after_commit(
+            lambda: self.query_cache.invalidate_user(user_id, entry_date, MOMENT_QUERIES)
+        )
+
+    def _invalidate_user_cache(self, user_id: int) -> None:
+        """Tras cambiar los datos del usuario (get_user_by_email se indexa por email)"""
+        def matches(key, value) -> bool:
+            if key[0] == "get_user_by_id":
+                return key[2] == user_id
+            return key[0] == "get_user_by_email" and isinstance(value, dict) and value.get("id") == user_id
+
+        self._connections.after_commit(lambda: self.query_cache.invalidate(matches))
+
     def _ensure_directory(self) -> None:
         """Crear directorio de datos si no existe"""
-        db_dir = os.path.dirname(self.db_path)
-        if db_dir and not os.path.exists(db_dir):
-            os.makedirs(db_dir, exist_ok=True)
-            print(f"🗂️ Directorio zen creado: {db_dir}")
+        self._ensure_parent_directory(self.db_path)
+
+    @staticmethod
+    def _ensure_parent_directory(path: str) -> None:
+        """Crear el directorio que contiene `path` si no existe"""
+        parent_dir = os.path.dirname(path)
+        if parent_dir and not os.path.exists(parent_dir):
+            os.makedirs(parent_dir, exist_ok=True)
+            print(f"🗂️ Directorio zen creado: {parent_dir}")
 
     def _initialize_database(self) -> None:
-        """Inicializar base de datos con esquema zen ACTUALIZADO"""
-        print(f"🧘‍♀️ Inicializando base de datos zen: {self.db_path}")
+        """Inicializar base de datos aplicando las migraciones pendientes"""
+        print(f"🧘‍♀️ Inicializando base de datos zen: {self.db_path} (perfil: {self.profile})")
+
+        try:
+            applied = run_migrations(self, self._connections)
+            self.capabilities = self._detect_capabilities()
 
+            with self._connections.transaction() as conn:
+                self.schema_version = get_schema_version(conn)
+
+            print(f"✨ Base de datos zen inicializada (esquema v{self.schema_version}, "
+                  f"{applied} migraciones aplicadas)")
+
+        except Exception as e:
+            print(f"❌ Error inicializando base de datos zen: {e}")
+            import traceback
+            traceback.print_exc()
+            raise
+
+    def _detect_capabilities(self) -> Dict[str, bool]:
+        """✅ NUEVO: Detectar una sola vez qué soporta esta base de datos/versión de SQLite"""
+        with self._connections.transaction() as conn:
+            try:
+                conn.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+                conn.execute("DROP TABLE temp._fts5_probe")
+                has_fts5 = True
+            except sqlite3.OperationalError:
+                has_fts5 = False
+
+            has_search_index = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'journal_fts'"
+            ).fetchone() is not None
+
+        version = sqlite3.sqlite_version_info
+        return {
+            "upsert": version >= (3, 24, 0),
+            "window_functions": version >= (3, 25, 0),
+            "returning": version >= (3, 35, 0),
+            "fts5": has_fts5,
+            "search_index": has_search_index,
+        }
+
+    def _migrate_json_tags(self, cursor) -> None:
+        """✅ NUEVO: Mover los tags JSON de daily_entries a la tabla entry_tags (una sola vez)"""
+        cursor.execute("""
+            SELECT id, user_id, positive_tags, negative_tags
+            FROM daily_entries
+            WHERE positive_tags NOT IN ('', '[]') OR negative_tags NOT IN ('', '[]')
+        """)
+        entries = cursor.fetchall()
+
+        migrated = 0
+        for entry_id, user_id, positive_tags_json, negative_tags_json in entries:
+            tags = {}
+            for tag_type, tags_json in (("positive", positive_tags_json), ("negative", negative_tags_json)):
+                try:
+                    tags[tag_type] = json.loads(tags_json or "[]")
+                except (ValueError, TypeError):
+                    tags[tag_type] = []
+
+            self._insert_entry_tags(cursor, entry_id, user_id, tags["positive"], tags["negative"])
+            migrated += 1
+
+        # Los blobs ya no se leen: se vacían para no duplicar los datos
+        cursor.execute("UPDATE daily_entries SET positive_tags = '[]', negative_tags = '[]'")
+        print(f"🔀 Tags migrados a entry_tags desde {migrated} entradas")
+
+    # ===============================
+    # ✅ TAGS NORMALIZADOS (entry_tags)
+    # ===============================
+    @staticmethod
+    def _normalize_tags(tags: Optional[List]) -> List[Dict[str, str]]:
+        """Convertir tags (dicts, objetos o strings) al formato name/context/emoji"""
+        if not tags:
+            return []
+
+        processed = []
+        for tag in tags:
+            if isinstance(tag, dict):
+                processed.append({
+                    "name": tag.get('name', ''),
+                    "context": tag.get('context', ''),
+                    "emoji": tag.get('emoji', '✨')
+                })
+            else:
+                processed.append({
+                    "name": str(tag),
+                    "context": '',
+                    "emoji": '✨'
+                })
+        return processed
+
+    def _insert_entry_tags(self, cursor, entry_id: int, user_id: int,
+                           positive_tags: List, negative_tags: List) -> None:
+        """Insertar los tags de una entrada en un único executemany"""
+        rows = []
+        for tag_type, tags in (("positive", positive_tags), ("negative", negative_tags)):
+            for position, tag in enumerate(self._normalize_tags(tags)):
+                rows.append((entry_id, user_id, tag_type, position,
+                             tag["name"], tag["context"], tag["emoji"]))
+
+        if rows:
+            cursor.executemany("""
+                INSERT INTO entry_tags (entry_id, user_id, tag_type, position, name, context, emoji)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+
+    def _load_entry_tags(self, cursor, entry_ids: List[int], raw: bool = False) -> Dict[int, Dict[str, List]]:
+        """
+        Cargar los tags de varias entradas con una consulta por bloque de IDs
+
+        Con raw=True cada tag es la tupla (name, context, emoji) sin convertir
+        (filas compactas: se convierte al leer el campo)
+        """
+        tags_by_entry = {entry_id: {"positive": [], "negative": []} for entry_id in entry_ids}
+
+        # SQLite limita el número de parámetros por consulta
+        for start in range(0, len(entry_ids), 500):
+            chunk = entry_ids[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor.execute(f"""
+                SELECT entry_id, tag_type, name, context, emoji
+                FROM entry_tags
+                WHERE entry_id IN ({placeholders})
+                ORDER BY entry_id, tag_type, position
+            """, chunk)
+
+            if raw:
+                for entry_id, tag_type, name, context, emoji in cursor.fetchall():
+                    tags_by_entry[entry_id][tag_type].append((name, context, emoji))
+                continue
+
+            for entry_id, tag_type, name, context, emoji in cursor.fetchall():
+                tags_by_entry[entry_id][tag_type].append({
+                    "name": name,
+                    "context": context or "",
+                    "emoji": emoji or "✨"
+                })
+
+        return tags_by_entry
+
+    @cached_query()
+    def get_tag_counts(self, user_id: int) -> Dict[str, int]:
+        """✅ NUEVO: Total de tags positivos y negativos del usuario (agregado indexado)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._user_connections(user_id).transaction() as conn:
                 cursor = conn.cursor()
 
-                # ✅ ACTUALIZADA: Tabla de usuarios con más campos
                 cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS users (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        email TEXT UNIQUE NOT NULL,
-                        password_hash TEXT NOT NULL,
-                        name TEXT NOT NULL,
-                        avatar_emoji TEXT DEFAULT '🦫',
-                        preferences TEXT DEFAULT '{}',
-                        bio TEXT DEFAULT '',
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        last_login TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        is_active INTEGER DEFAULT 1
-                    )
-                """)
+                    SELECT tag_type, COUNT(*)
+                    FROM entry_tags
+                    WHERE user_id = ?
+                    GROUP BY tag_type
+                """, (user_id,))
 
-                # Tabla de entradas diarias zen
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS daily_entries (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        free_reflection TEXT NOT NULL,
-                        positive_tags TEXT DEFAULT '[]',
-                        negative_tags TEXT DEFAULT '[]',
-                        worth_it INTEGER,
-                        mood_score INTEGER DEFAULT 5,
-                        word_count INTEGER DEFAULT 0,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        entry_date DATE DEFAULT CURRENT_DATE,
-                        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-                    )
-                """)
+                counts = {"positive": 0, "negative": 0}
+                for tag_type, count in cursor.fetchall():
+                    counts[tag_type] = count
+                return counts
 
-                # Tabla de momentos interactivos
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS interactive_moments (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        moment_id TEXT NOT NULL,
-                        emoji TEXT NOT NULL,
-                        text TEXT NOT NULL,
-                        moment_type TEXT NOT NULL CHECK (moment_type IN ('positive', 'negative')),
-                        intensity INTEGER NOT NULL CHECK (intensity >= 1 AND intensity <= 10),
-                        category TEXT NOT NULL DEFAULT 'general',
-                        time_str TEXT NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        entry_date DATE DEFAULT CURRENT_DATE,
-                        is_active INTEGER DEFAULT 1,
-                        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-                    )
-                """)
+        except Exception as e:
+            mark_read_failed()
+            print(f"❌ Error contando tags: {e}")
+            return {"positive": 0, "negative": 0}
 
-                # ✅ NUEVA: Tabla de estadísticas de usuario
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS user_statistics (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        stat_date DATE DEFAULT CURRENT_DATE,
-                        entries_count INTEGER DEFAULT 0,
-                        positive_moments INTEGER DEFAULT 0,
-                        negative_moments INTEGER DEFAULT 0,
-                        total_words INTEGER DEFAULT 0,
-                        avg_mood_score REAL DEFAULT 5.0,
-                        streak_days INTEGER DEFAULT 0,
-                        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
-                        UNIQUE(user_id, stat_date)
-                    )
-                """)
+    # ===============================
+    # ✅ ROLLUPS DEL CALENDARIO
+    # ===============================
+    def _write_rollups(self, cursor, scope: str, params: tuple) -> None:
+        """
+        Recalcular daily_rollups y monthly_rollups desde las tablas crudas
+
+        Args:
+            scope: Condición SQL sobre user_id/entry_date ("1 = 1" para todo)
+            params: Parámetros de la condición
+        """
+        cursor.execute(f"DELETE FROM daily_rollups WHERE {scope}", params)
+
+        # Parte de la entrada: la más reciente de cada día con sus tags
+        cursor.execute(f"""
+            INSERT INTO daily_rollups (
+                user_id, entry_date, day_number, positive_count, negative_count,
+                worth_it, mood_score, has_entry
+            )
+            SELECT d.user_id, d.entry_date, d.day_number,
+                   (SELECT COUNT(*) FROM entry_tags t WHERE t.entry_id = d.id AND t.tag_type = 'positive'),
+                   (SELECT COUNT(*) FROM entry_tags t WHERE t.entry_id = d.id AND t.tag_type = 'negative'),
+                   d.worth_it, d.mood_score, 1
+            FROM daily_entries d
+            WHERE d.id IN (
+                SELECT MAX(id) FROM daily_entries
+                WHERE {scope}
+                GROUP BY user_id, entry_date
+            )
+        """, params)
+
+        # Parte de momentos: los activos todavía no convertidos en entrada
+        cursor.execute(f"""
+            INSERT INTO daily_rollups (user_id, entry_date, day_number, pending_positive, pending_negative)
+            SELECT user_id, entry_date, day_number,
+                   SUM(moment_type = 'positive'), SUM(moment_type = 'negative')
+            FROM interactive_moments
+            WHERE is_active = 1 AND {scope}
+            GROUP BY user_id, entry_date, day_number
+            ON CONFLICT (user_id, entry_date) DO UPDATE SET
+                pending_positive = excluded.pending_positive,
+                pending_negative = excluded.pending_negative
+        """, params)
+
+    def _write_monthly_rollups(self, cursor, user_id: Optional[int] = None,
+                               year: Optional[int] = None, month: Optional[int] = None) -> None:
+        """Recalcular monthly_rollups a partir de daily_rollups (máximo 31 filas por mes)"""
+        if user_id is None:
+            month_scope, month_params = "1 = 1", ()
+            day_scope, day_params = "1 = 1", ()
+        elif year is None:
+            month_scope, month_params = "user_id = ?", (user_id,)
+            day_scope, day_params = "user_id = ?", (user_id,)
+        else:
+            month_scope, month_params = "user_id = ? AND year = ? AND month = ?", (user_id, year, month)
+            day_scope = "user_id = ? AND entry_date >= ? AND entry_date <= ?"
+            day_params = (user_id, f"{year:04d}-{month:02d}-01", f"{year:04d}-{month:02d}-31")
+
+        cursor.execute(f"DELETE FROM monthly_rollups WHERE {month_scope}", month_params)
+        cursor.execute(f"""
+            INSERT INTO monthly_rollups (
+                user_id, year, month, positive_count, negative_count, total_count, entries_count
+            )
+            SELECT user_id,
+                   CAST(substr(entry_date, 1, 4) AS INTEGER),
+                   CAST(substr(entry_date, 6, 2) AS INTEGER),
+                   SUM(positive_count), SUM(negative_count),
+                   SUM(positive_count + negative_count), SUM(has_entry)
+            FROM daily_rollups
+            WHERE has_entry = 1 AND {day_scope}
+            GROUP BY 1, 2, 3
+        """, day_params)
+
+    def _refresh_day_rollups(self, cursor, user_id: int, entry_date: str) -> None:
+        """Actualizar los rollups de un día y su mes dentro de la transacción en curso"""
+        self._write_rollups(cursor, "user_id = ? AND entry_date = ?", (user_id, entry_date))
+        self._write_monthly_rollups(cursor, user_id, int(entry_date[:4]), int(entry_date[5:7]))
+
+    def _rebuild_rollups(self, cursor, user_id: Optional[int] = None) -> None:
+        """Regenerar todos los rollups (de un usuario o de todos)"""
+        if user_id is None:
+            self._write_rollups(cursor, "1 = 1", ())
+        else:
+            self._write_rollups(cursor, "user_id = ?", (user_id,))
+        self._write_monthly_rollups(cursor, user_id)
+
+    def rebuild_rollups(self, user_id: Optional[int] = None) -> bool:
+        """✅ NUEVO: Regenerar los rollups del calendario desde las tablas crudas"""
+        try:
+            for connections in self._data_connections(user_id):
+                with connections.transaction(immediate=True) as conn:
+                    self._rebuild_rollups(conn.cursor(), user_id)
 
-                # Índices para rendimiento zen
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_entries_user_date ON daily_entries(user_id, entry_date)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_interactive_moments_user_date ON interactive_moments(user_id, entry_date, is_active)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)")
-                cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_statistics_user ON user_statistics(user_id, stat_date)")
+            if user_id is None:
+                self.query_cache.clear()
+            else:
+                self.query_cache.invalidate_user(user_id)
 
-                conn.commit()
-                print("✨ Base de datos zen inicializada correctamente CON SESIONES")
+            target = f"usuario {user_id}" if user_id is not None else "todos los usuarios"
+            print(f"🔁 Rollups regenerados para {target}")
+            return True
 
         except Exception as e:
-            print(f"❌ Error inicializando base de datos zen: {e}")
-            import traceback
-            traceback.print_exc()
-            raise
+            print(f"❌ Error regenerando rollups: {e}")
+            return False
 
     # ===============================
     # ✅ MÉTODOS DE USUARIOS ACTUALIZADOS
@@ -131,7 +519,7 @@ class DatabaseService:
         try:
             password_hash = hashlib.sha256(password.encode()).hexdigest()
 
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connections.transaction(immediate=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     INSERT INTO users (email, password_hash, name, avatar_emoji)
@@ -141,10 +529,10 @@ class DatabaseService:
                 user_id = cursor.lastrowid
                 print(f"🌸 Usuario zen creado: {email} (ID: {user_id})")
 
-                # ✅ NUEVO: Inicializar estadísticas del usuario
-                self._initialize_user_statistics(user_id)
+            # ✅ NUEVO: Inicializar estadísticas del usuario (en su shard si hay sharding)
+            self._initialize_user_statistics(user_id)
 
-                return user_id
+            return user_id
 
         except sqlite3.IntegrityError:
             print(f"⚠️ El email {email} ya existe en el santuario")
@@ -158,7 +546,7 @@ class DatabaseService:
         try:
             password_hash = hashlib.sha256(password.encode()).hexdigest()
 
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connections.transaction(immediate=True) as conn:
                 cursor = conn.cursor()
 
                 cursor.execute("""
@@ -178,6 +566,7 @@ class DatabaseService:
                         SET last_login = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
                         WHERE id = ?
                     """, (user_id,))
+                    self._invalidate_user_cache(user_id)
 
                     user_data = {
                         "id": user_id,
@@ -198,10 +587,11 @@ class DatabaseService:
             print(f"❌ Error en login zen: {e}")
             return None
 
+    @cached_query()
     def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """✅ NUEVO: Obtener usuario por email (para auto-login)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connections.transaction() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute("""
@@ -232,13 +622,15 @@ class DatabaseService:
                 return None
 
         except Exception as e:
+            mark_read_failed()
             print(f"❌ Error obteniendo usuario por email: {e}")
             return None
 
+    @cached_query()
     def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
         """✅ NUEVO: Obtener usuario por ID"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connections.transaction() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute("""
@@ -268,6 +660,7 @@ class DatabaseService:
                 return None
 
         except Exception as e:
+            mark_read_failed()
             print(f"❌ Error obteniendo usuario por ID: {e}")
             return None
 
@@ -275,7 +668,7 @@ class DatabaseService:
                             bio: str = None, preferences: Dict = None) -> bool:
         """✅ NUEVO: Actualizar perfil de usuario"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connections.transaction(immediate=True) as conn:
                 cursor = conn.cursor()
 
                 # Construir query dinámicamente según los campos proporcionados
@@ -314,6 +707,7 @@ class DatabaseService:
                 cursor.execute(query, values)
 
                 if cursor.rowcount > 0:
+                    self._invalidate_user_cache(user_id)
                     print(f"✅ Perfil actualizado para usuario {user_id}")
                     return True
                 else:
@@ -327,7 +721,7 @@ class DatabaseService:
     def _initialize_user_statistics(self, user_id: int) -> bool:
         """✅ NUEVO: Inicializar estadísticas para nuevo usuario"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._user_connections(user_id).transaction(immediate=True) as conn:
                 cursor = conn.cursor()
 
                 cursor.execute("""
@@ -345,137 +739,494 @@ class DatabaseService:
     # ===============================
     # ✅ MÉTODOS DE ESTADÍSTICAS MEJORADOS
     # ===============================
+    @cached_query(per_day=True)
     def get_user_comprehensive_statistics(self, user_id: int) -> Dict[str, Any]:
-        """✅ NUEVO: Obtener estadísticas completas del usuario"""
+        """
+        ✅ MEJORADO: Estadísticas completas del usuario con una sola lectura
+
+        user_statistics se mantiene al guardar cada entrada (ver
+        _apply_statistics_delta); aquí solo se lee su fila.
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._user_connections(user_id).transaction() as conn:
                 cursor = conn.cursor()
 
-                # Estadísticas básicas
                 cursor.execute("""
-                    SELECT COUNT(*) as total_entries,
-                           AVG(mood_score) as avg_mood,
-                           SUM(word_count) as total_words
-                    FROM daily_entries 
+                    SELECT entries_count, positive_moments, negative_moments, total_words,
+                           avg_mood_score, streak_days, longest_streak, last_day_number,
+                           month_start_day, month_entries, best_mood_score, best_mood_date
+                    FROM user_statistics
                     WHERE user_id = ?
+                    ORDER BY stat_date DESC
+                    LIMIT 1
                 """, (user_id,))
 
-                basic_stats = cursor.fetchone()
-                total_entries, avg_mood, total_words = basic_stats if basic_stats else (0, 5.0, 0)
+                row = cursor.fetchone()
 
-                # Conteo de tags positivos y negativos
-                cursor.execute("""
-                    SELECT positive_tags, negative_tags
-                    FROM daily_entries 
-                    WHERE user_id = ?
-                """, (user_id,))
-
-                entries = cursor.fetchall()
-                positive_count = 0
-                negative_count = 0
-
-                for entry in entries:
-                    positive_tags_json, negative_tags_json = entry
-                    try:
-                        positive_tags = json.loads(positive_tags_json or "[]")
-                        negative_tags = json.loads(negative_tags_json or "[]")
-                        positive_count += len(positive_tags)
-                        negative_count += len(negative_tags)
-                    except:
-                        continue
+            if not row:
+                return self._empty_statistics()
 
-                # Calcular racha de días consecutivos
-                streak_days = self.calculate_current_streak(user_id)
+            (total_entries, positive_count, negative_count, total_words, avg_mood, streak_days,
+             longest_streak, last_day_number, month_start_day, month_entries, best_mood,
+             best_mood_date) = row
 
-                # Estadísticas de este mes
-                current_month = date.today().replace(day=1)
-                cursor.execute("""
-                    SELECT COUNT(*) as entries_this_month
-                    FROM daily_entries 
-                    WHERE user_id = ? AND entry_date >= ?
-                """, (user_id, current_month.isoformat()))
+            # El contador del mes es del mes guardado: si ya cambió de mes, aún no hay entradas
+            month_start, _ = month_range(date.today().year, date.today().month)
+            entries_this_month = month_entries if month_start_day == month_start else 0
 
-                entries_this_month = cursor.fetchone()[0] if cursor.fetchone() else 0
+            return {
+                'total_entries': int(total_entries or 0),
+                'positive_count': int(positive_count or 0),
+                'negative_count': int(negative_count or 0),
+                'avg_mood_score': round(float(avg_mood or 5.0) if total_entries else 5.0, 1),
+                'total_words': int(total_words or 0),
+                'streak_days': self._current_streak(streak_days, last_day_number),
+                'longest_streak': longest_streak or 0,
+                'entries_this_month': int(entries_this_month or 0),
+                'best_mood_score': int(best_mood or 5),
+                'best_mood_date': best_mood_date,
+                'total_moments': int(positive_count or 0) + int(negative_count or 0)
+            }
 
-                # Día con mejor mood score
-                cursor.execute("""
-                    SELECT MAX(mood_score) as best_mood, entry_date
-                    FROM daily_entries 
-                    WHERE user_id = ?
-                    ORDER BY mood_score DESC
-                    LIMIT 1
-                """, (user_id,))
+        except Exception as e:
+            mark_read_failed()
+            print(f"❌ Error obteniendo estadísticas completas: {e}")
+            return self._empty_statistics()
+
+    @staticmethod
+    def _empty_statistics() -> Dict[str, Any]:
+        return {
+            'total_entries': 0,
+            'positive_count': 0,
+            'negative_count': 0,
+            'avg_mood_score': 5.0,
+            'total_words': 0,
+            'streak_days': 0,
+            'longest_streak': 0,
+            'entries_this_month': 0,
+            'best_mood_score': 5,
+            'best_mood_date': None,
+            'total_moments': 0
+        }
+
+    @cached_query(per_day=True)
+    def get_mood_series(self, user_id: int, start: Optional[Any] = None, end: Optional[Any] = None,
+                        window: int = DEFAULT_WINDOW,
+                        ewma_alpha: float = DEFAULT_EWMA_ALPHA) -> Optional[Dict[str, Any]]:
+        """
+        ✅ NUEVO: mood_score diario entre start y end para gráficas de tendencia
+
+        Args:
+            start, end: date o 'YYYY-MM-DD' (por defecto, los últimos 365 días hasta hoy)
+            window: Días de la media móvil y la volatilidad
+            ewma_alpha: Peso del día actual en la media exponencial
+
+        Returns:
+            Dict con arrays densos por día (mood, filled, rolling_mean, ewma,
+            volatility, has_entry), weekly, monthly y summary (ver mood_series)
+        """
+        try:
+            last = day_number(end) if end is not None else today_number()
+            first = day_number(start) if start is not None else last - 364
 
-                best_mood_result = cursor.fetchone()
-                best_mood, best_mood_date = best_mood_result if best_mood_result else (5, None)
+            with self._user_connections(user_id).transaction() as conn:
+                # Solo las dos columnas necesarias, por el índice (user_id, day_number)
+                rows = conn.execute(MOOD_ROWS_SQL, (user_id, first, last)).fetchall()
 
-                return {
-                    'total_entries': int(total_entries or 0),
-                    'positive_count': positive_count,
-                    'negative_count': negative_count,
-                    'avg_mood_score': round(float(avg_mood or 5.0), 1),
-                    'total_words': int(total_words or 0),
-                    'streak_days': streak_days,
-                    'entries_this_month': int(entries_this_month or 0),
-                    'best_mood_score': int(best_mood or 5),
-                    'best_mood_date': best_mood_date,
-                    'total_moments': positive_count + negative_count
-                }
+            return build_mood_series(rows, first, last, window, ewma_alpha)
 
         except Exception as e:
-            print(f"❌ Error obteniendo estadísticas completas: {e}")
-            return {
-                'total_entries': 0,
-                'positive_count': 0,
-                'negative_count': 0,
-                'avg_mood_score': 5.0,
-                'total_words': 0,
-                'streak_days': 0,
-                'entries_this_month': 0,
-                'best_mood_score': 5,
-                'best_mood_date': None,
-                'total_moments': 0
-            }
+            mark_read_failed()
+            print(f"❌ Error calculando la serie de ánimo: {e}")
+            return None
 
     def calculate_current_streak(self, user_id: int) -> int:
-        """✅ MEJORADO: Calcular racha actual de días consecutivos"""
+        """✅ MEJORADO: Racha actual de días consecutivos (lectura de user_statistics)"""
+        return self.get_streak_info(user_id)["current_streak"]
+
+    @cached_query(per_day=True)
+    def get_streak_info(self, user_id: int) -> Dict[str, Any]:
+        """
+        ✅ NUEVO: Racha actual, racha más larga y fecha de la última entrada
+
+        La racha guardada es la que termina en last_entry_date; si la última
+        entrada es anterior a ayer, la racha actual ya está rota.
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._user_connections(user_id).transaction() as conn:
                 cursor = conn.cursor()
 
-                # Obtener todas las fechas con entradas, ordenadas descendentemente
                 cursor.execute("""
-                    SELECT DISTINCT entry_date
-                    FROM daily_entries 
+                    SELECT streak_days, longest_streak, last_entry_date, last_day_number
+                    FROM user_statistics
                     WHERE user_id = ?
-                    ORDER BY entry_date DESC
+                    ORDER BY stat_date DESC
+                    LIMIT 1
                 """, (user_id,))
 
-                dates = [datetime.strptime(row[0], '%Y-%m-%d').date() for row in cursor.fetchall()]
+                row = cursor.fetchone()
 
-                if not dates:
-                    return 0
+                if not row or row[3] is None:
+                    return {"current_streak": 0, "longest_streak": 0, "last_entry_date": None}
 
-                streak = 0
-                current_date = date.today()
+                streak_days, longest_streak, last_entry_date, last_day_number = row
 
-                # Si no hay entrada para hoy, empezar desde ayer
-                if dates[0] != current_date:
-                    current_date = current_date - timedelta(days=1)
+                return {
+                    "current_streak": self._current_streak(streak_days, last_day_number),
+                    "longest_streak": longest_streak or 0,
+                    "last_entry_date": last_entry_date
+                }
 
-                # Contar días consecutivos hacia atrás
-                for entry_date in dates:
-                    if entry_date == current_date:
-                        streak += 1
-                        current_date -= timedelta(days=1)
-                    else:
-                        break
+        except Exception as e:
+            mark_read_failed()
+            print(f"❌ Error obteniendo racha: {e}")
+            return {"current_streak": 0, "longest_streak": 0, "last_entry_date": None}
+
+    @staticmethod
+    def _current_streak(streak_days: Optional[int], last_day_number: Optional[int]) -> int:
+        """La racha guardada sigue viva si la última entrada fue hoy o ayer"""
+        if last_day_number is None or today_number() - last_day_number > 1:
+            return 0
+        return streak_days or 0
+
+    def _ensure_user_statistics_row(self, cursor, user_id: int) -> None:
+        """Garantizar la fila de estadísticas del usuario (una por usuario)"""
+        cursor.execute("SELECT 1 FROM user_statistics WHERE user_id = ? LIMIT 1", (user_id,))
+        if not cursor.fetchone():
+            cursor.execute("""
+                INSERT INTO user_statistics (user_id, stat_date)
+                VALUES (?, CURRENT_DATE)
+            """, (user_id,))
+
+    def _update_streak_on_entry(self, cursor, user_id: int, entry_date: str) -> None:
+        """Actualizar la racha al guardar una entrada (O(1) salvo entradas pasadas)"""
+        self._ensure_user_statistics_row(cursor, user_id)
+
+        cursor.execute("""
+            SELECT streak_days, longest_streak, last_day_number
+            FROM user_statistics
+            WHERE user_id = ?
+        """, (user_id,))
+        streak_days, longest_streak, last_day_number = cursor.fetchone()
+        entry_day_number = day_number(entry_date)
+
+        if last_day_number == entry_day_number:
+            # Se está actualizando la entrada del mismo día: la racha no cambia
+            return
+
+        if last_day_number is not None and entry_day_number < last_day_number:
+            # Entrada en un día pasado: recalcular desde cero
+            self._recompute_streak(cursor, user_id)
+            return
+
+        if last_day_number is not None and entry_day_number - last_day_number == 1:
+            streak_days = (streak_days or 0) + 1
+        else:
+            streak_days = 1
+
+        cursor.execute("""
+            UPDATE user_statistics
+            SET streak_days = ?, longest_streak = ?, last_entry_date = ?, last_day_number = ?,
+                last_updated = CURRENT_TIMESTAMP
+            WHERE user_id = ?
+        """, (streak_days, max(longest_streak or 0, streak_days), entry_date, entry_day_number, user_id))
+
+    def _compute_streak(self, cursor, user_id: int) -> Tuple[int, int, Optional[str], Optional[int]]:
+        """(racha, racha más larga, última fecha, último day_number) con islas de fechas consecutivas en SQL"""
+        # Días consecutivos comparten (day_number - posición): cada grupo es una racha.
+        # Una entrada por día y el índice (user_id, day_number) ya dan el orden.
+        cursor.execute("""
+            WITH islands AS (
+                SELECT entry_date, day_number,
+                       day_number - ROW_NUMBER() OVER (ORDER BY day_number) AS island
+                FROM daily_entries
+                WHERE user_id = ?
+            )
+            SELECT MAX(entry_date), MAX(day_number) AS last_day, COUNT(*) AS length
+            FROM islands
+            GROUP BY island
+            ORDER BY last_day DESC
+        """, (user_id,))
+        runs = cursor.fetchall()
+
+        if not runs:
+            return 0, 0, None, None
+
+        last_entry_date, last_day_number, streak_days = runs[0]
+        return streak_days, max(length for _, _, length in runs), last_entry_date, last_day_number
+
+    def _recompute_streak(self, cursor, user_id: int) -> None:
+        """Recalcular rachas desde cero"""
+        self._ensure_user_statistics_row(cursor, user_id)
+        streak_days, longest_streak, last_entry_date, last_day_number = self._compute_streak(cursor, user_id)
+
+        cursor.execute("""
+            UPDATE user_statistics
+            SET streak_days = ?, longest_streak = ?, last_entry_date = ?, last_day_number = ?,
+                last_updated = CURRENT_TIMESTAMP
+            WHERE user_id = ?
+        """, (streak_days, longest_streak, last_entry_date, last_day_number, user_id))
+
+    def _rebuild_all_streaks(self, cursor) -> None:
+        """Dejar una fila de estadísticas por usuario y recalcular todas las rachas"""
+        cursor.execute("""
+            DELETE FROM user_statistics
+            WHERE id NOT IN (SELECT MAX(id) FROM user_statistics GROUP BY user_id)
+        """)
+
+        cursor.execute("SELECT id FROM users UNION SELECT DISTINCT user_id FROM daily_entries")
+        for (user_id,) in cursor.fetchall():
+            self._recompute_streak(cursor, user_id)
+
+    def recompute_streak(self, user_id: int) -> bool:
+        """✅ NUEVO: Forzar el recálculo de la racha (p. ej. tras borrar una entrada)"""
+        try:
+            with self._user_connections(user_id).transaction(immediate=True) as conn:
+                self._recompute_streak(conn.cursor(), user_id)
 
-                return streak
+            self.query_cache.invalidate_user(user_id, methods=ENTRY_QUERIES)
+            return True
 
         except Exception as e:
-            print(f"❌ Error calculando racha: {e}")
-            return 0
+            print(f"❌ Error recalculando racha: {e}")
+            return False
+
+    # ===============================
+    # ✅ NUEVO: AGREGADO user_statistics MANTENIDO AL ESCRIBIR
+    # ===============================
+    def _entry_contribution(self, cursor, user_id: int, entry_date: str) -> Dict[str, int]:
+        """Lo que aporta a los contadores la entrada guardada de un día (ceros si no hay)"""
+        cursor.execute("""
+            SELECT COALESCE(d.word_count, 0), d.mood_score,
+                   COALESCE(SUM(t.tag_type = 'positive'), 0), COALESCE(SUM(t.tag_type = 'negative'), 0)
+            FROM daily_entries d
+            LEFT JOIN entry_tags t ON t.entry_id = d.id
+            WHERE d.user_id = ? AND d.entry_date = ?
+            GROUP BY d.id
+        """, (user_id, entry_date))
+        row = cursor.fetchone()
+
+        if not row:
+            return {counter: 0 for counter in STATISTICS_COUNTERS}
+
+        word_count, mood_score, positive, negative = row
+        return {
+            "entries_count": 1,
+            "positive_moments": positive,
+            "negative_moments": negative,
+            "total_words": word_count,
+            "mood_total": mood_score or 0,
+            "mood_entries": 0 if mood_score is None else 1,
+        }
+
+    def _apply_statistics_delta(self, cursor, user_id: int, entry_date: str,
+                                before: Dict[str, int], after: Dict[str, int], mood_score: int) -> None:
+        """
+        Actualizar la fila de estadísticas con la diferencia entre la entrada
+        anterior del día y la nueva (sin recorrer el historial)
+        """
+        self._ensure_user_statistics_row(cursor, user_id)
+
+        cursor.execute("""
+            SELECT best_mood_score, best_mood_date, month_start_day, month_entries
+            FROM user_statistics
+            WHERE user_id = ?
+        """, (user_id,))
+        best_mood, best_mood_date, month_start_day, month_entries = cursor.fetchone()
+        entry_day = day_number(entry_date)
+
+        if (best_mood is None or mood_score > best_mood
+                or (mood_score == best_mood and entry_day >= day_number(best_mood_date))):
+            best_mood, best_mood_date = mood_score, entry_date
+        elif best_mood_date == entry_date:
+            # El mejor día bajó de nota: buscar el nuevo mejor (ya con la nota nueva guardada)
+            best_mood, best_mood_date = self._best_mood(cursor, user_id)
+
+        month_start, _ = month_range(date.today().year, date.today().month)
+        if month_start_day != month_start:
+            # Primera escritura del mes: contar por el índice (user_id, day_number)
+            month_entries = self._count_entries_since(cursor, user_id, month_start)
+        elif not before["entries_count"] and entry_day >= month_start:
+            month_entries = (month_entries or 0) + 1
+
+        delta = [after[counter] - before[counter] for counter in STATISTICS_COUNTERS]
+        # En un UPDATE, las columnas de la derecha son los valores anteriores a la sentencia
+        cursor.execute("""
+            UPDATE user_statistics
+            SET entries_count = COALESCE(entries_count, 0) + ?,
+                positive_moments = COALESCE(positive_moments, 0) + ?,
+                negative_moments = COALESCE(negative_moments, 0) + ?,
+                total_words = COALESCE(total_words, 0) + ?,
+                mood_total = COALESCE(mood_total, 0) + ?,
+                mood_entries = COALESCE(mood_entries, 0) + ?,
+                avg_mood_score = CASE
+                    WHEN COALESCE(mood_entries, 0) + ? > 0
+                    THEN (COALESCE(mood_total, 0) + ?) * 1.0 / (COALESCE(mood_entries, 0) + ?)
+                    ELSE 5.0
+                END,
+                best_mood_score = ?, best_mood_date = ?,
+                month_start_day = ?, month_entries = ?,
+                last_updated = CURRENT_TIMESTAMP
+            WHERE user_id = ?
+        """, (*delta, delta[5], delta[4], delta[5], best_mood, best_mood_date,
+              month_start, month_entries, user_id))
+
+    @staticmethod
+    def _best_mood(cursor, user_id: int) -> Tuple[Optional[int], Optional[str]]:
+        """Día con mejor mood score (el más reciente si hay empate)"""
+        cursor.execute("""
+            SELECT mood_score, entry_date
+            FROM daily_entries
+            WHERE user_id = ? AND mood_score IS NOT NULL
+            ORDER BY mood_score DESC, day_number DESC
+            LIMIT 1
+        """, (user_id,))
+        row = cursor.fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    @staticmethod
+    def _count_entries_since(cursor, user_id: int, first_day_number: int) -> int:
+        cursor.execute("SELECT COUNT(*) FROM daily_entries WHERE user_id = ? AND day_number >= ?",
+                       (user_id, first_day_number))
+        return cursor.fetchone()[0]
+
+    def _compute_statistics(self, cursor, user_id: int) -> Dict[str, Any]:
+        """Todas las columnas de user_statistics recalculadas desde las entradas"""
+        cursor.execute("""
+            SELECT COUNT(*), COALESCE(SUM(word_count), 0), COALESCE(SUM(mood_score), 0), COUNT(mood_score)
+            FROM daily_entries
+            WHERE user_id = ?
+        """, (user_id,))
+        entries_count, total_words, mood_total, mood_entries = cursor.fetchone()
+
+        cursor.execute("""
+            SELECT tag_type, COUNT(*) FROM entry_tags WHERE user_id = ? GROUP BY tag_type
+        """, (user_id,))
+        tag_counts = dict(cursor.fetchall())
+
+        best_mood, best_mood_date = self._best_mood(cursor, user_id)
+        month_start, _ = month_range(date.today().year, date.today().month)
+        streak_days, longest_streak, last_entry_date, last_day_number = self._compute_streak(cursor, user_id)
+
+        return {
+            "entries_count": entries_count,
+            "positive_moments": tag_counts.get("positive", 0),
+            "negative_moments": tag_counts.get("negative", 0),
+            "total_words": total_words,
+            "mood_total": mood_total,
+            "mood_entries": mood_entries,
+            "avg_mood_score": round(mood_total / mood_entries, 6) if mood_entries else 5.0,
+            "best_mood_score": best_mood,
+            "best_mood_date": best_mood_date,
+            "month_start_day": month_start,
+            "month_entries": self._count_entries_since(cursor, user_id, month_start),
+            "streak_days": streak_days,
+            "longest_streak": longest_streak,
+            "last_entry_date": last_entry_date,
+            "last_day_number": last_day_number,
+        }
+
+    def _read_statistics(self, cursor, user_id: int) -> Optional[Dict[str, Any]]:
+        """Fila guardada, con el contador del mes como lo ven las lecturas"""
+        cursor.execute(f"""
+            SELECT {", ".join(STATISTICS_FIELDS)}
+            FROM user_statistics
+            WHERE user_id = ?
+            ORDER BY stat_date DESC
+            LIMIT 1
+        """, (user_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        stored = dict(zip(STATISTICS_FIELDS, row))
+        if stored["avg_mood_score"] is not None:
+            stored["avg_mood_score"] = round(stored["avg_mood_score"], 6)
+        month_start, _ = month_range(date.today().year, date.today().month)
+        if stored["month_start_day"] != month_start:
+            stored["month_start_day"], stored["month_entries"] = month_start, 0
+        return stored
+
+    def _write_statistics(self, cursor, user_id: int, stats: Dict[str, Any]) -> None:
+        self._ensure_user_statistics_row(cursor, user_id)
+        assignments = ", ".join(f"{field} = ?" for field in STATISTICS_FIELDS)
+        cursor.execute(f"""
+            UPDATE user_statistics
+            SET {assignments}, last_updated = CURRENT_TIMESTAMP
+            WHERE user_id = ?
+        """, (*(stats[field] for field in STATISTICS_FIELDS), user_id))
+
+    def _rebuild_statistics(self, cursor, user_id: int) -> None:
+        """Recalcular la fila de estadísticas de un usuario desde cero"""
+        self._write_statistics(cursor, user_id, self._compute_statistics(cursor, user_id))
+
+    def _rebuild_all_statistics(self, cursor) -> None:
+        """Dejar una fila de estadísticas por usuario y recalcularlas todas"""
+        cursor.execute("""
+            DELETE FROM user_statistics
+            WHERE id NOT IN (SELECT MAX(id) FROM user_statistics GROUP BY user_id)
+        """)
+
+        cursor.execute("SELECT id FROM users UNION SELECT DISTINCT user_id FROM daily_entries")
+        for (user_id,) in cursor.fetchall():
+            self._rebuild_statistics(cursor, user_id)
+
+    def check_user_statistics(self, user_id: Optional[int] = None, repair: bool = False) -> Dict[str, Any]:
+        """
+        ✅ NUEVO: Comparar user_statistics con un recálculo desde cero
+
+        Args:
+            user_id: Usuario a comprobar (None = todos)
+            repair: Sobrescribir las filas con diferencias con el recálculo
+
+        Returns:
+            Dict con usuarios comprobados, con diferencias, reparados y, por
+            usuario, {campo: {"stored": ..., "actual": ...}}
+        """
+        report = {"checked": 0, "drifted": 0, "repaired": 0, "drift": {}}
+        try:
+            for connections in self._data_connections(user_id):
+                with connections.transaction(immediate=repair, snapshot=not repair) as conn:
+                    cursor = conn.cursor()
+
+                    if user_id is not None:
+                        user_ids = [user_id]
+                    else:
+                        cursor.execute("""
+                            SELECT user_id FROM user_statistics
+                            UNION SELECT DISTINCT user_id FROM daily_entries
+                        """)
+                        user_ids = [row[0] for row in cursor.fetchall()]
+
+                    for uid in user_ids:
+                        actual = self._compute_statistics(cursor, uid)
+                        stored = self._read_statistics(cursor, uid) or {}
+                        drift = {
+                            field: {"stored": stored.get(field), "actual": value}
+                            for field, value in actual.items()
+                            if stored.get(field) != value
+                        }
+                        report["checked"] += 1
+                        if not drift:
+                            continue
+
+                        report["drifted"] += 1
+                        report["drift"][uid] = drift
+                        if repair:
+                            self._write_statistics(cursor, uid, actual)
+                            report["repaired"] += 1
+
+            for uid in report["drift"] if repair else ():
+                self.query_cache.invalidate_user(uid, methods=ENTRY_QUERIES)
+
+            if report["drifted"]:
+                print(f"⚠️ Estadísticas con diferencias en {report['drifted']} de {report['checked']} usuarios")
+            return report
+
+        except Exception as e:
+            print(f"❌ Error comprobando estadísticas: {e}")
+            report["error"] = str(e)
+            return report
 
     # ===============================
     # MÉTODOS DE MOMENTOS INTERACTIVOS - MANTENIDOS
@@ -485,49 +1236,31 @@ class DatabaseService:
         try:
             today = date.today().isoformat()
 
-            with sqlite3.connect(self.db_path) as conn:
+            with self._user_connections(user_id).transaction(immediate=True) as conn:
                 cursor = conn.cursor()
 
-                cursor.execute("PRAGMA table_info(interactive_moments)")
-                columns = cursor.fetchall()
-                column_names = [col[1] for col in columns]
-
-                if 'is_active' in column_names:
-                    cursor.execute("""
-                        INSERT INTO interactive_moments (
-                            user_id, moment_id, emoji, text, moment_type, 
-                            intensity, category, time_str, entry_date, is_active
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
-                    """, (
-                        user_id,
-                        moment_data.get('id', str(int(datetime.now().timestamp() * 1000))),
-                        moment_data.get('emoji', ''),
-                        moment_data.get('text', ''),
-                        moment_data.get('type', 'positive'),
-                        moment_data.get('intensity', 5),
-                        moment_data.get('category', 'general'),
-                        moment_data.get('time', datetime.now().strftime("%H:%M")),
-                        today
-                    ))
-                else:
-                    cursor.execute("""
-                        INSERT INTO interactive_moments (
-                            user_id, moment_id, emoji, text, moment_type, 
-                            intensity, category, time_str, entry_date
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        user_id,
-                        moment_data.get('id', str(int(datetime.now().timestamp() * 1000))),
-                        moment_data.get('emoji', ''),
-                        moment_data.get('text', ''),
-                        moment_data.get('type', 'positive'),
-                        moment_data.get('intensity', 5),
-                        moment_data.get('category', 'general'),
-                        moment_data.get('time', datetime.now().strftime("%H:%M")),
-                        today
-                    ))
+                # is_active está garantizada por la migración 1
+                cursor.execute("""
+                    INSERT INTO interactive_moments (
+                        user_id, moment_id, emoji, text, moment_type, 
+                        intensity, category, time_str, entry_date, day_number, is_active
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+                """, (
+                    user_id,
+                    moment_data.get('id', str(int(datetime.now().timestamp() * 1000))),
+                    moment_data.get('emoji', ''),
+                    moment_data.get('text', ''),
+                    moment_data.get('type', 'positive'),
+                    moment_data.get('intensity', 5),
+                    moment_data.get('category', 'general'),
+                    moment_data.get('time', datetime.now().strftime("%H:%M")),
+                    today,
+                    today_number()
+                ))
 
                 moment_id = cursor.lastrowid
+                self._refresh_day_rollups(cursor, user_id, today)
+                self._invalidate_moment_cache(user_id, today)
                 print(f"💾 Momento guardado: {moment_data.get('emoji')} {moment_data.get('text')} (ID: {moment_id})")
                 return moment_id
 
@@ -537,34 +1270,77 @@ class DatabaseService:
             traceback.print_exc()
             return None
 
+    def queue_interactive_moment(self, user_id: int, moment_data: dict) -> str:
+        """
+        ✅ NUEVO: Guardar momento en diferido (se agrupa con otros en una transacción)
+
+        Returns:
+            str: moment_id del momento encolado
+        """
+        moment_id = self.moment_queue.enqueue(user_id, moment_data)
+        # La lectura de momentos de hoy incluye la cola
+        self._invalidate_moment_cache(user_id, date.today().isoformat())
+        print(f"📝 Momento encolado: {moment_data.get('emoji')} {moment_data.get('text')} (ID: {moment_id})")
+        return moment_id
+
+    def flush_pending_moments(self, user_id: Optional[int] = None) -> int:
+        """✅ NUEVO: Escribir ya los momentos encolados (al salir de la pantalla o guardar)"""
+        try:
+            written = self.moment_queue.flush(user_id)
+            if written:
+                print(f"💾 {written} momentos pendientes escritos")
+            return written
+
+        except Exception as e:
+            print(f"❌ Error escribiendo momentos pendientes: {e}")
+            return 0
+
+    def _write_moments_batch(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insertar un lote de momentos con executemany en una única transacción
+
+        Con sharding todos los momentos del lote deben ser del mismo shard
+        (la cola agrupa por shard_name).
+        """
+        with self._user_connections(rows[0]["user_id"]).transaction(immediate=True) as conn:
+            cursor = conn.cursor()
+
+            cursor.executemany("""
+                INSERT INTO interactive_moments (
+                    user_id, moment_id, emoji, text, moment_type,
+                    intensity, category, time_str, entry_date, day_number, created_at, is_active
+                ) VALUES (
+                    :user_id, :moment_id, :emoji, :text, :moment_type,
+                    :intensity, :category, :time_str, :entry_date, :day_number, :created_at, 1
+                )
+            """, rows)
+
+            for user_id, entry_date in {(row["user_id"], row["entry_date"]) for row in rows}:
+                self._refresh_day_rollups(cursor, user_id, entry_date)
+                self._invalidate_moment_cache(user_id, entry_date)
+
+        return len(rows)
+
+    @cached_query(per_day=True)
     def get_interactive_moments_today(self, user_id: int) -> List[Dict[str, Any]]:
-        """Obtener momentos activos del día actual"""
+        """Obtener momentos activos del día actual (incluye los encolados sin escribir)"""
         try:
             today = date.today().isoformat()
 
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            # Primero la cola y luego la tabla: un vaciado entre ambas lecturas
+            # deja el momento en las dos (se deduplica), nunca en ninguna
+            pending = self.moment_queue.pending_for(user_id, today)
 
-                cursor.execute("PRAGMA table_info(interactive_moments)")
-                columns = cursor.fetchall()
-                column_names = [col[1] for col in columns]
+            with self._user_connections(user_id).transaction() as conn:
+                cursor = conn.cursor()
 
-                if 'is_active' in column_names:
-                    cursor.execute("""
-                        SELECT moment_id, emoji, text, moment_type, intensity, 
-                               category, time_str, created_at
-                        FROM interactive_moments 
-                        WHERE user_id = ? AND entry_date = ? AND is_active = 1
-                        ORDER BY time_str, created_at
-                    """, (user_id, today))
-                else:
-                    cursor.execute("""
-                        SELECT moment_id, emoji, text, moment_type, intensity, 
-                               category, time_str, created_at
-                        FROM interactive_moments 
-                        WHERE user_id = ? AND entry_date = ?
-                        ORDER BY time_str, created_at
-                    """, (user_id, today))
+                cursor.execute("""
+                    SELECT moment_id, emoji, text, moment_type, intensity, 
+                           category, time_str, created_at
+                    FROM interactive_moments 
+                    WHERE user_id = ? AND entry_date = ? AND is_active = 1
+                    ORDER BY time_str, created_at
+                """, (user_id, today))
 
                 results = cursor.fetchall()
 
@@ -582,10 +1358,29 @@ class DatabaseService:
                     }
                     moments.append(moment_dict)
 
+                stored_ids = {moment['id'] for moment in moments}
+                for row in pending:
+                    if row['moment_id'] in stored_ids:
+                        continue
+                    moments.append({
+                        'id': row['moment_id'],
+                        'emoji': row['emoji'],
+                        'text': row['text'],
+                        'type': row['moment_type'],
+                        'intensity': row['intensity'],
+                        'category': row['category'],
+                        'time': row['time_str'],
+                        'created_at': row['created_at']
+                    })
+
+                if pending:
+                    moments.sort(key=lambda moment: (moment['time'], moment['created_at'] or ''))
+
                 print(f"📚 Cargados {len(moments)} momentos de hoy")
                 return moments
 
         except Exception as e:
+            mark_read_failed()
             print(f"❌ Error obteniendo momentos interactivos: {e}")
             return []
 
@@ -593,16 +1388,21 @@ class DatabaseService:
         """✅ NUEVO: Limpiar momentos del día actual"""
         try:
             today = date.today().isoformat()
+            if self.moment_queue.discard(user_id, today):
+                self._invalidate_moment_cache(user_id, today)
 
-            with sqlite3.connect(self.db_path) as conn:
+            with self._user_connections(user_id).transaction(immediate=True) as conn:
                 cursor = conn.cursor()
 
+                # Los momentos ya convertidos en entrada se conservan enlazados
                 cursor.execute("""
                     DELETE FROM interactive_moments 
-                    WHERE user_id = ? AND entry_date = ?
+                    WHERE user_id = ? AND entry_date = ? AND entry_id IS NULL
                 """, (user_id, today))
 
                 deleted_count = cursor.rowcount
+                self._refresh_day_rollups(cursor, user_id, today)
+                self._invalidate_moment_cache(user_id, today)
                 print(f"🗑️ Eliminados {deleted_count} momentos de hoy")
                 return True
 
@@ -612,55 +1412,78 @@ class DatabaseService:
 
     def create_daily_entry_from_moments(self, user_id: int, free_reflection: str = "",
                                         worth_it: Optional[bool] = None) -> Optional[int]:
-        """Crear entrada diaria desde momentos interactivos"""
+        """
+        Crear entrada diaria desde momentos interactivos
+
+        ✅ MEJORADO: Lectura de momentos, guardado de la entrada y enlace de los
+        momentos en una sola transacción: o se convierten todos o ninguno.
+        """
         try:
             print(f"🔄 Creando entrada desde momentos para usuario {user_id}")
 
-            moments = self.get_interactive_moments_today(user_id)
+            # Los momentos encolados deben estar en la tabla antes de convertirlos
+            self.flush_pending_moments(user_id)
 
-            if not moments:
-                print("⚠️ No hay momentos para convertir")
-                return None
+            today = date.today().isoformat()
+            # El borrador pasa a la entrada: sin volcados hasta olvidarlo, y solo si hay commit
+            with self.drafts.paused():
+                with self._user_connections(user_id).transaction(immediate=True) as conn:
+                    cursor = conn.cursor()
 
-            positive_tags = []
-            negative_tags = []
+                    cursor.execute("""
+                        SELECT emoji, text, moment_type, category, time_str
+                        FROM interactive_moments
+                        WHERE user_id = ? AND entry_date = ? AND is_active = 1
+                        ORDER BY time_str, created_at
+                    """, (user_id, today))
+                    moments = cursor.fetchall()
 
-            for moment in moments:
-                tag_dict = {
-                    "name": moment['text'],
-                    "context": f"Momento {moment['category']} a las {moment['time']}",
-                    "emoji": moment['emoji']
-                }
+                    if not moments:
+                        print("⚠️ No hay momentos para convertir")
+                        return None
 
-                if moment['type'] == 'positive':
-                    positive_tags.append(tag_dict)
-                else:
-                    negative_tags.append(tag_dict)
+                    positive_tags = []
+                    negative_tags = []
 
-            total_positive = len(positive_tags)
-            total_negative = len(negative_tags)
+                    for emoji, text, moment_type, category, time_str in moments:
+                        tag_dict = {
+                            "name": text,
+                            "context": f"Momento {category} a las {time_str}",
+                            "emoji": emoji
+                        }
+
+                        if moment_type == 'positive':
+                            positive_tags.append(tag_dict)
+                        else:
+                            negative_tags.append(tag_dict)
+
+                    total_positive = len(positive_tags)
+                    total_negative = len(negative_tags)
+
+                    if total_positive > total_negative:
+                        auto_mood = 7
+                    elif total_negative > total_positive:
+                        auto_mood = 4
+                    else:
+                        auto_mood = 5
 
-            if total_positive > total_negative:
-                auto_mood = 7
-            elif total_negative > total_positive:
-                auto_mood = 4
-            else:
-                auto_mood = 5
-
-            entry_id = self.save_daily_entry(
-                user_id=user_id,
-                free_reflection=free_reflection or f"Reflexión del día - {total_positive + total_negative} momentos registrados",
-                positive_tags=positive_tags,
-                negative_tags=negative_tags,
-                worth_it=worth_it,
-                mood_score=auto_mood
-            )
+                    entry_id = self._upsert_daily_entry(
+                        cursor, user_id, today,
+                        free_reflection or f"Reflexión del día - {total_positive + total_negative} momentos registrados",
+                        positive_tags, negative_tags, worth_it, auto_mood
+                    )
+
+                    # Enlazar los momentos a la entrada en lugar de borrarlos
+                    cursor.execute("""
+                        UPDATE interactive_moments
+                        SET entry_id = ?, is_active = 0
+                        WHERE user_id = ? AND entry_date = ? AND is_active = 1
+                    """, (entry_id, user_id, today))
 
-            if entry_id:
-                # Eliminar momentos después de crear la entrada
-                self.clear_interactive_moments_today(user_id)
-                print(f"✅ Entrada creada desde momentos con ID: {entry_id}")
+                    self._refresh_day_rollups(cursor, user_id, today)
+                self.drafts.forget(user_id, today)
 
+            print(f"✅ Entrada creada desde {len(moments)} momentos con ID: {entry_id}")
             return entry_id
 
         except Exception as e:
@@ -673,163 +1496,369 @@ class DatabaseService:
     def save_daily_entry(self, user_id: int, free_reflection: str,
                          positive_tags: List = None, negative_tags: List = None,
                          worth_it: Optional[bool] = None, mood_score: int = 5) -> Optional[int]:
-        """Guardar entrada diaria"""
+        """Guardar entrada diaria (crea o actualiza la del día)"""
         try:
             print(f"💾 === GUARDANDO ENTRADA DIARIA PARA USUARIO {user_id} ===")
 
-            def process_tags(tags):
-                if not tags:
-                    return []
-
-                processed = []
-                for tag in tags:
-                    if isinstance(tag, dict):
-                        processed.append({
-                            "name": tag.get('name', ''),
-                            "context": tag.get('context', ''),
-                            "emoji": tag.get('emoji', '✨')
-                        })
-                    else:
-                        processed.append({
-                            "name": str(tag),
-                            "context": '',
-                            "emoji": '✨'
-                        })
-                return processed
-
-            positive_tags_list = process_tags(positive_tags)
-            negative_tags_list = process_tags(negative_tags)
+            today = date.today().isoformat()
+            # El borrador pasa a la entrada: sin volcados hasta olvidarlo, y solo si hay commit
+            with self.drafts.paused():
+                with self._user_connections(user_id).transaction(immediate=True) as conn:
+                    cursor = conn.cursor()
+                    entry_id = self._upsert_daily_entry(cursor, user_id, today, free_reflection,
+                                                        positive_tags, negative_tags, worth_it, mood_score)
+                    self._refresh_day_rollups(cursor, user_id, today)
+                self.drafts.forget(user_id, today)
 
-            positive_tags_json = json.dumps(positive_tags_list, ensure_ascii=False)
-            negative_tags_json = json.dumps(negative_tags_list, ensure_ascii=False)
+            return entry_id
 
-            word_count = len(free_reflection.split())
+        except Exception as e:
+            print(f"❌ Error guardando entrada zen: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
 
-            if mood_score == 5:
-                total_positive = len(positive_tags_list)
-                total_negative = len(negative_tags_list)
+    def _upsert_daily_entry(self, cursor, user_id: int, entry_date: str, free_reflection: str,
+                            positive_tags: Optional[List], negative_tags: Optional[List],
+                            worth_it: Optional[bool], mood_score: int) -> int:
+        """
+        ✅ NUEVO: Crear o actualizar la entrada del día con un único INSERT … ON CONFLICT
 
-                if total_positive > total_negative:
-                    mood_score = 7 + min(2, total_positive - total_negative)
-                elif total_negative > total_positive:
-                    mood_score = 4 - min(2, total_negative - total_positive)
+        Se ejecuta dentro de la transacción del llamador; los rollups los
+        refresca el llamador una sola vez al final.
+        """
+        positive_tags_list = self._normalize_tags(positive_tags)
+        negative_tags_list = self._normalize_tags(negative_tags)
+        # Lo que aportaba la entrada anterior del día, para aplicar solo la diferencia
+        before = self._entry_contribution(cursor, user_id, entry_date)
 
-            mood_score = max(1, min(10, mood_score))
+        word_count = len(free_reflection.split())
 
-            worth_it_int = None
-            if worth_it is True:
-                worth_it_int = 1
-            elif worth_it is False:
-                worth_it_int = 0
+        if mood_score == 5:
+            total_positive = len(positive_tags_list)
+            total_negative = len(negative_tags_list)
 
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-
-                today = date.today().isoformat()
-                cursor.execute("""
-                    SELECT id FROM daily_entries 
-                    WHERE user_id = ? AND entry_date = ?
-                """, (user_id, today))
+            if total_positive > total_negative:
+                mood_score = 7 + min(2, total_positive - total_negative)
+            elif total_negative > total_positive:
+                mood_score = 4 - min(2, total_negative - total_positive)
+
+        mood_score = max(1, min(10, mood_score))
+
+        worth_it_int = None
+        if worth_it is True:
+            worth_it_int = 1
+        elif worth_it is False:
+            worth_it_int = 0
+
+        upsert_sql = """
+            INSERT INTO daily_entries (
+                user_id, free_reflection, worth_it, mood_score, word_count, entry_date, day_number
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, entry_date) DO UPDATE SET
+                free_reflection = excluded.free_reflection,
+                worth_it = excluded.worth_it,
+                mood_score = excluded.mood_score,
+                word_count = excluded.word_count,
+                archived = 0,
+                updated_at = CURRENT_TIMESTAMP
+        """
+        params = (user_id, free_reflection, worth_it_int, mood_score, word_count,
+                  entry_date, day_number(entry_date))
+
+        if self.capabilities["returning"]:
+            cursor.execute(upsert_sql + " RETURNING id", params)
+            entry_id = cursor.fetchone()[0]
+        else:
+            # SQLite < 3.35: lastrowid no es fiable en la rama UPDATE
+            cursor.execute(upsert_sql, params)
+            cursor.execute("SELECT id FROM daily_entries WHERE user_id = ? AND entry_date = ?",
+                           (user_id, entry_date))
+            entry_id = cursor.fetchone()[0]
+
+        # Si el día estaba archivado, el texto nuevo vuelve a la tabla caliente
+        cursor.execute("DELETE FROM entry_archive WHERE entry_id = ?", (entry_id,))
+        cursor.execute("DELETE FROM entry_tags WHERE entry_id = ?", (entry_id,))
+        self._insert_entry_tags(cursor, entry_id, user_id, positive_tags_list, negative_tags_list)
+        # Promoción atómica: el borrador desaparece en la misma transacción que guarda la entrada
+        cursor.execute("DELETE FROM drafts WHERE user_id = ? AND entry_date = ?", (user_id, entry_date))
+        self._update_streak_on_entry(cursor, user_id, entry_date)
+        self._apply_statistics_delta(cursor, user_id, entry_date, before, {
+            "entries_count": 1,
+            "positive_moments": len(positive_tags_list),
+            "negative_moments": len(negative_tags_list),
+            "total_words": word_count,
+            "mood_total": mood_score,
+            "mood_entries": 1,
+        }, mood_score)
+        self._invalidate_entry_cache(user_id, entry_date)
+
+        print(f"🌸 Entrada zen guardada (ID: {entry_id}, Mood: {mood_score}/10)")
+        return entry_id
 
-                existing_entry = cursor.fetchone()
+    # ===============================
+    # ✅ NUEVO: BORRADORES DE LA ENTRADA DEL DÍA (ver draft_store)
+    # ===============================
+    def _read_draft(self, user_id: int, entry_date: str) -> Optional[Dict[str, Any]]:
+        with self._user_connections(user_id).transaction() as conn:
+            row = conn.execute(
+                "SELECT reflection, tags, worth_it FROM drafts WHERE user_id = ? AND entry_date = ?",
+                (user_id, entry_date)
+            ).fetchone()
+
+        if not row:
+            return None
+        return {"reflection": row[0], "tags": json.loads(row[1]),
+                "worth_it": None if row[2] is None else bool(row[2])}
+
+    def _write_drafts(self, rows: List[Dict[str, Any]]) -> None:
+        """Volcar borradores de un mismo fichero en una transacción (lo llama DraftStore)"""
+        params = [
+            (row["user_id"], row["entry_date"], day_number(row["entry_date"]), row["reflection"],
+             json.dumps(row["tags"], ensure_ascii=False),
+             None if row["worth_it"] is None else int(row["worth_it"]))
+            for row in rows
+        ]
+        with self._user_connections(rows[0]["user_id"]).transaction(immediate=True) as conn:
+            conn.executemany("""
+                INSERT INTO drafts (user_id, entry_date, day_number, reflection, tags, worth_it)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, entry_date) DO UPDATE SET
+                    reflection = excluded.reflection,
+                    tags = excluded.tags,
+                    worth_it = excluded.worth_it,
+                    updated_at = CURRENT_TIMESTAMP
+            """, params)
+
+    def save_draft(self, user_id: int, reflection: Optional[str] = None,
+                   worth_it: Optional[bool] = None) -> bool:
+        """Guardar en diferido el texto o worth_it en curso (None = sin cambios)"""
+        try:
+            self.drafts.update(user_id, reflection=reflection, worth_it=worth_it)
+            return True
+        except Exception as e:
+            print(f"❌ Error guardando borrador: {e}")
+            return False
 
-                if existing_entry:
-                    entry_id = existing_entry[0]
-                    print(f"🔄 Actualizando entrada existente {entry_id}")
+    def save_temp_tag(self, user_id: int, tag_name: str, tag_context: str = "",
+                      tag_type: str = "positive", tag_emoji: str = "✨") -> Optional[str]:
+        """Añadir un tag al borrador de hoy; devuelve su id (el mismo si ya estaba)"""
+        try:
+            if tag_type not in ("positive", "negative"):
+                raise ValueError(f"Tipo de tag desconocido: {tag_type}")
+            return self.drafts.update(user_id, tag={
+                "name": tag_name, "context": tag_context or "", "type": tag_type, "emoji": tag_emoji or "✨"
+            })
+        except Exception as e:
+            print(f"❌ Error guardando tag temporal: {e}")
+            return None
 
-                    cursor.execute("""
-                        UPDATE daily_entries SET
-                            free_reflection = ?,
-                            positive_tags = ?,
-                            negative_tags = ?,
-                            worth_it = ?,
-                            mood_score = ?,
-                            word_count = ?,
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE id = ?
-                    """, (free_reflection, positive_tags_json, negative_tags_json,
-                          worth_it_int, mood_score, word_count, entry_id))
-                else:
-                    print(f"✨ Creando nueva entrada")
+    def get_draft(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Borrador de hoy (con los cambios aún no escritos) o None"""
+        try:
+            return self.drafts.get(user_id, date.today().isoformat())
+        except Exception as e:
+            print(f"❌ Error leyendo borrador: {e}")
+            return None
 
-                    cursor.execute("""
-                        INSERT INTO daily_entries (
-                            user_id, free_reflection, positive_tags, negative_tags,
-                            worth_it, mood_score, word_count, entry_date
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (user_id, free_reflection, positive_tags_json, negative_tags_json,
-                          worth_it_int, mood_score, word_count, today))
+    def flush_drafts(self, user_id: Optional[int] = None) -> int:
+        """Escribir ya los borradores pendientes (al salir de la pantalla)"""
+        try:
+            return self.drafts.flush(user_id)
+        except Exception as e:
+            print(f"❌ Error guardando borradores: {e}")
+            return 0
 
-                    entry_id = cursor.lastrowid
+    def discard_draft(self, user_id: int) -> bool:
+        """Tirar el borrador de hoy (memoria y tabla)"""
+        try:
+            today = date.today().isoformat()
+            self.drafts.discard(user_id, today)
+            with self._user_connections(user_id).transaction(immediate=True) as conn:
+                conn.execute("DELETE FROM drafts WHERE user_id = ? AND entry_date = ?", (user_id, today))
+            return True
+        except Exception as e:
+            print(f"❌ Error descartando borrador: {e}")
+            return False
 
-                print(f"🌸 Entrada zen guardada (ID: {entry_id}, Mood: {mood_score}/10)")
-                return entry_id
+    def get_today_entry_with_temp_tags(self, user_id: int) -> Dict[str, Any]:
+        """
+        Entrada de hoy para la pantalla de escritura: lo guardado más el borrador encima
+
+        Returns:
+            Dict con reflection, worth_it, positive_tags/negative_tags (con 'type'),
+            has_saved_entry y has_temp_tags
+        """
+        today = date.today()
+        result = {
+            "reflection": "", "worth_it": None, "positive_tags": [], "negative_tags": [],
+            "has_saved_entry": False, "has_temp_tags": False,
+        }
+        try:
+            saved = self.get_day_entry(user_id, today.year, today.month, today.day)
+            if saved:
+                result["has_saved_entry"] = True
+                result["reflection"] = saved["reflection"]
+                result["worth_it"] = saved["worth_it"]
+                for tag_type in ("positive", "negative"):
+                    result[f"{tag_type}_tags"] = [{**tag, "type": tag_type} for tag in saved[f"{tag_type}_tags"]]
+
+            draft = self.drafts.get(user_id, today.isoformat())
+            if draft:
+                if draft["reflection"]:
+                    result["reflection"] = draft["reflection"]
+                if draft["worth_it"] is not None:
+                    result["worth_it"] = draft["worth_it"]
+                for tag in draft["tags"]:
+                    tags = result[f"{tag['type']}_tags"]
+                    if not any(t["name"] == tag["name"] and t["context"] == tag["context"] for t in tags):
+                        tags.append(tag)
+                        result["has_temp_tags"] = True
+
+            return result
 
         except Exception as e:
-            print(f"❌ Error guardando entrada zen: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+            print(f"❌ Error cargando la entrada de hoy: {e}")
+            return result
 
     # ===============================
     # MÉTODOS DE CONSULTA - MANTENIDOS Y MEJORADOS
     # ===============================
-    def get_user_entries(self, user_id: int, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
-        """Obtener entradas zen del usuario"""
+    def _entry_projection(self, columns: Optional[Iterable[str]]) -> Tuple[List[str], List[str], str, str]:
+        """
+        Columnas SQL, tags pedidos, lista del SELECT y JOIN del archivo para una proyección
+
+        Las columnas SQL siempre empiezan por id y entry_date (paginación y tags).
+        """
+        requested = list(columns) if columns is not None else list(ENTRY_COLUMNS)
+        unknown = [column for column in requested if column not in ENTRY_COLUMNS]
+        if unknown:
+            raise ValueError(f"Columnas desconocidas: {', '.join(unknown)}")
+
+        want_tags = [column for column in requested if column in ("positive_tags", "negative_tags")]
+        sql_columns = ["id", "entry_date"] + [
+            column for column in requested
+            if column not in ("id", "entry_date") and column not in want_tags
+        ]
+
+        # El texto de los días archivados se lee del archivo frío solo si se pide
+        select_list = [REFLECTION_SQL if column == "free_reflection" else f"d.{column}" for column in sql_columns]
+        archive_join = ARCHIVE_JOIN_SQL if "free_reflection" in sql_columns else ""
+        return sql_columns, want_tags, ", ".join(select_list), archive_join
+
+    def _entry_rows(self, cursor, rows: List[tuple], sql_columns: List[str], want_tags: List[str],
+                    compact: bool) -> List[Any]:
+        """Filas de daily_entries como dicts o, con compact, como filas compactas (ver compact_rows)"""
+        tags_by_entry = (self._load_entry_tags(cursor, [row[0] for row in rows], raw=compact)
+                         if want_tags and rows else {})
+        tag_keys = [column.split("_")[0] for column in want_tags]
+
+        if compact:
+            if want_tags:
+                rows = [row + tuple(tags_by_entry[row[0]][key] for key in tag_keys) for row in rows]
+            return make_rows(sql_columns + want_tags, rows)
+
+        entries = []
+        for row in rows:
+            entry = dict(zip(sql_columns, row))
+            if "worth_it" in entry:
+                entry["worth_it"] = None if entry["worth_it"] is None else bool(entry["worth_it"])
+            for tag_column, key in zip(want_tags, tag_keys):
+                entry[tag_column] = tags_by_entry[entry["id"]][key]
+            entries.append(entry)
+        return entries
+
+    def iter_user_entries(self, user_id: int, before: Optional[Tuple[str, int]] = None,
+                          page_size: int = 100, columns: Optional[Iterable[str]] = None,
+                          compact: bool = False) -> Iterator[Any]:
+        """
+        ✅ NUEVO: Recorrer las entradas del usuario (más recientes primero) en memoria constante
+
+        Paginación por clave (entry_date, id) en lugar de OFFSET: cada página
+        continúa tras la última fila vista usando el índice (user_id, entry_date),
+        así que la página 1000 cuesta lo mismo que la primera. Como hay una
+        entrada por día, (entry_date, id) ya fija el mismo orden que created_at.
+
+        Args:
+            user_id: ID del usuario
+            before: (entry_date, id) de la última entrada vista; se empieza justo después
+            page_size: Filas leídas por consulta
+            columns: Proyección (ENTRY_COLUMNS); positive_tags/negative_tags solo se
+                     cargan, una consulta por página, si se piden
+            compact: Filas compactas (tupla con acceso por atributo o clave) en lugar de dicts
+
+        Yields:
+            Dict (o fila compacta) con las columnas pedidas (siempre incluye id y entry_date)
+        """
+        sql_columns, want_tags, select_list, archive_join = self._entry_projection(columns)
+
+        # Dos variantes: con "? IS NULL OR ..." SQLite no usaría el rango del índice
+        select = f"SELECT {select_list} FROM daily_entries d {archive_join} WHERE d.user_id = ?"
+        order = " ORDER BY d.entry_date DESC, d.id DESC LIMIT ?"
+        first_page_query = select + order
+        next_page_query = select + " AND (d.entry_date, d.id) < (?, ?)" + order
+
+        position = tuple(before) if before else None
+
+        while True:
+            # Una transacción corta por página: no se mantiene un snapshot abierto entre yields
+            with self._user_connections(user_id).transaction() as conn:
+                cursor = conn.cursor()
+                if position is None:
+                    cursor.execute(first_page_query, (user_id, page_size))
+                else:
+                    cursor.execute(next_page_query, (user_id, *position, page_size))
+                rows = cursor.fetchall()
+                entries = self._entry_rows(cursor, rows, sql_columns, want_tags, compact)
+
+            yield from entries
+
+            if len(rows) < page_size:
+                return
+
+            position = (rows[-1][1], rows[-1][0])
+
+    @cached_query()
+    def get_user_entries(self, user_id: int, limit: int = 20, offset: int = 0,
+                         columns: Optional[Tuple[str, ...]] = None, compact: bool = False) -> List[Any]:
+        """
+        Obtener entradas zen del usuario
+
+        ✅ NUEVO: columns (tupla de ENTRY_COLUMNS) limita lo que se lee y compact
+        devuelve filas compactas en lugar de dicts (ver compact_rows)
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            sql_columns, want_tags, select_list, archive_join = self._entry_projection(columns)
+
+            with self._user_connections(user_id).transaction() as conn:
                 cursor = conn.cursor()
 
-                cursor.execute("""
-                    SELECT id, free_reflection, positive_tags, negative_tags, worth_it,
-                           mood_score, word_count, entry_date, created_at, updated_at
-                    FROM daily_entries 
-                    WHERE user_id = ?
-                    ORDER BY entry_date DESC, created_at DESC
+                cursor.execute(f"""
+                    SELECT {select_list}
+                    FROM daily_entries d
+                    {archive_join}
+                    WHERE d.user_id = ?
+                    ORDER BY d.entry_date DESC, d.created_at DESC
                     LIMIT ? OFFSET ?
                 """, (user_id, limit, offset))
 
                 results = cursor.fetchall()
                 print(f"🔍 Encontradas {len(results)} entradas para usuario {user_id}")
 
-                entries = []
-                for row in results:
-                    try:
-                        positive_tags = json.loads(row[2] or "[]")
-                    except:
-                        positive_tags = []
-
-                    try:
-                        negative_tags = json.loads(row[3] or "[]")
-                    except:
-                        negative_tags = []
-
-                    entry = {
-                        "id": row[0],
-                        "free_reflection": row[1],
-                        "positive_tags": positive_tags,
-                        "negative_tags": negative_tags,
-                        "worth_it": None if row[4] is None else bool(row[4]),
-                        "mood_score": row[5],
-                        "word_count": row[6],
-                        "entry_date": row[7],
-                        "created_at": row[8],
-                        "updated_at": row[9]
-                    }
-                    entries.append(entry)
-
-                return entries
+                return self._entry_rows(cursor, results, sql_columns, want_tags, compact)
 
         except Exception as e:
+            mark_read_failed()
             print(f"❌ Error obteniendo entradas zen: {e}")
             return []
 
+    @cached_query(per_day=True)
     def has_submitted_today(self, user_id: int) -> bool:
         """Verificar si el usuario ya submiteó una entrada hoy"""
         try:
             today = date.today().isoformat()
 
-            with sqlite3.connect(self.db_path) as conn:
+            with self._user_connections(user_id).transaction() as conn:
                 cursor = conn.cursor()
 
                 cursor.execute("""
@@ -842,26 +1871,23 @@ class DatabaseService:
                 return count > 0
 
         except Exception as e:
+            mark_read_failed()
             print(f"❌ Error verificando entrada de hoy: {e}")
             return False
 
+    @cached_query(date_args=1)
     def get_year_summary(self, user_id: int, year: int) -> Dict[int, Dict[str, int]]:
-        """Obtener resumen de todo el año por meses"""
+        """Obtener resumen de todo el año por meses (desde monthly_rollups)"""
         try:
-            first_day = date(year, 1, 1)
-            last_day = date(year, 12, 31)
-
-            with sqlite3.connect(self.db_path) as conn:
+            with self._user_connections(user_id).transaction() as conn:
                 cursor = conn.cursor()
 
+                # Máximo 12 filas de monthly_rollups, sin importar el historial
                 cursor.execute("""
-                    SELECT entry_date, positive_tags, negative_tags
-                    FROM daily_entries 
-                    WHERE user_id = ? 
-                          AND entry_date >= ? 
-                          AND entry_date <= ?
-                    ORDER BY entry_date
-                """, (user_id, first_day.isoformat(), last_day.isoformat()))
+                    SELECT month, positive_count, negative_count, total_count
+                    FROM monthly_rollups
+                    WHERE user_id = ? AND year = ?
+                """, (user_id, year))
 
                 results = cursor.fetchall()
 
@@ -869,79 +1895,94 @@ class DatabaseService:
                 for month in range(1, 13):
                     year_data[month] = {"positive": 0, "negative": 0, "total": 0}
 
-                for row in results:
-                    entry_date_str, positive_tags_json, negative_tags_json = row
-
-                    entry_date = datetime.strptime(entry_date_str, "%Y-%m-%d").date()
-                    month = entry_date.month
-
-                    try:
-                        positive_tags = json.loads(positive_tags_json or "[]")
-                        positive_count = len(positive_tags)
-                    except:
-                        positive_count = 0
-
-                    try:
-                        negative_tags = json.loads(negative_tags_json or "[]")
-                        negative_count = len(negative_tags)
-                    except:
-                        negative_count = 0
-
-                    year_data[month]["positive"] += positive_count
-                    year_data[month]["negative"] += negative_count
-                    year_data[month]["total"] += positive_count + negative_count
+                for month, positive_count, negative_count, total_count in results:
+                    year_data[month] = {
+                        "positive": positive_count,
+                        "negative": negative_count,
+                        "total": total_count
+                    }
 
                 return year_data
 
         except Exception as e:
+            mark_read_failed()
             print(f"❌ Error obteniendo resumen del año {year}: {e}")
             year_data = {}
             for month in range(1, 13):
                 year_data[month] = {"positive": 0, "negative": 0, "total": 0}
             return year_data
 
+    @cached_query(date_args=1)
+    def get_year_heatmap(self, user_id: int, year: int) -> Dict[str, Any]:
+        """
+        ✅ NUEVO: Un hueco por día del año en arrays compactos (ver calendar_heatmap)
+
+        Una sola lectura de daily_rollups sirve las 12 tarjetas de mes y la
+        rejilla de días de cualquier mes del año.
+        """
+        first = day_number(date(year, 1, 1))
+        last = day_number(date(year, 12, 31))
+        try:
+            return self._read_heatmap(user_id, first, last)
+
+        except Exception as e:
+            mark_read_failed()
+            print(f"❌ Error obteniendo mapa de calor del año {year}: {e}")
+            return empty_heatmap(first, last)
+
+    @cached_query(per_day=True)
+    def get_history_heatmap(self, user_id: int) -> Dict[str, Any]:
+        """✅ NUEVO: Mapa de calor de todo el historial, del 1 de enero del primer año hasta el 31 de diciembre actual"""
+        last = day_number(date(date.today().year, 12, 31))
+        try:
+            with self._user_connections(user_id).transaction() as conn:
+                # Primer día por la clave primaria (user_id, entry_date)
+                row = conn.execute("""
+                    SELECT MIN(entry_date) FROM daily_rollups WHERE user_id = ? AND has_entry = 1
+                """, (user_id,)).fetchone()
+
+            first_year = int(row[0][:4]) if row and row[0] else date.today().year
+            first = day_number(date(min(first_year, date.today().year), 1, 1))
+            return self._read_heatmap(user_id, first, last)
+
+        except Exception as e:
+            mark_read_failed()
+            print(f"❌ Error obteniendo mapa de calor del historial: {e}")
+            return empty_heatmap(day_number(date(date.today().year, 1, 1)), last)
+
+    def _read_heatmap(self, user_id: int, first: int, last: int) -> Dict[str, Any]:
+        with self._user_connections(user_id).transaction() as conn:
+            rows = conn.execute(HEATMAP_ROWS_SQL, (user_id, day_from_number(first).isoformat(),
+                                                   day_from_number(last).isoformat())).fetchall()
+        return build_heatmap(rows, first, last)
+
+    @cached_query(date_args=2)
     def get_month_summary(self, user_id: int, year: int, month: int) -> Dict[int, Dict[str, Any]]:
-        """Obtener resumen de días específicos de un mes"""
+        """Obtener resumen de días específicos de un mes (desde daily_rollups)"""
         try:
-            first_day = date(year, month, 1)
-            if month == 12:
-                last_day = date(year + 1, 1, 1) - timedelta(days=1)
-            else:
-                last_day = date(year, month + 1, 1) - timedelta(days=1)
+            first_number, last_number = month_range(year, month)
 
-            with sqlite3.connect(self.db_path) as conn:
+            with self._user_connections(user_id).transaction() as conn:
                 cursor = conn.cursor()
 
+                # Máximo 31 filas de daily_rollups: rango sobre la clave primaria
+                # (user_id, entry_date) y el día del mes por resta de day_number
                 cursor.execute("""
-                    SELECT entry_date, positive_tags, negative_tags, worth_it
-                    FROM daily_entries 
+                    SELECT day_number - ? + 1 AS day,
+                           worth_it, positive_count, negative_count
+                    FROM daily_rollups
                     WHERE user_id = ? 
                           AND entry_date >= ? 
                           AND entry_date <= ?
+                          AND has_entry = 1
                     ORDER BY entry_date
-                """, (user_id, first_day.isoformat(), last_day.isoformat()))
+                """, (first_number, user_id, day_from_number(first_number).isoformat(),
+                      day_from_number(last_number).isoformat()))
 
                 results = cursor.fetchall()
                 month_data = {}
 
-                for row in results:
-                    entry_date_str, positive_tags_json, negative_tags_json, worth_it = row
-
-                    entry_date = datetime.strptime(entry_date_str, "%Y-%m-%d").date()
-                    day = entry_date.day
-
-                    try:
-                        positive_tags = json.loads(positive_tags_json or "[]")
-                        positive_count = len(positive_tags)
-                    except:
-                        positive_count = 0
-
-                    try:
-                        negative_tags = json.loads(negative_tags_json or "[]")
-                        negative_count = len(negative_tags)
-                    except:
-                        negative_count = 0
-
+                for day, worth_it, positive_count, negative_count in results:
                     worth_it_bool = None
                     if worth_it == 1:
                         worth_it_bool = True
@@ -958,24 +1999,137 @@ class DatabaseService:
                 return month_data
 
         except Exception as e:
+            mark_read_failed()
             print(f"❌ Error obteniendo resumen del mes {year}-{month}: {e}")
             return {}
 
-    def get_day_entry(self, user_id: int, year: int, month: int, day: int) -> Optional[Dict[str, Any]]:
-        """Obtener entrada completa de un día específico"""
+    @cached_query(per_day=True)
+    def get_day_bundle(self, user_id: int, day: Any) -> Dict[str, Any]:
+        """
+        ✅ NUEVO: Todo lo que muestra la pantalla de un día en una transacción de lectura
+
+        Args:
+            day: date o 'YYYY-MM-DD'
+
+        Returns:
+            Dict con date, has_entry, entry (reflection, positive_tags,
+            negative_tags, worth_it, mood_score, word_count o None), mood_score,
+            worth_it, moments (todos los del día; active = aún sin convertir en
+            entrada) y streak (racha actual y si el día forma parte de ella)
+        """
+        entry_date = day.isoformat() if isinstance(day, date) else str(day)
+        bundle = {
+            "date": entry_date,
+            "has_entry": False,
+            "entry": None,
+            "mood_score": None,
+            "worth_it": None,
+            "moments": [],
+            "streak": {"current_streak": 0, "longest_streak": 0, "last_entry_date": None, "in_streak": False},
+        }
         try:
-            entry_date = date(year, month, day).isoformat()
+            target_number = day_number(entry_date)
+            # Como en get_interactive_moments_today: la cola antes que la tabla
+            pending = self.moment_queue.pending_for(user_id, entry_date)
 
-            with sqlite3.connect(self.db_path) as conn:
+            with self._user_connections(user_id).transaction(snapshot=True) as conn:
                 cursor = conn.cursor()
 
+                cursor.execute(f"""
+                    SELECT d.id, {REFLECTION_SQL}, d.worth_it, d.mood_score, d.word_count
+                    FROM daily_entries d
+                    {ARCHIVE_JOIN_SQL}
+                    WHERE d.user_id = ? AND d.entry_date = ?
+                """, (user_id, entry_date))
+                entry_row = cursor.fetchone()
+                tags = self._load_entry_tags(cursor, [entry_row[0]])[entry_row[0]] if entry_row else None
+
                 cursor.execute("""
-                    SELECT free_reflection, positive_tags, negative_tags, 
-                           worth_it, mood_score
-                    FROM daily_entries 
+                    SELECT moment_id, emoji, text, moment_type, intensity,
+                           category, time_str, created_at, is_active
+                    FROM interactive_moments
                     WHERE user_id = ? AND entry_date = ?
-                    ORDER BY created_at DESC
+                    ORDER BY time_str, created_at
+                """, (user_id, entry_date))
+                moment_rows = cursor.fetchall()
+
+                cursor.execute("""
+                    SELECT streak_days, longest_streak, last_entry_date, last_day_number
+                    FROM user_statistics
+                    WHERE user_id = ?
+                    ORDER BY stat_date DESC
                     LIMIT 1
+                """, (user_id,))
+                streak_row = cursor.fetchone()
+
+            if entry_row:
+                entry_id, reflection, worth_it, mood_score, word_count = entry_row
+                worth_it_bool = None if worth_it is None else bool(worth_it)
+                bundle.update({
+                    "has_entry": True,
+                    "entry": {
+                        "id": entry_id,
+                        "reflection": reflection or "",
+                        "positive_tags": tags["positive"],
+                        "negative_tags": tags["negative"],
+                        "worth_it": worth_it_bool,
+                        "mood_score": mood_score or 5,
+                        "word_count": word_count or 0,
+                    },
+                    "mood_score": mood_score or 5,
+                    "worth_it": worth_it_bool,
+                })
+
+            moments = [
+                {'id': row[0], 'emoji': row[1], 'text': row[2], 'type': row[3], 'intensity': row[4],
+                 'category': row[5], 'time': row[6], 'created_at': row[7], 'active': bool(row[8])}
+                for row in moment_rows
+            ]
+            stored_ids = {moment['id'] for moment in moments}
+            for row in pending:
+                if row['moment_id'] not in stored_ids:
+                    moments.append({
+                        'id': row['moment_id'], 'emoji': row['emoji'], 'text': row['text'],
+                        'type': row['moment_type'], 'intensity': row['intensity'], 'category': row['category'],
+                        'time': row['time_str'], 'created_at': row['created_at'], 'active': True
+                    })
+            if pending:
+                moments.sort(key=lambda moment: (moment['time'], moment['created_at'] or ''))
+            bundle["moments"] = moments
+
+            if streak_row and streak_row[3] is not None:
+                streak_days, longest_streak, last_entry_date, last_day_number = streak_row
+                current_streak = self._current_streak(streak_days, last_day_number)
+                bundle["streak"] = {
+                    "current_streak": current_streak,
+                    "longest_streak": longest_streak or 0,
+                    "last_entry_date": last_entry_date,
+                    # La racha viva termina en last_day_number y dura current_streak días
+                    "in_streak": last_day_number - current_streak < target_number <= last_day_number,
+                }
+
+            return bundle
+
+        except Exception as e:
+            mark_read_failed()
+            print(f"❌ Error obteniendo el día {entry_date}: {e}")
+            return bundle
+
+    @cached_query(date_args=3, cache_none=True)
+    def get_day_entry(self, user_id: int, year: int, month: int, day: int) -> Optional[Dict[str, Any]]:
+        """Obtener entrada completa de un día específico"""
+        try:
+            entry_date = date(year, month, day).isoformat()
+
+            with self._user_connections(user_id).transaction() as conn:
+                cursor = conn.cursor()
+
+                # Lectura transparente del archivo frío si el día está archivado
+                cursor.execute(f"""
+                    SELECT d.id, {REFLECTION_SQL}, d.worth_it, d.mood_score
+                    FROM daily_entries d
+                    {ARCHIVE_JOIN_SQL}
+                    WHERE d.user_id = ? AND d.entry_date = ?
                 """, (user_id, entry_date))
 
                 result = cursor.fetchone()
@@ -983,17 +2137,10 @@ class DatabaseService:
                 if not result:
                     return None
 
-                reflection, positive_tags_json, negative_tags_json, worth_it, mood_score = result
-
-                try:
-                    positive_tags = json.loads(positive_tags_json or "[]")
-                except:
-                    positive_tags = []
-
-                try:
-                    negative_tags = json.loads(negative_tags_json or "[]")
-                except:
-                    negative_tags = []
+                entry_id, reflection, worth_it, mood_score = result
+                tags = self._load_entry_tags(cursor, [entry_id])[entry_id]
+                positive_tags = tags["positive"]
+                negative_tags = tags["negative"]
 
                 worth_it_bool = None
                 if worth_it == 1:
@@ -1010,16 +2157,224 @@ class DatabaseService:
                 }
 
         except Exception as e:
+            mark_read_failed()
             print(f"❌ Error obteniendo entrada del día {year}-{month}-{day}: {e}")
             return None
 
+    @cached_query()
     def get_entry_count(self, user_id: int) -> int:
         """Obtener total de entradas del usuario"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._user_connections(user_id).transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT COUNT(*) FROM daily_entries WHERE user_id = ?", (user_id,))
                 return cursor.fetchone()[0]
         except Exception as e:
+            mark_read_failed()
             print(f"❌ Error obteniendo contador zen: {e}")
-            return 0
\ No newline at end of file
+            return 0
+
+    # ===============================
+    # ✅ NUEVO: BÚSQUEDA DE TEXTO COMPLETO (journal_fts)
+    # ===============================
+    def _rebuild_search_index(self, cursor) -> None:
+        """Regenerar journal_fts desde cero a partir de entradas, tags y momentos pendientes"""
+        cursor.execute("DELETE FROM journal_fts")
+        cursor.execute(f"""
+            INSERT INTO journal_fts (rowid, body, owner, user_id, source, entry_id, entry_date)
+            SELECT d.id * 4, {REFLECTION_SQL}, 'u' || d.user_id, d.user_id, 'entry', d.id, d.entry_date
+            FROM daily_entries d
+            {ARCHIVE_JOIN_SQL}
+        """)
+        cursor.execute("""
+            INSERT INTO journal_fts (rowid, body, owner, user_id, source, entry_id, entry_date)
+            SELECT id * 4 + 1, name || ' ' || COALESCE(context, ''), 'u' || user_id, user_id,
+                   'tag', entry_id, NULL
+            FROM entry_tags
+        """)
+        cursor.execute("""
+            INSERT INTO journal_fts (rowid, body, owner, user_id, source, entry_id, entry_date)
+            SELECT id * 4 + 2, text, 'u' || user_id, user_id, 'moment', NULL, entry_date
+            FROM interactive_moments
+            WHERE entry_id IS NULL AND is_active = 1
+        """)
+        # Fusionar los segmentos del índice en uno solo
+        cursor.execute("INSERT INTO journal_fts (journal_fts) VALUES ('optimize')")
+
+    def rebuild_search_index(self) -> bool:
+        """✅ NUEVO: Regenerar el índice de búsqueda (p. ej. tras restaurar una copia)"""
+        if not self.capabilities["search_index"]:
+            print("⚠️ Esta base de datos no tiene índice de búsqueda (SQLite sin FTS5)")
+            return False
+
+        try:
+            for connections in self._data_connections():
+                with connections.transaction(immediate=True) as conn:
+                    self._rebuild_search_index(conn.cursor())
+
+            print("🔎 Índice de búsqueda regenerado")
+            return True
+
+        except Exception as e:
+            print(f"❌ Error regenerando índice de búsqueda: {e}")
+            return False
+
+    @staticmethod
+    def _build_fts_query(query: str) -> Optional[str]:
+        """
+        Convertir lo que escribe el usuario en una consulta FTS5 segura
+
+        Cada palabra va entre comillas (comillas, guiones o AND/OR no rompen la
+        sintaxis) y la última admite prefijo para buscar mientras se escribe.
+        """
+        words = re.findall(r"\w+", query or "")
+        if not words:
+            return None
+
+        terms = [f'"{word}"' for word in words]
+        terms[-1] += "*"
+        return " ".join(terms)
+
+    @staticmethod
+    def _owner_fts_query(user_id: int, fts_query: str) -> str:
+        """✅ NUEVO: Filtro de usuario dentro del MATCH: FTS5 solo recorre y puntúa sus documentos"""
+        return f'owner : "u{int(user_id)}" AND body : ({fts_query})'
+
+
+    def search_entries(self, user_id: int, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        ✅ NUEVO: Buscar en reflexiones, tags y momentos del usuario
+
+        Returns:
+            Lista ordenada por relevancia (bm25) con source ('entry', 'tag' o 'moment'),
+            entry_id, entry_date y snippet con las coincidencias entre [corchetes]
+        """
+        fts_query = self._build_fts_query(query)
+        if not fts_query:
+            return []
+
+        try:
+            with self._user_connections(user_id).transaction() as conn:
+                cursor = conn.cursor()
+
+                if self.capabilities["search_index"]:
+                    cursor.execute("""
+                        SELECT f.source, f.entry_id, COALESCE(f.entry_date, e.entry_date),
+                               snippet(journal_fts, 0, '[', ']', '…', 12), f.rank
+                        FROM journal_fts f
+                        LEFT JOIN daily_entries e ON e.id = f.entry_id
+                        WHERE journal_fts MATCH ?
+                        ORDER BY f.rank
+                        LIMIT ?
+                    """, (self._owner_fts_query(user_id, fts_query), limit))
+                else:
+                    # Sin FTS5: solo reflexiones y sin ranking
+                    cursor.execute(f"""
+                        SELECT 'entry', d.id, d.entry_date, substr({REFLECTION_SQL}, 1, 120), 0
+                        FROM daily_entries d
+                        {ARCHIVE_JOIN_SQL}
+                        WHERE d.user_id = ? AND {REFLECTION_SQL} LIKE ?
+                        ORDER BY d.entry_date DESC
+                        LIMIT ?
+                    """, (user_id, f"%{query.strip()}%", limit))
+
+                results = [
+                    {
+                        "source": source,
+                        "entry_id": entry_id,
+                        "entry_date": entry_date,
+                        "snippet": snippet,
+                        "rank": rank
+                    }
+                    for source, entry_id, entry_date, snippet, rank in cursor.fetchall()
+                ]
+
+            print(f"🔎 {len(results)} resultados para '{query}'")
+            return results
+
+        except Exception as e:
+            print(f"❌ Error buscando en el diario: {e}")
+            return []
+
+    # ===============================
+    # ✅ NUEVO: EXPORTACIÓN E IMPORTACIÓN (ver journal_transfer)
+    # ===============================
+    def export_user(self, user_id: int, dest_path: str, fmt: Optional[str] = None,
+                    compress: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+        """
+        ✅ NUEVO: Exportar entradas, tags, momentos y estadísticas del usuario
+
+        Args:
+            dest_path: .ndjson o .csv, con .gz para comprimir
+            fmt: "ndjson" o "csv" (por defecto según la extensión)
+
+        Returns:
+            Dict con filas exportadas y filas/s, o None si falla
+        """
+        try:
+            self._ensure_parent_directory(dest_path)
+            report = journal_transfer.export_user(self, user_id, dest_path, fmt, compress)
+            print(f"📦 Exportadas {report['total_rows']} filas a {dest_path} "
+                  f"({report['rows_per_second']} filas/s)")
+            return report
+
+        except Exception as e:
+            print(f"❌ Error exportando datos del usuario {user_id}: {e}")
+            return None
+
+    def import_user(self, source_path: str, user_id: Optional[int] = None,
+                    fmt: Optional[str] = None, batch_size: int = 1000) -> Optional[Dict[str, Any]]:
+        """
+        ✅ NUEVO: Importar un fichero exportado (en user_id o en la cuenta con el mismo email)
+
+        Returns:
+            Dict con filas importadas, entradas descartadas (días ya existentes) y filas/s
+        """
+        try:
+            report = journal_transfer.import_user(self, source_path, user_id, fmt, batch_size)
+            print(f"📥 Importadas {report['total_rows']} filas en {report['seconds']} s "
+                  f"({report['rows_per_second']} filas/s, {report['skipped_entries']} días ya existentes)")
+            return report
+
+        except Exception as e:
+            print(f"❌ Error importando {source_path}: {e}")
+            return None
+
+    # ===============================
+    # ✅ NUEVO: ARCHIVO EN FRÍO (ver entry_archive)
+    # ===============================
+    def archive_old_entries(self, older_than_days: int = DEFAULT_ARCHIVE_HORIZON_DAYS,
+                            user_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        ✅ NUEVO: Comprimir el texto de las entradas anteriores al horizonte
+
+        La fila de daily_entries se conserva (rollups, rachas y estadísticas no
+        cambian) y get_day_entry lee el texto del archivo de forma transparente.
+
+        Returns:
+            Dict con entradas archivadas y bytes de texto antes/después, o None si falla
+        """
+        try:
+            report = {"archived": 0, "text_bytes": 0, "compressed_bytes": 0,
+                      "cutoff": (date.today() - timedelta(days=older_than_days)).isoformat()}
+
+            # Con sharding, una transacción por shard
+            for connections in self._data_connections(user_id):
+                with connections.transaction(immediate=True) as conn:
+                    shard_report = archive_entries(conn.cursor(), older_than_days, user_id)
+                for key in ("archived", "text_bytes", "compressed_bytes"):
+                    report[key] += shard_report[key]
+
+            # Las lecturas cacheadas no cambian de contenido, pero se liberan las copias del texto
+            if user_id is None:
+                self.query_cache.clear()
+            else:
+                self.query_cache.invalidate_user(user_id)
+
+            print(f"🧊 {report['archived']} entradas archivadas (anteriores a {report['cutoff']}): "
+                  f"{report['text_bytes']} → {report['compressed_bytes']} bytes de texto")
+            return report
+
+        except Exception as e:
+            print(f"❌ Error archivando entradas: {e}")
+            return None
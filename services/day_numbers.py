@@ -0,0 +1,35 @@
+"""
+📅 Números de día - ReflectApp
+✅ NUEVO: Cada fecha también se guarda como entero (días desde 1970-01-01) en day_number
+✅ NUEVO: Rangos, huecos de racha y días del calendario con aritmética entera, sin parsear texto
+"""
+
+from datetime import date
+from typing import Tuple, Union
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# La misma conversión en SQL: julianday('1970-01-01') = 2440587.5
+DAY_NUMBER_SQL = "CAST(julianday({column}) - 2440587.5 AS INTEGER)"
+
+
+def day_number(value: Union[date, str]) -> int:
+    """date o 'YYYY-MM-DD' → días desde 1970-01-01 (solo al escribir)"""
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def day_from_number(number: int) -> date:
+    return date.fromordinal(number + EPOCH_ORDINAL)
+
+
+def today_number() -> int:
+    return date.today().toordinal() - EPOCH_ORDINAL
+
+
+def month_range(year: int, month: int) -> Tuple[int, int]:
+    """Primer y último day_number del mes"""
+    first = date(year, month, 1).toordinal() - EPOCH_ORDINAL
+    following = date(year + month // 12, month % 12 + 1, 1).toordinal() - EPOCH_ORDINAL
+    return first, following - 1
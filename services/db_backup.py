@@ -0,0 +1,270 @@
+"""
+💾 Copias de seguridad en caliente - ReflectApp
+✅ NUEVO: sqlite3.Connection.backup por tramos de páginas: la base de datos sigue usable durante la copia
+✅ NUEVO: Programadas en reposo (sin transacciones durante un rato) cada BACKUP_INTERVAL_HOURS
+✅ NUEVO: Rotación de copias (la más reciente en BACKUP_DATABASE_PATH, las anteriores .1, .2, ...)
+✅ NUEVO: Cada copia se verifica con PRAGMA integrity_check en el hilo de copias antes de rotar
+✅ NUEVO: Informe de rendimiento (MB/s) y de bloqueo (tiempo con la base de datos leída por la copia)
+
+Uso:
+    backups = BackupService(db, "data/reflect_zen_backup.db")
+    backups.start()          # programadas en reposo
+    backups.backup_now()     # ahora, en el hilo que llama
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+DEFAULT_KEEP = 5
+DEFAULT_INTERVAL_HOURS = 24
+DEFAULT_IDLE_SECONDS = 30
+DEFAULT_PAGES_PER_STEP = 256
+DEFAULT_STEP_PAUSE_MS = 5
+# Reinicios tolerados (la fuente cambió entre tramos) antes de copiar de una vez
+DEFAULT_MAX_RESTARTS = 3
+# Cada cuánto mira el programador si toca copia
+CHECK_INTERVAL_SECONDS = 60
+
+
+class BackupRestarted(Exception):
+    """Demasiados reinicios de la copia por tramos"""
+
+
+def rotated_path(path: str, generation: int) -> str:
+    """data/x.db → data/x.db (0), data/x.1.db (1), data/x.2.db (2), ..."""
+    if generation == 0:
+        return path
+    base, extension = os.path.splitext(path)
+    return f"{base}.{generation}{extension}"
+
+
+def verify_database(path: str) -> List[str]:
+    """Resultado de PRAGMA integrity_check (["ok"] si la copia está sana)"""
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute("PRAGMA integrity_check").fetchall()]
+    finally:
+        conn.close()
+
+
+class BackupService:
+    """Copias verificadas y rotadas de todos los ficheros de un DatabaseService"""
+
+    def __init__(self, db_service, backup_path: str, keep: int = DEFAULT_KEEP,
+                 interval_hours: float = DEFAULT_INTERVAL_HOURS, idle_seconds: float = DEFAULT_IDLE_SECONDS,
+                 pages_per_step: int = DEFAULT_PAGES_PER_STEP, step_pause_ms: float = DEFAULT_STEP_PAUSE_MS,
+                 max_restarts: int = DEFAULT_MAX_RESTARTS):
+        self.db_service = db_service
+        self.backup_path = backup_path
+        self.keep = max(1, keep)
+        self.interval = interval_hours * 3600
+        self.idle_seconds = idle_seconds
+        self.pages_per_step = pages_per_step
+        self.step_pause = step_pause_ms / 1000
+        self.max_restarts = max_restarts
+
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._scheduler_thread = None
+        self.is_running = False
+
+        self.last_report: Optional[Dict[str, Any]] = None
+        self.backups = 0
+        self.failures = 0
+
+    # ===============================
+    # DESTINOS
+    # ===============================
+    def destination_for(self, source_path: str) -> str:
+        """El fichero principal va a backup_path; los shards, a shards/ junto a él"""
+        if os.path.abspath(source_path) == os.path.abspath(self.db_service.db_path):
+            return self.backup_path
+        return os.path.join(os.path.dirname(self.backup_path) or ".", "shards", os.path.basename(source_path))
+
+    def snapshots(self) -> List[str]:
+        """Copias del fichero principal que existen, de la más reciente a la más antigua"""
+        paths = [rotated_path(self.backup_path, generation) for generation in range(self.keep)]
+        return [path for path in paths if os.path.exists(path)]
+
+    def seconds_since_backup(self) -> Optional[float]:
+        """Antigüedad de la última copia (por la fecha del fichero: sobrevive a reinicios)"""
+        if not os.path.exists(self.backup_path):
+            return None
+        return time.time() - os.path.getmtime(self.backup_path)
+
+    # ===============================
+    # COPIA
+    # ===============================
+    def backup_now(self) -> Dict[str, Any]:
+        """
+        Copiar, verificar y rotar todos los ficheros de la base de datos
+
+        Returns:
+            Dict con ok, ficheros, bytes, segundos, MB/s y tiempo de bloqueo
+            (suma y máximo de los tramos en que la copia lee la base de datos)
+        """
+        with self._run_lock:
+            started = time.perf_counter()
+            files = [self._backup_file(path) for path in self.db_service.database_files()]
+
+            seconds = time.perf_counter() - started
+            total_bytes = sum(item["bytes"] for item in files)
+            report = {
+                "at": datetime.now().isoformat(timespec="seconds"),
+                "ok": all(item["ok"] for item in files),
+                "files": files,
+                "bytes": total_bytes,
+                "seconds": round(seconds, 3),
+                "mb_per_second": round(total_bytes / (1024 * 1024) / seconds, 2) if seconds else None,
+                "stall_ms": round(sum(item["stall_ms"] for item in files), 3),
+                "max_stall_ms": max((item["max_stall_ms"] for item in files), default=0.0),
+            }
+
+            with self._lock:
+                self.last_report = report
+                if report["ok"]:
+                    self.backups += 1
+                else:
+                    self.failures += 1
+
+            if report["ok"]:
+                print(f"💾 Copia de seguridad: {len(files)} ficheros, {total_bytes / 1024:.0f} KB "
+                      f"en {seconds:.2f} s (bloqueo máx. {report['max_stall_ms']:.1f} ms)")
+            else:
+                print(f"❌ Copia de seguridad fallida: {[item['error'] for item in files if not item['ok']]}")
+            return report
+
+    def _backup_file(self, source_path: str) -> Dict[str, Any]:
+        destination = self.destination_for(source_path)
+        temporary = destination + ".tmp"
+        result = {"source": source_path, "destination": destination, "ok": False, "error": None,
+                  "bytes": 0, "pages": 0, "steps": 0, "restarts": 0, "stall_ms": 0.0, "max_stall_ms": 0.0}
+
+        try:
+            os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+            self._copy(source_path, temporary, result)
+
+            # Verificación en este hilo (el de copias), antes de sustituir ninguna copia buena
+            problems = verify_database(temporary)
+            if problems != ["ok"]:
+                raise sqlite3.DatabaseError(f"integrity_check: {'; '.join(problems[:5])}")
+
+            result["bytes"] = os.path.getsize(temporary)
+            self._rotate(destination, temporary)
+            result["ok"] = True
+
+        except Exception as e:
+            result["error"] = str(e)
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+        result["stall_ms"] = round(result["stall_ms"], 3)
+        result["max_stall_ms"] = round(result["max_stall_ms"], 3)
+        return result
+
+    def _copy(self, source_path: str, destination: str, result: Dict[str, Any]) -> None:
+        """
+        Copia por tramos de pages_per_step páginas con una pausa entre tramos
+
+        SQLite solo lee la fuente durante cada tramo; si otra conexión la
+        modifica entre tramos, la copia vuelve a empezar. Tras max_restarts
+        reinicios se copia de una vez (en WAL no bloquea a los escritores).
+        """
+        # Conexiones propias: no cuentan como actividad del servicio ni usan la instrumentación
+        source = sqlite3.connect(source_path, timeout=30)
+        target = sqlite3.connect(destination)
+        state = {"last": time.perf_counter(), "remaining": None}
+
+        def progress(status, remaining, total):
+            step_ms = (time.perf_counter() - state["last"]) * 1000
+            result["steps"] += 1
+            result["pages"] = total
+            result["stall_ms"] += step_ms
+            result["max_stall_ms"] = max(result["max_stall_ms"], step_ms)
+
+            if state["remaining"] is not None and remaining > state["remaining"]:
+                result["restarts"] += 1
+                if result["restarts"] > self.max_restarts:
+                    raise BackupRestarted()
+            state["remaining"] = remaining
+
+            # Pausa fuera de la lectura: los escritores avanzan entre tramos
+            if remaining and self.step_pause:
+                time.sleep(self.step_pause)
+            state["last"] = time.perf_counter()
+
+        try:
+            try:
+                source.backup(target, pages=self.pages_per_step, progress=progress)
+            except BackupRestarted:
+                print(f"⚠️ {os.path.basename(source_path)} cambia durante la copia: se copia de una vez")
+                state["last"], state["remaining"] = time.perf_counter(), None
+                source.backup(target, pages=-1, progress=progress)
+            # La copia hereda el modo WAL: un solo fichero, sin -wal/-shm que se separen al rotar
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+            source.close()
+
+    def _rotate(self, destination: str, temporary: str) -> None:
+        """destination.(keep-2) → .(keep-1), ..., destination → .1, temporal → destination"""
+        for generation in range(self.keep - 1, 0, -1):
+            older = rotated_path(destination, generation - 1)
+            if os.path.exists(older):
+                os.replace(older, rotated_path(destination, generation))
+        os.replace(temporary, destination)
+
+    # ===============================
+    # PROGRAMADOR
+    # ===============================
+    def is_due(self) -> bool:
+        age = self.seconds_since_backup()
+        return age is None or age >= self.interval
+
+    def start(self) -> None:
+        """Arrancar el hilo que hace la copia cuando toca y la base de datos está en reposo"""
+        with self._lock:
+            if self.is_running:
+                return
+            self.is_running = True
+
+        def run_scheduler():
+            while self.is_running:
+                self._wakeup.wait(CHECK_INTERVAL_SECONDS)
+                self._wakeup.clear()
+                if not self.is_running:
+                    return
+                try:
+                    if self.is_due() and self.db_service.idle_seconds() >= self.idle_seconds:
+                        self.backup_now()
+                except Exception as e:
+                    print(f"❌ Error en el programador de copias: {e}")
+
+        self._scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
+        self._scheduler_thread.start()
+        print(f"💾 Copias de seguridad programadas cada {self.interval / 3600:g} h en {self.backup_path}")
+
+    def stop(self) -> None:
+        self.is_running = False
+        self._wakeup.set()
+        if self._scheduler_thread:
+            self._scheduler_thread.join(timeout=2)
+            self._scheduler_thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backups": self.backups,
+                "failures": self.failures,
+                "snapshots": self.snapshots(),
+                "seconds_since_backup": self.seconds_since_backup(),
+                "last_report": self.last_report,
+            }
@@ -0,0 +1,262 @@
+"""
+🔌 Gestor de Conexiones SQLite - ReflectApp
+✅ NUEVO: Conexiones persistentes por hilo (sin sqlite3.connect en cada llamada)
+✅ NUEVO: Modo WAL para que las escrituras no bloqueen a los lectores
+✅ NUEVO: Perfiles "mobile" y "server" con pragmas ajustados una sola vez al abrir
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Optional
+
+# ===============================
+# PERFILES DE CONEXIÓN
+# ===============================
+DB_PROFILES: Dict[str, Dict[str, Any]] = {
+    # 📱 Un solo usuario, poca memoria y batería: caché pequeña y mmap moderado
+    "mobile": {
+        "journal_mode": "WAL",
+        # Solo cuenta al crear el fichero; db_maintenance devuelve el espacio libre por tramos
+        "auto_vacuum": "INCREMENTAL",
+        "synchronous": "NORMAL",
+        "busy_timeout_ms": 5000,
+        "cache_size_kb": 2048,
+        "mmap_size": 16 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 1000,
+        "query_cache_kb": 1024,
+        "reader_threads": 2,
+        "writer_threads": 1,
+    },
+    # 🌐 Modo web (mobile_app.py en 0.0.0.0:8080): muchos usuarios concurrentes
+    "server": {
+        "journal_mode": "WAL",
+        # Solo cuenta al crear el fichero; db_maintenance devuelve el espacio libre por tramos
+        "auto_vacuum": "INCREMENTAL",
+        "synchronous": "NORMAL",
+        "busy_timeout_ms": 15000,
+        "cache_size_kb": 32768,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 4000,
+        "query_cache_kb": 16384,
+        "reader_threads": 4,
+        # Solo con sharding: un escritor por grupo de shards
+        "writer_threads": 4,
+    },
+}
+
+DEFAULT_PROFILE = "mobile"
+
+# Hilos marcados con background_work(): sus transacciones no cuentan como actividad
+_background = threading.local()
+
+
+@contextmanager
+def background_work():
+    """Las transacciones del hilo dentro del bloque no reinician idle_seconds() (mantenimiento)"""
+    previous = getattr(_background, "active", False)
+    _background.active = True
+    try:
+        yield
+    finally:
+        _background.active = previous
+
+
+class ConnectionManager:
+    """Conexiones SQLite de larga duración, una por hilo, con pragmas aplicados al abrir"""
+
+    def __init__(self, db_path: str, profile: str = DEFAULT_PROFILE,
+                 on_open: Optional[Callable[[sqlite3.Connection], None]] = None,
+                 factory: Optional[type] = None):
+        if profile not in DB_PROFILES:
+            raise ValueError(f"Perfil de base de datos desconocido: {profile}")
+
+        self.db_path = db_path
+        self.profile = profile
+        self.settings = DB_PROFILES[profile]
+        # Se llama con cada conexión nueva (p. ej. para registrar funciones SQL)
+        self.on_open = on_open
+        # Clase de conexión (p. ej. la instrumentada de db_instrumentation)
+        self.factory = factory or sqlite3.Connection
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: Dict[int, sqlite3.Connection] = {}
+        self._generation = 0
+        self.opened_connections = 0
+        # Transacciones externas en curso (un shard ocupado no se cierra por LRU)
+        self.active_transactions = 0
+        # time.monotonic() del final de la última transacción (tareas en segundo plano en reposo);
+        # 0 = ninguna todavía (abrir un shard no es actividad)
+        self.last_activity = 0.0
+
+    # ===============================
+    # APERTURA Y CIERRE
+    # ===============================
+    def _open(self) -> sqlite3.Connection:
+        """Abrir conexión nueva y aplicar los pragmas del perfil"""
+        settings = self.settings
+
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=settings["busy_timeout_ms"] / 1000,
+            check_same_thread=False,
+            factory=self.factory
+        )
+
+        # Antes que nada: en un fichero nuevo solo tiene efecto si aún no hay tablas
+        conn.execute(f"PRAGMA auto_vacuum = {settings['auto_vacuum']}")
+        conn.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+        conn.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout_ms'])}")
+        # Valor negativo = tamaño en KiB en lugar de páginas
+        conn.execute(f"PRAGMA cache_size = -{int(settings['cache_size_kb'])}")
+        conn.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+        conn.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+        conn.execute(f"PRAGMA wal_autocheckpoint = {int(settings['wal_autocheckpoint'])}")
+
+        if self.on_open:
+            self.on_open(conn)
+
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """Obtener la conexión del hilo actual (se abre la primera vez)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.generation == self._generation:
+            return conn
+
+        conn = self._open()
+        self._local.conn = conn
+        self._local.depth = 0
+        self._local.after_commit = []
+        self._local.generation = self._generation
+
+        with self._lock:
+            self._prune_dead_threads()
+            self._connections[threading.get_ident()] = conn
+            self.opened_connections += 1
+
+        return conn
+
+    def _prune_dead_threads(self) -> None:
+        """Cerrar conexiones de hilos que ya terminaron (llamar con el lock tomado)"""
+        alive = {thread.ident for thread in threading.enumerate()}
+        for ident in list(self._connections):
+            if ident not in alive:
+                try:
+                    self._connections.pop(ident).close()
+                except Exception:
+                    pass
+
+    def close_all(self) -> None:
+        """Cerrar todas las conexiones abiertas (al salir de la app)"""
+        with self._lock:
+            for conn in self._connections.values():
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections.clear()
+            # Las conexiones guardadas en cada hilo quedan invalidadas
+            self._generation += 1
+
+    # ===============================
+    # TRANSACCIONES
+    # ===============================
+    @contextmanager
+    def transaction(self, immediate: bool = False, snapshot: bool = False):
+        """
+        Transacción reentrante sobre la conexión del hilo
+
+        Args:
+            immediate: Si True, toma el lock de escritura al empezar (BEGIN IMMEDIATE)
+                       para que el busy_timeout actúe en lugar de fallar al escribir
+            snapshot: Si True, abre un BEGIN explícito para que varias SELECT vean
+                      la misma foto de la base de datos (sqlite3 no lo hace solo en lecturas)
+
+        Solo el nivel más externo hace commit o rollback, así los métodos que
+        se llaman entre sí comparten una única transacción.
+        """
+        conn = self.connection()
+        outermost = self._local.depth == 0
+
+        if outermost and not conn.in_transaction:
+            if immediate:
+                conn.execute("BEGIN IMMEDIATE")
+            elif snapshot:
+                conn.execute("BEGIN")
+
+        if outermost:
+            with self._lock:
+                self.active_transactions += 1
+
+        self._local.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth -= 1
+            if outermost:
+                self._local.after_commit = []
+                self._end_transaction()
+                if conn.in_transaction:
+                    conn.rollback()
+            raise
+        else:
+            self._local.depth -= 1
+            if outermost:
+                try:
+                    if conn.in_transaction:
+                        conn.commit()
+                finally:
+                    self._end_transaction()
+                self._run_after_commit()
+
+    def _end_transaction(self) -> None:
+        with self._lock:
+            self.active_transactions -= 1
+            if not getattr(_background, "active", False):
+                self.last_activity = time.monotonic()
+
+    def idle_seconds(self) -> float:
+        """Segundos desde la última transacción (0 si hay alguna en curso)"""
+        with self._lock:
+            if self.active_transactions:
+                return 0.0
+            return time.monotonic() - self.last_activity
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Ejecutar `callback` cuando la transacción más externa del hilo haga commit
+
+        Si hay rollback se descarta; fuera de una transacción se ejecuta ya.
+        """
+        self.connection()
+        if self._local.depth == 0:
+            callback()
+        else:
+            self._local.after_commit.append(callback)
+
+    def _run_after_commit(self) -> None:
+        """Ejecutar (y vaciar) los callbacks pendientes del hilo"""
+        callbacks, self._local.after_commit = self._local.after_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⚠️ Error en callback tras commit: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado del gestor de conexiones"""
+        with self._lock:
+            open_now = len(self._connections)
+
+        return {
+            "profile": self.profile,
+            "open_connections": open_now,
+            "opened_connections": self.opened_connections,
+        }
+
@@ -0,0 +1,291 @@
+"""
+🔬 Instrumentación de consultas - ReflectApp
+✅ NUEVO: Duración, filas y método de DatabaseService de cada sentencia SQL
+✅ NUEVO: Registro de consultas lentas con EXPLAIN QUERY PLAN y aviso de tablas recorridas enteras
+✅ NUEVO: Estadísticas agregadas por método (qué acciones de pantalla son caras)
+
+Se activa al crear el servicio (sin instrumentación no se usa ninguna clase de aquí):
+    db = DatabaseService(slow_query_ms=50)
+    db.get_query_stats()     → {"get_user_entries": {"statements": 12, "total_ms": 8.1, ...}}
+    db.get_slow_queries()    → [{"method": ..., "sql": ..., "ms": ..., "plan": [...]}]
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+DEFAULT_SLOW_QUERY_MS = 50.0
+DEFAULT_SLOW_LOG_SIZE = 200
+
+SERVICE_FILE = "database_service.py"
+# Sentencias con plan de consulta que merece la pena capturar
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def calling_method() -> str:
+    """
+    Método de DatabaseService que originó la sentencia
+
+    El más externo de la pila: get_user_entries y no el helper privado que
+    ejecuta el SQL. Fuera del servicio (migraciones, scripts), la función
+    que llamó a la conexión.
+    """
+    method, caller = None, None
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        filename = os.path.basename(code.co_filename)
+        if filename == SERVICE_FILE:
+            method = code.co_name
+        elif caller is None and filename not in ("db_instrumentation.py", "db_connection_manager.py",
+                                                 "contextlib.py"):
+            caller = code.co_name
+        frame = frame.f_back
+    return method or caller or "?"
+
+
+def full_scan_tables(plan: List[str], tables: set) -> List[str]:
+    """Tablas reales recorridas sin índice ("SCAN tabla" sin "USING ...")"""
+    scanned = []
+    for detail in plan:
+        words = detail.split()
+        if len(words) >= 2 and words[0] == "SCAN" and "USING" not in words and words[1] in tables:
+            scanned.append(words[1])
+    return scanned
+
+
+class QueryInstrumentation:
+    """Métricas de las sentencias de todas las conexiones de un servicio"""
+
+    def __init__(self, slow_query_ms: float = DEFAULT_SLOW_QUERY_MS, explain_slow: bool = True,
+                 slow_log_size: int = DEFAULT_SLOW_LOG_SIZE):
+        self.slow_query_ms = slow_query_ms
+        self.explain_slow = explain_slow
+        # Se puede apagar en caliente; las conexiones ya abiertas siguen con la clase instrumentada
+        self.enabled = True
+
+        self._lock = threading.Lock()
+        self._methods: Dict[str, Dict[str, Any]] = {}
+        self._slow: deque = deque(maxlen=slow_log_size)
+
+        # Clases propias de esta instancia: sqlite3.connect(factory=...) no admite argumentos
+        cursor_class = type("Cursor", (InstrumentedCursor,), {"instrumentation": self})
+        self.connection_factory = type("Connection", (InstrumentedConnection,), {"cursor_class": cursor_class})
+
+    # ===============================
+    # REGISTRO
+    # ===============================
+    def record(self, conn: sqlite3.Connection, method: str, sql: str, parameters: Any,
+               seconds: float, rows: int) -> None:
+        ms = seconds * 1000
+        slow = ms >= self.slow_query_ms
+
+        with self._lock:
+            stats = self._methods.get(method)
+            if stats is None:
+                stats = self._methods[method] = {
+                    "statements": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0,
+                    "slow": 0, "full_scans": 0, "slowest_sql": None,
+                }
+            stats["statements"] += 1
+            stats["total_ms"] += ms
+            stats["rows"] += rows
+            if ms > stats["max_ms"]:
+                stats["max_ms"] = ms
+                stats["slowest_sql"] = " ".join(sql.split())
+            if slow:
+                stats["slow"] += 1
+
+        if slow:
+            self._log_slow(conn, method, sql, parameters, ms, rows)
+
+    def _log_slow(self, conn: sqlite3.Connection, method: str, sql: str, parameters: Any,
+                  ms: float, rows: int) -> None:
+        plan, scanned = [], []
+        if self.explain_slow and parameters is not None and sql.lstrip().upper().startswith(EXPLAINABLE):
+            plan, scanned = self._explain(conn, sql, parameters)
+
+        entry = {
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "method": method,
+            "sql": " ".join(sql.split()),
+            "ms": round(ms, 3),
+            "rows": rows,
+            "plan": plan,
+            "full_scan_tables": scanned,
+        }
+        with self._lock:
+            self._slow.append(entry)
+            if scanned and method in self._methods:
+                self._methods[method]["full_scans"] += 1
+
+        print(f"🐢 Consulta lenta en {method}: {ms:.1f} ms, {rows} filas")
+        if scanned:
+            print(f"   ⚠️ Recorre la tabla entera: {', '.join(scanned)}")
+
+    @staticmethod
+    def _explain(conn: sqlite3.Connection, sql: str, parameters: Any):
+        """EXPLAIN QUERY PLAN con un cursor normal (no se vuelve a instrumentar)"""
+        try:
+            cursor = sqlite3.Cursor(conn)
+            plan = [row[3] for row in cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()]
+            tables = {row[0] for row in cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            ).fetchall()}
+            cursor.close()
+            return plan, full_scan_tables(plan, tables)
+        except Exception as e:
+            return [f"(sin plan: {e})"], []
+
+    # ===============================
+    # CONSULTA
+    # ===============================
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Estadísticas por método, de más a menos tiempo total"""
+        with self._lock:
+            methods = [(name, dict(stats)) for name, stats in self._methods.items()]
+
+        result = {}
+        for name, stats in sorted(methods, key=lambda item: item[1]["total_ms"], reverse=True):
+            stats["mean_ms"] = round(stats["total_ms"] / stats["statements"], 3)
+            stats["total_ms"] = round(stats["total_ms"], 3)
+            stats["max_ms"] = round(stats["max_ms"], 3)
+            result[name] = stats
+        return result
+
+    def get_slow_queries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Consultas lentas, las más recientes primero"""
+        with self._lock:
+            entries = list(reversed(self._slow))
+        return entries[:limit] if limit else entries
+
+    def reset(self) -> None:
+        with self._lock:
+            self._methods.clear()
+            self._slow.clear()
+
+
+# ===============================
+# CONEXIÓN Y CURSOR INSTRUMENTADOS
+# ===============================
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Mide execute y las lecturas posteriores de la misma sentencia
+
+    SQLite ejecuta paso a paso al leer, así que la sentencia se registra al
+    agotar las filas, al ejecutar otra o al liberar el cursor.
+    """
+    instrumentation: QueryInstrumentation = None
+
+    _pending = None
+
+    def _finish(self) -> None:
+        pending = self._pending
+        if pending is None:
+            return
+        self._pending = None
+        method, sql, parameters, seconds, rows = pending
+        if not rows and self.rowcount > 0:
+            rows = self.rowcount
+        self.instrumentation.record(self.connection, method, sql, parameters, seconds, rows)
+
+    def _run(self, run, sql: str, parameters: Any):
+        self._finish()
+        if not self.instrumentation.enabled:
+            return run()
+        method = calling_method()
+        start = time.perf_counter()
+        try:
+            return run()
+        finally:
+            self._pending = [method, sql, parameters, time.perf_counter() - start, 0]
+
+    def _read(self, read, many: bool):
+        pending = self._pending
+        if pending is None:
+            return read()
+        start = time.perf_counter()
+        result = read()
+        pending[3] += time.perf_counter() - start
+        if many:
+            pending[4] += len(result)
+            if not result:
+                self._finish()
+        elif result is None:
+            self._finish()
+        else:
+            pending[4] += 1
+        return result
+
+    def execute(self, sql, parameters=()):
+        return self._run(lambda: super(InstrumentedCursor, self).execute(sql, parameters), sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        # Sin parámetros no se puede pedir el plan
+        return self._run(lambda: super(InstrumentedCursor, self).executemany(sql, seq_of_parameters), sql, None)
+
+    def executescript(self, sql_script):
+        return self._run(lambda: super(InstrumentedCursor, self).executescript(sql_script), sql_script, None)
+
+    def fetchone(self):
+        return self._read(super().fetchone, many=False)
+
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self.arraysize
+        result = self._read(lambda: super(InstrumentedCursor, self).fetchmany(size), many=True)
+        if self._pending is not None and len(result) < size:
+            self._finish()
+        return result
+
+    def fetchall(self):
+        result = self._read(super().fetchall, many=True)
+        self._finish()
+        return result
+
+    def __next__(self):
+        pending = self._pending
+        if pending is None:
+            return super().__next__()
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            pending[3] += time.perf_counter() - start
+            self._finish()
+            raise
+        pending[3] += time.perf_counter() - start
+        pending[4] += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Conexión cuyos cursores (también los de conn.execute) son instrumentados"""
+    cursor_class = InstrumentedCursor
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or self.cursor_class)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
@@ -0,0 +1,333 @@
+"""
+🧹 Mantenimiento en reposo - ReflectApp
+✅ NUEVO: ANALYZE + PRAGMA optimize, checkpoint PASSIVE del WAL, incremental_vacuum y purga de momentos borrados
+✅ NUEVO: Solo con la app en reposo (sin cambios de pantalla ni transacciones durante un rato)
+✅ NUEVO: Por tramos cortos; entre tramo y tramo se vuelve a mirar si el usuario ha hecho algo
+✅ NUEVO: Registro de lo que tarda cada tarea y de lo que libera
+
+Uso:
+    maintenance = MaintenanceService(db)
+    maintenance.start()      # programado en reposo
+    maintenance.touch()      # actividad de la interfaz (cambio de pantalla)
+    maintenance.run_now()    # todas las tareas ahora, en el hilo que llama
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .db_connection_manager import background_work
+
+DEFAULT_IDLE_SECONDS = 60
+DEFAULT_INTERVAL_HOURS = 24
+# Cada cuánto mira el programador si toca mantenimiento
+CHECK_INTERVAL_SECONDS = 15
+PURGE_BATCH = 500
+VACUUM_PAGES_PER_SLICE = 256
+# Filas por índice que lee ANALYZE (estadísticas aproximadas, coste acotado)
+ANALYSIS_LIMIT = 400
+# Pausa entre tramos para que una escritura del usuario tome el lock
+SLICE_PAUSE_MS = 10
+
+# Orden de las tareas: la purga y el vacuum escriben en el WAL antes del checkpoint
+JOBS = ("purge_moments", "analyze", "incremental_vacuum", "checkpoint")
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+# ===============================
+# TAREAS (UN TRAMO CADA LLAMADA)
+# ===============================
+def purge_deleted_moments(cursor, batch: int = PURGE_BATCH) -> List[Tuple[int, str]]:
+    """
+    Borrar momentos desactivados que no llegaron a ninguna entrada
+
+    Solo días pasados sin entrada: las versiones antiguas desactivaban los
+    momentos convertidos sin enlazarlos, y esos siguen siendo el historial
+    del día (get_day_bundle).
+
+    Returns:
+        (user_id, entry_date) de cada momento borrado
+    """
+    cursor.execute("""
+        SELECT m.id, m.user_id, m.entry_date
+        FROM interactive_moments m
+        WHERE m.entry_id IS NULL AND m.is_active = 0 AND m.entry_date < ?
+          AND NOT EXISTS (
+              SELECT 1 FROM daily_entries d
+              WHERE d.user_id = m.user_id AND d.entry_date = m.entry_date
+          )
+        LIMIT ?
+    """, (date.today().isoformat(), batch))
+    rows = cursor.fetchall()
+    cursor.executemany("DELETE FROM interactive_moments WHERE id = ?", [(row[0],) for row in rows])
+    return [(user_id, entry_date) for _, user_id, entry_date in rows]
+
+
+def analyze(conn, analysis_limit: int = ANALYSIS_LIMIT) -> int:
+    """ANALYZE acotado y PRAGMA optimize; devuelve los índices con estadísticas"""
+    conn.execute(f"PRAGMA analysis_limit = {int(analysis_limit)}")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    return conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0]
+
+
+def incremental_vacuum(conn, pages: int = VACUUM_PAGES_PER_SLICE) -> Optional[Tuple[int, int]]:
+    """
+    Devolver al sistema hasta `pages` páginas libres
+
+    Returns:
+        (páginas liberadas, páginas libres que quedan), o None si el fichero
+        no tiene auto_vacuum incremental (se creó antes; ver db_admin.py vacuum)
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+        return None
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    freed = min(pages, free)
+    # sqlite3 avanza el PRAGMA un solo paso por execute, y cada paso libera una página
+    for _ in range(freed):
+        conn.execute("PRAGMA incremental_vacuum")
+    return freed, free - freed
+
+
+def checkpoint(conn, db_path: str, truncate: bool = False) -> Dict[str, int]:
+    """
+    Pasar el WAL a la base de datos (fuera de una transacción)
+
+    PASSIVE no espera a lectores ni escritores: es lo único que se hace en
+    reposo. TRUNCATE toma el lock de escritura y espera a los lectores hasta
+    busy_timeout (un guardado que empiece entonces se quedaría esperando):
+    solo desde db_admin.py.
+    """
+    wal_path = db_path + "-wal"
+    before = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+    busy, _, pages = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    if truncate and not busy:
+        busy = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+    after = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+    return {"pages": max(pages, 0), "wal_bytes_freed": before - after, "busy": busy}
+
+
+def enable_incremental_vacuum(db_path: str) -> Dict[str, int]:
+    """
+    Convertir un fichero creado sin auto_vacuum (VACUUM completo, una sola vez)
+
+    Bloquea la base de datos mientras dura: solo desde db_admin.py, con la app cerrada.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        before = os.path.getsize(db_path)
+        conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"bytes_before": before, "bytes_after": os.path.getsize(db_path),
+                "auto_vacuum": conn.execute("PRAGMA auto_vacuum").fetchone()[0]}
+    finally:
+        conn.close()
+
+
+# ===============================
+# PROGRAMADOR
+# ===============================
+class MaintenanceService:
+    """Tareas de mantenimiento por tramos en todas las bases de datos de un DatabaseService"""
+
+    def __init__(self, db_service, idle_seconds: float = DEFAULT_IDLE_SECONDS,
+                 interval_hours: float = DEFAULT_INTERVAL_HOURS, purge_batch: int = PURGE_BATCH,
+                 vacuum_pages: int = VACUUM_PAGES_PER_SLICE, analysis_limit: int = ANALYSIS_LIMIT,
+                 slice_pause_ms: float = SLICE_PAUSE_MS, truncate_wal: bool = False):
+        self.db_service = db_service
+        self.idle_seconds = idle_seconds
+        self.interval = interval_hours * 3600
+        self.purge_batch = purge_batch
+        self.vacuum_pages = vacuum_pages
+        self.analysis_limit = analysis_limit
+        self.slice_pause = slice_pause_ms / 1000
+        # Vaciar también el fichero -wal (bloquea a los escritores): solo a mano, con db_admin.py
+        self.truncate_wal = truncate_wal
+
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._scheduler_thread = None
+        self.is_running = False
+
+        # Actividad de la interfaz (time.monotonic()); la de la base de datos la lleva el servicio
+        self.last_ui_activity = time.monotonic()
+        # Pasada a medias: (tarea, ruta del fichero) que faltan; se retoma en el siguiente reposo
+        self._pending: List[Tuple[str, str]] = []
+        self._current: Optional[Dict[str, Any]] = None
+        self.last_completed: Optional[float] = None
+        self.last_report: Optional[Dict[str, Any]] = None
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self.passes = 0
+        self.interruptions = 0
+
+    # ===============================
+    # REPOSO
+    # ===============================
+    def touch(self) -> None:
+        """Actividad de la interfaz (cambio de pantalla): aplaza el mantenimiento"""
+        self.last_ui_activity = time.monotonic()
+
+    def user_idle_seconds(self) -> float:
+        """Segundos sin cambios de pantalla ni transacciones (0 si hay una en curso, p. ej. un guardado)"""
+        database_idle = self.db_service.idle_seconds()
+        if database_idle <= 0:
+            return 0.0
+        return min(database_idle, time.monotonic() - self.last_ui_activity)
+
+    def is_idle(self) -> bool:
+        return self.user_idle_seconds() >= self.idle_seconds
+
+    def is_due(self) -> bool:
+        return bool(self._pending) or self.last_completed is None or \
+            time.time() - self.last_completed >= self.interval
+
+    # ===============================
+    # EJECUCIÓN
+    # ===============================
+    def run_now(self) -> Dict[str, Any]:
+        """Todas las tareas en todas las bases de datos, sin esperar al reposo"""
+        return self._run(require_idle=False)
+
+    def _run(self, require_idle: bool) -> Dict[str, Any]:
+        with self._run_lock, background_work():
+            managers = {manager.db_path: manager for manager in self.db_service.database_connections()}
+            if not self._pending:
+                self._pending = [(job, path) for job in JOBS for path in managers]
+                self._current = {"started": datetime.now().isoformat(timespec="seconds"), "jobs": {}}
+
+            interrupted = False
+            while self._pending:
+                job, path = self._pending[0]
+                manager = managers.get(path)
+                done = manager is None
+                while not done:
+                    if require_idle and not self.is_idle():
+                        interrupted = True
+                        break
+                    done = self._run_slice(job, manager)
+                    if not done and self.slice_pause:
+                        time.sleep(self.slice_pause)
+                if interrupted:
+                    break
+                self._pending.pop(0)
+
+            report = {"started": self._current["started"], "completed": not interrupted,
+                      "jobs": {job: dict(stats) for job, stats in self._current["jobs"].items()}}
+            with self._lock:
+                if interrupted:
+                    self.interruptions += 1
+                else:
+                    self.passes += 1
+                    self.last_completed = time.time()
+                    self._current = None
+                self.last_report = report
+
+            summary = ", ".join(f"{job} {stats['seconds']:.2f} s" for job, stats in report["jobs"].items())
+            if interrupted:
+                print(f"⏸️ Mantenimiento interrumpido por actividad ({summary}); se retoma en el siguiente reposo")
+            else:
+                print(f"🧹 Mantenimiento completado: {summary}")
+            return report
+
+    def _run_slice(self, job: str, manager) -> bool:
+        """Un tramo de `job` en una base de datos; devuelve True si la tarea ha terminado en ella"""
+        started = time.perf_counter()
+        reclaimed: Dict[str, int] = {}
+        done = True
+
+        try:
+            if job == "purge_moments":
+                with manager.transaction(immediate=True) as conn:
+                    deleted = purge_deleted_moments(conn.cursor(), self.purge_batch)
+                    for user_id, entry_date in set(deleted):
+                        self.db_service._invalidate_moment_cache(user_id, entry_date)
+                reclaimed["moments"] = len(deleted)
+                done = len(deleted) < self.purge_batch
+
+            elif job == "analyze":
+                with manager.transaction(immediate=True) as conn:
+                    reclaimed["indexes"] = analyze(conn, self.analysis_limit)
+
+            elif job == "incremental_vacuum":
+                with manager.transaction(immediate=True) as conn:
+                    result = incremental_vacuum(conn, self.vacuum_pages)
+                    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+                if result is None:
+                    # Fichero sin auto_vacuum incremental: db_admin.py vacuum
+                    reclaimed["skipped"] = 1
+                else:
+                    freed, remaining = result
+                    reclaimed["pages"] = freed
+                    reclaimed["bytes"] = freed * page_size
+                    done = remaining == 0 or freed == 0
+
+            elif job == "checkpoint":
+                result = checkpoint(manager.connection(), manager.db_path, self.truncate_wal)
+                reclaimed["pages"] = result["pages"]
+                reclaimed["wal_bytes"] = result["wal_bytes_freed"]
+
+        except Exception as e:
+            print(f"❌ Error en mantenimiento ({job}, {os.path.basename(manager.db_path)}): {e}")
+            reclaimed["errors"] = 1
+
+        self._record(job, time.perf_counter() - started, reclaimed)
+        return done
+
+    def _record(self, job: str, seconds: float, reclaimed: Dict[str, int]) -> None:
+        with self._lock:
+            for stats in (self._current["jobs"].setdefault(job, {"seconds": 0.0, "slices": 0}),
+                          self.totals.setdefault(job, {"seconds": 0.0, "slices": 0})):
+                stats["seconds"] += seconds
+                stats["slices"] += 1
+                for key, value in reclaimed.items():
+                    stats[key] = stats.get(key, 0) + value
+
+    # ===============================
+    # HILO EN SEGUNDO PLANO
+    # ===============================
+    def start(self) -> None:
+        """Arrancar el hilo que hace el mantenimiento cuando toca y la app está en reposo"""
+        with self._lock:
+            if self.is_running:
+                return
+            self.is_running = True
+
+        def run_scheduler():
+            while self.is_running:
+                self._wakeup.wait(CHECK_INTERVAL_SECONDS)
+                self._wakeup.clear()
+                if not self.is_running:
+                    return
+                try:
+                    if self.is_due() and self.is_idle():
+                        self._run(require_idle=True)
+                except Exception as e:
+                    print(f"❌ Error en el programador de mantenimiento: {e}")
+
+        self._scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
+        self._scheduler_thread.start()
+        print(f"🧹 Mantenimiento programado tras {self.idle_seconds:g} s de reposo")
+
+    def stop(self) -> None:
+        self.is_running = False
+        self._wakeup.set()
+        if self._scheduler_thread:
+            self._scheduler_thread.join(timeout=2)
+            self._scheduler_thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "passes": self.passes,
+                "interruptions": self.interruptions,
+                "pending": len(self._pending),
+                "last_completed": self.last_completed,
+                "last_report": self.last_report,
+                "totals": {job: dict(stats) for job, stats in self.totals.items()},
+            }
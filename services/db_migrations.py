@@ -0,0 +1,692 @@
+"""
+🧱 Migraciones de esquema - ReflectApp
+✅ NUEVO: Versionado con PRAGMA user_version
+✅ NUEVO: Migraciones ordenadas e idempotentes que se ejecutan una sola vez al arrancar
+✅ NUEVO: Sustituye los CREATE TABLE IF NOT EXISTS e introspección en cada llamada
+
+Para añadir una tabla, columna o índice: escribir una función nueva y
+añadirla al final de MIGRATIONS con el siguiente número de versión.
+Nunca modificar una migración ya publicada.
+
+Si un helper del servicio que usa una migración pasa a necesitar columnas
+nuevas, esa migración conserva su carga con una copia del SQL para el
+esquema de su versión (_load_rollups_v2, _load_streaks_v3, carga inicial
+de la 5) y la migración que añade las columnas vuelve a cargar los datos.
+"""
+
+from typing import Callable, List, Tuple
+
+from .day_numbers import DAY_NUMBER_SQL
+
+
+# ===============================
+# UTILIDADES
+# ===============================
+def _column_names(cursor, table: str) -> List[str]:
+    """Columnas actuales de una tabla (solo se usa durante las migraciones)"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [col[1] for col in cursor.fetchall()]
+
+
+def _add_column_if_missing(cursor, table: str, column: str, definition: str) -> None:
+    """ALTER TABLE ADD COLUMN idempotente (bases antiguas pueden tener ya la columna)"""
+    if column not in _column_names(cursor, table):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _load_rollups_v2(cursor) -> None:
+    """Carga de rollups con el esquema de la versión 2 (sin day_number)"""
+    cursor.execute("DELETE FROM daily_rollups")
+
+    # Parte de la entrada: la más reciente de cada día con sus tags
+    cursor.execute("""
+        INSERT INTO daily_rollups (
+            user_id, entry_date, positive_count, negative_count,
+            worth_it, mood_score, has_entry
+        )
+        SELECT d.user_id, d.entry_date,
+               (SELECT COUNT(*) FROM entry_tags t WHERE t.entry_id = d.id AND t.tag_type = 'positive'),
+               (SELECT COUNT(*) FROM entry_tags t WHERE t.entry_id = d.id AND t.tag_type = 'negative'),
+               d.worth_it, d.mood_score, 1
+        FROM daily_entries d
+        WHERE d.id IN (SELECT MAX(id) FROM daily_entries GROUP BY user_id, entry_date)
+    """)
+
+    # Parte de momentos: los activos todavía no convertidos en entrada
+    cursor.execute("""
+        INSERT INTO daily_rollups (user_id, entry_date, pending_positive, pending_negative)
+        SELECT user_id, entry_date,
+               SUM(moment_type = 'positive'), SUM(moment_type = 'negative')
+        FROM interactive_moments
+        WHERE is_active = 1
+        GROUP BY user_id, entry_date
+        ON CONFLICT (user_id, entry_date) DO UPDATE SET
+            pending_positive = excluded.pending_positive,
+            pending_negative = excluded.pending_negative
+    """)
+
+    cursor.execute("DELETE FROM monthly_rollups")
+    cursor.execute("""
+        INSERT INTO monthly_rollups (
+            user_id, year, month, positive_count, negative_count, total_count, entries_count
+        )
+        SELECT user_id,
+               CAST(substr(entry_date, 1, 4) AS INTEGER),
+               CAST(substr(entry_date, 6, 2) AS INTEGER),
+               SUM(positive_count), SUM(negative_count),
+               SUM(positive_count + negative_count), SUM(has_entry)
+        FROM daily_rollups
+        WHERE has_entry = 1
+        GROUP BY 1, 2, 3
+    """)
+
+
+def _load_streaks_v3(cursor) -> None:
+    """Carga de rachas con el esquema de la versión 3 (fechas en texto, sin last_day_number)"""
+    cursor.execute("""
+        DELETE FROM user_statistics
+        WHERE id NOT IN (SELECT MAX(id) FROM user_statistics GROUP BY user_id)
+    """)
+
+    cursor.execute("SELECT id FROM users UNION SELECT DISTINCT user_id FROM daily_entries")
+    for (user_id,) in cursor.fetchall():
+        cursor.execute("SELECT 1 FROM user_statistics WHERE user_id = ? LIMIT 1", (user_id,))
+        if not cursor.fetchone():
+            cursor.execute("INSERT INTO user_statistics (user_id, stat_date) VALUES (?, CURRENT_DATE)", (user_id,))
+
+        # Fechas consecutivas comparten (julianday - posición): cada grupo es una racha
+        cursor.execute("""
+            WITH days AS (
+                SELECT DISTINCT entry_date FROM daily_entries WHERE user_id = ?
+            ),
+            islands AS (
+                SELECT entry_date,
+                       julianday(entry_date) - ROW_NUMBER() OVER (ORDER BY entry_date) AS island
+                FROM days
+            )
+            SELECT MAX(entry_date) AS last_date, COUNT(*) AS length
+            FROM islands
+            GROUP BY island
+            ORDER BY last_date DESC
+        """, (user_id,))
+        runs = cursor.fetchall()
+
+        if runs:
+            last_entry_date, streak_days = runs[0]
+            longest_streak = max(length for _, length in runs)
+        else:
+            last_entry_date, streak_days, longest_streak = None, 0, 0
+
+        cursor.execute("""
+            UPDATE user_statistics
+            SET streak_days = ?, longest_streak = ?, last_entry_date = ?,
+                last_updated = CURRENT_TIMESTAMP
+            WHERE user_id = ?
+        """, (streak_days, longest_streak, last_entry_date, user_id))
+
+
+# ===============================
+# MIGRACIONES
+# ===============================
+def migration_001_base_schema(service, cursor) -> None:
+    """Esquema base, tags normalizados en entry_tags y momentos enlazados a su entrada"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            name TEXT NOT NULL,
+            avatar_emoji TEXT DEFAULT '🦫',
+            preferences TEXT DEFAULT '{}',
+            bio TEXT DEFAULT '',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            is_active INTEGER DEFAULT 1
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            free_reflection TEXT NOT NULL,
+            positive_tags TEXT DEFAULT '[]',
+            negative_tags TEXT DEFAULT '[]',
+            worth_it INTEGER,
+            mood_score INTEGER DEFAULT 5,
+            word_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            entry_date DATE DEFAULT CURRENT_DATE,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS interactive_moments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            moment_id TEXT NOT NULL,
+            emoji TEXT NOT NULL,
+            text TEXT NOT NULL,
+            moment_type TEXT NOT NULL CHECK (moment_type IN ('positive', 'negative')),
+            intensity INTEGER NOT NULL CHECK (intensity >= 1 AND intensity <= 10),
+            category TEXT NOT NULL DEFAULT 'general',
+            time_str TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            entry_date DATE DEFAULT CURRENT_DATE,
+            is_active INTEGER DEFAULT 1,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS user_statistics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            stat_date DATE DEFAULT CURRENT_DATE,
+            entries_count INTEGER DEFAULT 0,
+            positive_moments INTEGER DEFAULT 0,
+            negative_moments INTEGER DEFAULT 0,
+            total_words INTEGER DEFAULT 0,
+            avg_mood_score REAL DEFAULT 5.0,
+            streak_days INTEGER DEFAULT 0,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+            UNIQUE(user_id, stat_date)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS entry_tags (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            tag_type TEXT NOT NULL CHECK (tag_type IN ('positive', 'negative')),
+            position INTEGER NOT NULL DEFAULT 0,
+            name TEXT NOT NULL,
+            context TEXT DEFAULT '',
+            emoji TEXT DEFAULT '✨',
+            FOREIGN KEY (entry_id) REFERENCES daily_entries (id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+        )
+    """)
+
+    # Bases creadas por versiones muy antiguas no tenían is_active
+    _add_column_if_missing(cursor, "interactive_moments", "is_active", "INTEGER DEFAULT 1")
+    _add_column_if_missing(cursor, "interactive_moments", "entry_id", "INTEGER REFERENCES daily_entries (id)")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_entries_user_date ON daily_entries(user_id, entry_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_interactive_moments_user_date ON interactive_moments(user_id, entry_date, is_active)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_interactive_moments_entry ON interactive_moments(entry_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_entry_tags_entry ON entry_tags(entry_id, tag_type, position)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_entry_tags_user_type ON entry_tags(user_id, tag_type)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_statistics_user ON user_statistics(user_id, stat_date)")
+
+    service._migrate_json_tags(cursor)
+
+
+def migration_002_calendar_rollups(service, cursor) -> None:
+    """Rollups diarios y mensuales del calendario"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS daily_rollups (
+            user_id INTEGER NOT NULL,
+            entry_date DATE NOT NULL,
+            positive_count INTEGER NOT NULL DEFAULT 0,
+            negative_count INTEGER NOT NULL DEFAULT 0,
+            worth_it INTEGER,
+            mood_score INTEGER,
+            has_entry INTEGER NOT NULL DEFAULT 0,
+            pending_positive INTEGER NOT NULL DEFAULT 0,
+            pending_negative INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, entry_date)
+        ) WITHOUT ROWID
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_rollups (
+            user_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            positive_count INTEGER NOT NULL DEFAULT 0,
+            negative_count INTEGER NOT NULL DEFAULT 0,
+            total_count INTEGER NOT NULL DEFAULT 0,
+            entries_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, year, month)
+        ) WITHOUT ROWID
+    """)
+
+    _load_rollups_v2(cursor)
+
+
+def migration_003_persisted_streaks(service, cursor) -> None:
+    """Racha actual, racha más larga y última entrada en user_statistics"""
+    _add_column_if_missing(cursor, "user_statistics", "longest_streak", "INTEGER DEFAULT 0")
+    _add_column_if_missing(cursor, "user_statistics", "last_entry_date", "DATE")
+
+    _load_streaks_v3(cursor)
+
+
+def migration_004_unique_daily_entry(service, cursor) -> None:
+    """Una entrada por usuario y día: fusionar duplicados y crear índice UNIQUE"""
+    cursor.execute("""
+        SELECT user_id, entry_date
+        FROM daily_entries
+        GROUP BY user_id, entry_date
+        HAVING COUNT(*) > 1
+    """)
+    duplicated_days = cursor.fetchall()
+
+    for user_id, entry_date in duplicated_days:
+        cursor.execute("""
+            SELECT id, free_reflection, word_count
+            FROM daily_entries
+            WHERE user_id = ? AND entry_date = ?
+            ORDER BY id
+        """, (user_id, entry_date))
+        entries = cursor.fetchall()
+
+        # Se conserva la más reciente; el texto de las demás no se pierde
+        keep_id = entries[-1][0]
+        old_ids = [entry_id for entry_id, _, _ in entries[:-1]]
+        reflections = [reflection for _, reflection, _ in entries if reflection]
+        word_count = sum(count or 0 for _, _, count in entries)
+
+        cursor.execute("""
+            UPDATE daily_entries SET free_reflection = ?, word_count = ?
+            WHERE id = ?
+        """, ("\n\n".join(reflections), word_count, keep_id))
+
+        for old_id in old_ids:
+            # Los tags de la entrada antigua se añaden detrás de los de la conservada
+            cursor.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM entry_tags WHERE entry_id = ?", (keep_id,))
+            offset = cursor.fetchone()[0]
+            cursor.execute("""
+                UPDATE entry_tags SET entry_id = ?, position = position + ?
+                WHERE entry_id = ?
+            """, (keep_id, offset, old_id))
+            cursor.execute("UPDATE interactive_moments SET entry_id = ? WHERE entry_id = ?", (keep_id, old_id))
+            cursor.execute("DELETE FROM daily_entries WHERE id = ?", (old_id,))
+
+    cursor.execute("DROP INDEX IF EXISTS idx_daily_entries_user_date")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_daily_entries_user_date ON daily_entries(user_id, entry_date)")
+
+    if duplicated_days:
+        _load_rollups_v2(cursor)
+        print(f"🔀 {len(duplicated_days)} días con entradas duplicadas fusionados")
+
+
+def _fts5_available(cursor) -> bool:
+    """El SQLite enlazado puede venir compilado sin FTS5"""
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)")
+        cursor.execute("DROP TABLE temp._fts5_probe")
+        return True
+    except Exception:
+        return False
+
+
+def migration_005_search_index(service, cursor) -> None:
+    """Índice FTS5 de reflexiones, tags y momentos pendientes, sincronizado por triggers"""
+    if not _fts5_available(cursor):
+        print("⚠️ SQLite sin FTS5: la búsqueda usará LIKE sobre las reflexiones")
+        return
+
+    # rowid = id de origen * 4 + tipo (0 entrada, 1 tag, 2 momento): borrados por rowid sin escanear
+    # unicode61 + remove_diacritics 2: "cancion" encuentra "canción" y "ÁRBOL" encuentra "árbol"
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS journal_fts USING fts5(
+            body,
+            user_id UNINDEXED,
+            source UNINDEXED,
+            entry_id UNINDEXED,
+            entry_date UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+
+    # executescript haría COMMIT de la transacción de la migración: un execute por trigger
+    triggers = [
+        """
+            CREATE TRIGGER IF NOT EXISTS daily_entries_fts_insert AFTER INSERT ON daily_entries BEGIN
+                INSERT INTO journal_fts (rowid, body, user_id, source, entry_id, entry_date)
+                VALUES (new.id * 4, new.free_reflection, new.user_id, 'entry', new.id, new.entry_date);
+            END
+        """,
+        """
+            CREATE TRIGGER IF NOT EXISTS daily_entries_fts_update
+            AFTER UPDATE OF free_reflection, user_id, entry_date ON daily_entries BEGIN
+                DELETE FROM journal_fts WHERE rowid = old.id * 4;
+                INSERT INTO journal_fts (rowid, body, user_id, source, entry_id, entry_date)
+                VALUES (new.id * 4, new.free_reflection, new.user_id, 'entry', new.id, new.entry_date);
+            END
+        """,
+        """
+            CREATE TRIGGER IF NOT EXISTS daily_entries_fts_delete AFTER DELETE ON daily_entries BEGIN
+                DELETE FROM journal_fts WHERE rowid = old.id * 4;
+            END
+        """,
+        """
+            CREATE TRIGGER IF NOT EXISTS entry_tags_fts_insert AFTER INSERT ON entry_tags BEGIN
+                INSERT INTO journal_fts (rowid, body, user_id, source, entry_id, entry_date)
+                VALUES (new.id * 4 + 1, new.name || ' ' || COALESCE(new.context, ''),
+                        new.user_id, 'tag', new.entry_id, NULL);
+            END
+        """,
+        """
+            CREATE TRIGGER IF NOT EXISTS entry_tags_fts_update
+            AFTER UPDATE OF name, context, user_id, entry_id ON entry_tags BEGIN
+                DELETE FROM journal_fts WHERE rowid = old.id * 4 + 1;
+                INSERT INTO journal_fts (rowid, body, user_id, source, entry_id, entry_date)
+                VALUES (new.id * 4 + 1, new.name || ' ' || COALESCE(new.context, ''),
+                        new.user_id, 'tag', new.entry_id, NULL);
+            END
+        """,
+        """
+            CREATE TRIGGER IF NOT EXISTS entry_tags_fts_delete AFTER DELETE ON entry_tags BEGIN
+                DELETE FROM journal_fts WHERE rowid = old.id * 4 + 1;
+            END
+        """,
+        # Un momento convertido en entrada ya está indexado como tag: solo se indexan los pendientes
+        # (las versiones antiguas marcaban los convertidos con is_active = 0 sin enlazarlos)
+        """
+            CREATE TRIGGER IF NOT EXISTS interactive_moments_fts_insert
+            AFTER INSERT ON interactive_moments WHEN new.entry_id IS NULL AND new.is_active = 1 BEGIN
+                INSERT INTO journal_fts (rowid, body, user_id, source, entry_id, entry_date)
+                VALUES (new.id * 4 + 2, new.text, new.user_id, 'moment', NULL, new.entry_date);
+            END
+        """,
+        """
+            CREATE TRIGGER IF NOT EXISTS interactive_moments_fts_update
+            AFTER UPDATE OF text, user_id, entry_date, entry_id, is_active ON interactive_moments BEGIN
+                DELETE FROM journal_fts WHERE rowid = old.id * 4 + 2;
+                INSERT INTO journal_fts (rowid, body, user_id, source, entry_id, entry_date)
+                SELECT new.id * 4 + 2, new.text, new.user_id, 'moment', NULL, new.entry_date
+                WHERE new.entry_id IS NULL AND new.is_active = 1;
+            END
+        """,
+        """
+            CREATE TRIGGER IF NOT EXISTS interactive_moments_fts_delete AFTER DELETE ON interactive_moments BEGIN
+                DELETE FROM journal_fts WHERE rowid = old.id * 4 + 2;
+            END
+        """,
+    ]
+    for trigger in triggers:
+        cursor.execute(trigger)
+
+    # Carga inicial con el esquema de esta versión (rebuild_search_index evoluciona con el esquema)
+    cursor.execute("""
+        INSERT INTO journal_fts (rowid, body, user_id, source, entry_id, entry_date)
+        SELECT id * 4, free_reflection, user_id, 'entry', id, entry_date FROM daily_entries
+    """)
+    cursor.execute("""
+        INSERT INTO journal_fts (rowid, body, user_id, source, entry_id, entry_date)
+        SELECT id * 4 + 1, name || ' ' || COALESCE(context, ''), user_id, 'tag', entry_id, NULL
+        FROM entry_tags
+    """)
+    cursor.execute("""
+        INSERT INTO journal_fts (rowid, body, user_id, source, entry_id, entry_date)
+        SELECT id * 4 + 2, text, user_id, 'moment', NULL, entry_date
+        FROM interactive_moments
+        WHERE entry_id IS NULL AND is_active = 1
+    """)
+
+
+def migration_006_entry_archive(service, cursor) -> None:
+    """Archivo en frío: texto comprimido de las entradas antiguas en entry_archive"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS entry_archive (
+            entry_id INTEGER PRIMARY KEY,
+            reflection_z BLOB NOT NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    _add_column_if_missing(cursor, "daily_entries", "archived", "INTEGER NOT NULL DEFAULT 0")
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS daily_entries_archive_delete AFTER DELETE ON daily_entries BEGIN
+            DELETE FROM entry_archive WHERE entry_id = old.id;
+        END
+    """)
+
+    # Al archivar se vacía free_reflection: el índice de búsqueda debe conservar el texto
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'journal_fts'")
+    if cursor.fetchone():
+        cursor.execute("DROP TRIGGER IF EXISTS daily_entries_fts_update")
+        cursor.execute("""
+            CREATE TRIGGER daily_entries_fts_update
+            AFTER UPDATE OF free_reflection, user_id, entry_date ON daily_entries
+            WHEN new.archived = 0 BEGIN
+                DELETE FROM journal_fts WHERE rowid = old.id * 4;
+                INSERT INTO journal_fts (rowid, body, user_id, source, entry_id, entry_date)
+                VALUES (new.id * 4, new.free_reflection, new.user_id, 'entry', new.id, new.entry_date);
+            END
+        """)
+
+
+def migration_007_day_numbers(service, cursor) -> None:
+    """day_number (días desde 1970-01-01) en entradas, momentos, rollups y rachas"""
+    day_from_date = DAY_NUMBER_SQL.format(column="entry_date")
+
+    for table in ("daily_entries", "interactive_moments", "daily_rollups"):
+        _add_column_if_missing(cursor, table, "day_number", "INTEGER")
+        cursor.execute(f"UPDATE {table} SET day_number = {day_from_date}")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_entries_user_day ON daily_entries(user_id, day_number)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_interactive_moments_user_day ON interactive_moments(user_id, day_number)")
+
+    # El servicio escribe day_number junto con entry_date; los triggers solo cubren
+    # inserciones que no lo traen (scripts, herramientas externas) y cambios de fecha
+    for table in ("daily_entries", "interactive_moments"):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_day_number_insert
+            AFTER INSERT ON {table} WHEN new.day_number IS NULL BEGIN
+                UPDATE {table} SET day_number = {DAY_NUMBER_SQL.format(column="new.entry_date")}
+                WHERE id = new.id;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_day_number_update
+            AFTER UPDATE OF entry_date ON {table} BEGIN
+                UPDATE {table} SET day_number = {DAY_NUMBER_SQL.format(column="new.entry_date")}
+                WHERE id = new.id;
+            END
+        """)
+
+    _add_column_if_missing(cursor, "user_statistics", "last_day_number", "INTEGER")
+
+    # Recarga de los datos derivados con los helpers que ya usan day_number
+    service._rebuild_rollups(cursor)
+    service._rebuild_all_streaks(cursor)
+
+
+def migration_008_drafts(service, cursor) -> None:
+    """Borradores de la entrada del día (texto, tags temporales y worth_it) hasta guardarla"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS drafts (
+            user_id INTEGER NOT NULL,
+            entry_date DATE NOT NULL,
+            day_number INTEGER NOT NULL,
+            reflection TEXT NOT NULL DEFAULT '',
+            tags TEXT NOT NULL DEFAULT '[]',
+            worth_it INTEGER,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, entry_date)
+        ) WITHOUT ROWID
+    """)
+
+
+def migration_009_user_statistics_aggregate(service, cursor) -> None:
+    """Agregado completo en user_statistics, mantenido en cada escritura de entradas"""
+    for column, definition in (
+        ("mood_total", "INTEGER DEFAULT 0"),
+        ("mood_entries", "INTEGER DEFAULT 0"),
+        ("best_mood_score", "INTEGER"),
+        ("best_mood_date", "DATE"),
+        ("month_start_day", "INTEGER"),
+        ("month_entries", "INTEGER DEFAULT 0"),
+    ):
+        _add_column_if_missing(cursor, "user_statistics", column, definition)
+
+    # Hasta ahora solo se mantenían las rachas: cargar el resto desde las entradas
+    service._rebuild_all_statistics(cursor)
+
+
+def migration_010_search_owner(service, cursor) -> None:
+    """Columna owner indexada en journal_fts ('u<id>'): MATCH filtra por usuario dentro de FTS5"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'journal_fts'")
+    if not cursor.fetchone():
+        return  # SQLite sin FTS5: la búsqueda usa LIKE
+
+    # Una tabla FTS5 no admite ALTER TABLE: se recrea con sus triggers y se vuelve a cargar
+    for table in ("daily_entries", "entry_tags", "interactive_moments"):
+        for event in ("insert", "update", "delete"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{event}")
+    cursor.execute("DROP TABLE journal_fts")
+
+    cursor.execute("""
+        CREATE VIRTUAL TABLE journal_fts USING fts5(
+            body,
+            owner,
+            user_id UNINDEXED,
+            source UNINDEXED,
+            entry_id UNINDEXED,
+            entry_date UNINDEXED,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+    # owner solo filtra: peso 0 para que no cuente en la relevancia
+    cursor.execute("INSERT INTO journal_fts (journal_fts, rank) VALUES ('rank', 'bm25(1.0, 0.0)')")
+
+    columns = "rowid, body, owner, user_id, source, entry_id, entry_date"
+    triggers = [
+        f"""
+            CREATE TRIGGER daily_entries_fts_insert AFTER INSERT ON daily_entries BEGIN
+                INSERT INTO journal_fts ({columns})
+                VALUES (new.id * 4, new.free_reflection, 'u' || new.user_id, new.user_id,
+                        'entry', new.id, new.entry_date);
+            END
+        """,
+        # Al archivar se vacía free_reflection: el índice conserva el texto
+        f"""
+            CREATE TRIGGER daily_entries_fts_update
+            AFTER UPDATE OF free_reflection, user_id, entry_date ON daily_entries
+            WHEN new.archived = 0 BEGIN
+                DELETE FROM journal_fts WHERE rowid = old.id * 4;
+                INSERT INTO journal_fts ({columns})
+                VALUES (new.id * 4, new.free_reflection, 'u' || new.user_id, new.user_id,
+                        'entry', new.id, new.entry_date);
+            END
+        """,
+        """
+            CREATE TRIGGER daily_entries_fts_delete AFTER DELETE ON daily_entries BEGIN
+                DELETE FROM journal_fts WHERE rowid = old.id * 4;
+            END
+        """,
+        f"""
+            CREATE TRIGGER entry_tags_fts_insert AFTER INSERT ON entry_tags BEGIN
+                INSERT INTO journal_fts ({columns})
+                VALUES (new.id * 4 + 1, new.name || ' ' || COALESCE(new.context, ''),
+                        'u' || new.user_id, new.user_id, 'tag', new.entry_id, NULL);
+            END
+        """,
+        f"""
+            CREATE TRIGGER entry_tags_fts_update
+            AFTER UPDATE OF name, context, user_id, entry_id ON entry_tags BEGIN
+                DELETE FROM journal_fts WHERE rowid = old.id * 4 + 1;
+                INSERT INTO journal_fts ({columns})
+                VALUES (new.id * 4 + 1, new.name || ' ' || COALESCE(new.context, ''),
+                        'u' || new.user_id, new.user_id, 'tag', new.entry_id, NULL);
+            END
+        """,
+        """
+            CREATE TRIGGER entry_tags_fts_delete AFTER DELETE ON entry_tags BEGIN
+                DELETE FROM journal_fts WHERE rowid = old.id * 4 + 1;
+            END
+        """,
+        f"""
+            CREATE TRIGGER interactive_moments_fts_insert
+            AFTER INSERT ON interactive_moments WHEN new.entry_id IS NULL AND new.is_active = 1 BEGIN
+                INSERT INTO journal_fts ({columns})
+                VALUES (new.id * 4 + 2, new.text, 'u' || new.user_id, new.user_id,
+                        'moment', NULL, new.entry_date);
+            END
+        """,
+        f"""
+            CREATE TRIGGER interactive_moments_fts_update
+            AFTER UPDATE OF text, user_id, entry_date, entry_id, is_active ON interactive_moments BEGIN
+                DELETE FROM journal_fts WHERE rowid = old.id * 4 + 2;
+                INSERT INTO journal_fts ({columns})
+                SELECT new.id * 4 + 2, new.text, 'u' || new.user_id, new.user_id,
+                       'moment', NULL, new.entry_date
+                WHERE new.entry_id IS NULL AND new.is_active = 1;
+            END
+        """,
+        """
+            CREATE TRIGGER interactive_moments_fts_delete AFTER DELETE ON interactive_moments BEGIN
+                DELETE FROM journal_fts WHERE rowid = old.id * 4 + 2;
+            END
+        """,
+    ]
+    for trigger in triggers:
+        cursor.execute(trigger)
+
+    # Las reflexiones archivadas se leen del archivo comprimido (reflect_unzip)
+    service._rebuild_search_index(cursor)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "Esquema base y tags normalizados", migration_001_base_schema),
+    (2, "Rollups del calendario", migration_002_calendar_rollups),
+    (3, "Rachas persistidas", migration_003_persisted_streaks),
+    (4, "Entrada única por usuario y día", migration_004_unique_daily_entry),
+    (5, "Índice de búsqueda FTS5", migration_005_search_index),
+    (6, "Archivo en frío de reflexiones", migration_006_entry_archive),
+    (7, "Números de día enteros", migration_007_day_numbers),
+    (8, "Borradores de la entrada del día", migration_008_drafts),
+    (9, "Estadísticas de usuario incrementales", migration_009_user_statistics_aggregate),
+    (10, "Búsqueda filtrada por usuario en FTS5", migration_010_search_owner),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn) -> int:
+    """Versión actual del esquema guardada en la cabecera del fichero"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(service, connections) -> int:
+    """
+    Aplicar las migraciones pendientes, cada una en su propia transacción
+
+    Args:
+        service: DatabaseService (las migraciones de datos usan sus helpers)
+        connections: ConnectionManager del servicio
+
+    Returns:
+        int: Número de migraciones aplicadas
+    """
+    with connections.transaction() as conn:
+        current_version = get_schema_version(conn)
+
+    applied = 0
+    for version, description, migration in MIGRATIONS:
+        if version <= current_version:
+            continue
+
+        with connections.transaction(immediate=True) as conn:
+            # Otro proceso pudo aplicarla mientras esperábamos el lock
+            if get_schema_version(conn) >= version:
+                continue
+
+            migration(service, conn.cursor())
+            # user_version es transaccional: se confirma junto con la migración
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+
+        applied += 1
+        print(f"🧱 Migración {version} aplicada: {description}")
+
+    return applied
@@ -0,0 +1,280 @@
+"""
+🧩 Particionado por usuario (sharding) - ReflectApp
+✅ NUEVO: Modo opcional para el despliegue web multiusuario
+✅ NUEVO: Los datos de cada usuario van a su propio fichero ("user") o a un
+          cubo por hash ("hash:N"); users y la autenticación quedan en el catálogo
+✅ NUEVO: Gestores de conexión por shard cacheados con cierre LRU
+✅ NUEVO: Cada shard tiene su propio lock de escritura: usuarios distintos escriben en paralelo
+
+Disposición en disco:
+    data/reflect_catalog.db        ← catálogo (users)
+    data/shards/layout.json        ← modo y número de cubos (no se puede cambiar después)
+    data/shards/user_42.db         ← modo "user"
+    data/shards/shard_007.db       ← modo "hash:16"
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .db_connection_manager import ConnectionManager
+from .db_migrations import LATEST_VERSION, get_schema_version
+
+# Por defecto fuera de la app; la app y db_admin.py pasan AppConfig.MAX_OPEN_SHARDS
+DEFAULT_MAX_OPEN_SHARDS = 64
+LAYOUT_FILE = "layout.json"
+
+SHARD_FILE_PATTERNS = {
+    "user": re.compile(r"^user_(\d+)\.db$"),
+    "hash": re.compile(r"^shard_(\d+)\.db$"),
+}
+
+
+def parse_shard_mode(sharding: str) -> Tuple[str, int]:
+    """
+    "user" → ("user", 0); "hash:16" → ("hash", 16)
+
+    Raises:
+        ValueError: Si el modo no es válido
+    """
+    mode, _, buckets = sharding.strip().partition(":")
+    if mode == "user" and not buckets:
+        return "user", 0
+    if mode == "hash" and buckets.isdigit() and int(buckets) > 0:
+        return "hash", int(buckets)
+    raise ValueError(f"Modo de sharding desconocido: {sharding} (usar 'user' o 'hash:N')")
+
+
+class ShardRouter:
+    """Reparte los usuarios entre ficheros SQLite y mantiene abiertos los más usados"""
+
+    def __init__(self, directory: str, sharding: str, profile: str,
+                 on_open: Optional[Callable] = None,
+                 on_create: Optional[Callable[[ConnectionManager], None]] = None,
+                 max_open: int = DEFAULT_MAX_OPEN_SHARDS, factory: Optional[type] = None):
+        self.directory = directory
+        self.mode, self.buckets = parse_shard_mode(sharding)
+        self.profile = profile
+        self.on_open = on_open
+        # Se llama una vez por shard y proceso antes de usarlo (migraciones)
+        self.on_create = on_create
+        self.max_open = max_open
+        self.factory = factory
+
+        self._lock = threading.Lock()
+        self._open: "OrderedDict[str, ConnectionManager]" = OrderedDict()
+        self._ready: Dict[str, threading.Event] = {}
+
+        self.opened_shards = 0
+        self.evicted_shards = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._check_layout()
+
+    def _check_layout(self) -> None:
+        """Guardar el modo la primera vez y negarse a abrir con otro (los usuarios irían a otro fichero)"""
+        path = os.path.join(self.directory, LAYOUT_FILE)
+        layout = {"mode": self.mode, "buckets": self.buckets}
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as handle:
+                stored = json.load(handle)
+            if stored != layout:
+                raise ValueError(f"Los shards de {self.directory} usan {stored}, no {layout}")
+        else:
+            with open(path, "w", encoding="utf-8") as handle:
+                json.dump(layout, handle)
+
+    # ===============================
+    # ENRUTADO
+    # ===============================
+    def shard_name(self, user_id: int) -> str:
+        """Nombre del fichero del shard de un usuario"""
+        if self.mode == "user":
+            return f"user_{int(user_id)}.db"
+        return f"shard_{int(user_id) % self.buckets:03d}.db"
+
+    def for_user(self, user_id: int) -> ConnectionManager:
+        """Gestor de conexiones del shard del usuario (se crea y migra la primera vez)"""
+        return self.for_name(self.shard_name(user_id))
+
+    def for_name(self, name: str) -> ConnectionManager:
+        with self._lock:
+            manager = self._open.get(name)
+            if manager is not None:
+                self._open.move_to_end(name)
+                ready = self._ready[name]
+                creator = False
+            else:
+                manager = ConnectionManager(os.path.join(self.directory, name), self.profile,
+                                            on_open=self.on_open, factory=self.factory)
+                self._open[name] = manager
+                ready = self._ready.setdefault(name, threading.Event())
+                creator = not ready.is_set()
+                self.opened_shards += 1
+                self._evict_idle(keep=name)
+
+        # Las migraciones de un shard no bloquean a los usuarios de los demás
+        if creator:
+            try:
+                if self.on_create:
+                    self.on_create(manager)
+            except BaseException:
+                with self._lock:
+                    self._open.pop(name, None)
+                    self._ready.pop(name, None)
+                ready.set()
+                raise
+            ready.set()
+        else:
+            ready.wait()
+
+        return manager
+
+    def _evict_idle(self, keep: str) -> None:
+        """Cerrar los shards menos usados sin transacciones abiertas (llamar con el lock tomado)"""
+        for name in list(self._open):
+            if len(self._open) <= self.max_open:
+                return
+            manager = self._open[name]
+            if name == keep or manager.active_transactions:
+                continue
+            # _ready se conserva: al reabrirlo ya no hace falta migrar
+            self._open.pop(name)
+            manager.close_all()
+            self.evicted_shards += 1
+
+    def open_managers(self) -> List[ConnectionManager]:
+        """Shards con conexiones abiertas ahora mismo"""
+        with self._lock:
+            return list(self._open.values())
+
+    def shard_files(self) -> List[str]:
+        """Nombres de los shards que existen en disco (sin abrirlos)"""
+        pattern = SHARD_FILE_PATTERNS[self.mode]
+        return [name for name in sorted(os.listdir(self.directory)) if pattern.match(name)]
+
+    def iter_shards(self) -> Iterator[ConnectionManager]:
+        """Todos los shards que existen en disco (para tareas de mantenimiento globales)"""
+        for name in self.shard_files():
+            yield self.for_name(name)
+
+    # ===============================
+    # CIERRE Y ESTADO
+    # ===============================
+    def close_all(self) -> None:
+        with self._lock:
+            for manager in self._open.values():
+                manager.close_all()
+            self._open.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode if self.mode == "user" else f"hash:{self.buckets}",
+                "open_shards": len(self._open),
+                "max_open_shards": self.max_open,
+                "opened_shards": self.opened_shards,
+                "evicted_shards": self.evicted_shards,
+                "open_connections": sum(m.get_stats()["open_connections"] for m in self._open.values()),
+            }
+
+
+# ===============================
+# DIVISIÓN DE UNA BASE DE DATOS ÚNICA
+# ===============================
+# Tablas con columna user_id que se reparten; entry_archive va con su entrada
+# y journal_fts se regenera en cada shard al terminar
+SHARDED_TABLES = (
+    "daily_entries", "entry_tags", "interactive_moments",
+    "user_statistics", "daily_rollups", "monthly_rollups", "drafts",
+)
+
+
+def _copy_rows(conn, table: str, where: str) -> int:
+    """INSERT OR IGNORE de source.<table> en main.<table> con las columnas comunes"""
+    target = [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")]
+    source = {row[1] for row in conn.execute(f"PRAGMA source.table_info({table})")}
+    columns = ", ".join(column for column in target if column in source)
+    return conn.execute(
+        f"INSERT OR IGNORE INTO main.{table} ({columns}) SELECT {columns} FROM source.{table} WHERE {where}"
+    ).rowcount
+
+
+def _attach_source(manager: ConnectionManager, source_path: str):
+    """ATTACH de solo lectura (fuera de cualquier transacción, como exige SQLite)"""
+    conn = manager.connection()
+    conn.execute("ATTACH DATABASE ? AS source", (f"file:{os.path.abspath(source_path)}?mode=ro",))
+    return conn
+
+
+def split_database(service, source_path: str) -> Dict[str, Any]:
+    """
+    Repartir una base de datos única entre el catálogo y los shards de `service`
+
+    La fuente no se modifica. Se puede repetir: las filas ya copiadas se ignoran.
+
+    Args:
+        service: DatabaseService con sharding (su db_path es el catálogo)
+        source_path: Base de datos única, ya migrada a la última versión
+
+    Returns:
+        Dict con usuarios, shards y filas copiadas por tabla
+    """
+    if service.shards is None:
+        raise ValueError("El servicio no tiene sharding activo")
+    if os.path.abspath(source_path) == os.path.abspath(service.db_path):
+        raise ValueError("El catálogo debe ser un fichero distinto de la base de datos original")
+
+    probe = sqlite3.connect(f"file:{os.path.abspath(source_path)}?mode=ro", uri=True)
+    try:
+        if get_schema_version(probe) != LATEST_VERSION:
+            raise ValueError(f"{source_path} no está en el esquema v{LATEST_VERSION}: "
+                             "ábrela antes con DatabaseService para migrarla")
+        user_ids = [row[0] for row in probe.execute(
+            " UNION ".join(["SELECT id FROM users"] +
+                           [f"SELECT DISTINCT user_id FROM {table}" for table in SHARDED_TABLES])
+        )]
+    finally:
+        probe.close()
+
+    copied = {table: 0 for table in ("users",) + SHARDED_TABLES + ("entry_archive",)}
+
+    # 1. Usuarios → catálogo
+    conn = _attach_source(service._connections, source_path)
+    try:
+        with service._connections.transaction(immediate=True):
+            copied["users"] = _copy_rows(conn, "users", "1 = 1")
+    finally:
+        conn.execute("DETACH DATABASE source")
+
+    # 2. Datos de cada usuario → su shard (una transacción por shard)
+    by_shard: Dict[str, list] = {}
+    for user_id in user_ids:
+        by_shard.setdefault(service.shards.shard_name(user_id), []).append(user_id)
+
+    for name, shard_users in sorted(by_shard.items()):
+        manager = service.shards.for_name(name)
+        conn = _attach_source(manager, source_path)
+        try:
+            with manager.transaction(immediate=True):
+                users_sql = ", ".join(str(int(user_id)) for user_id in shard_users)
+                for table in SHARDED_TABLES:
+                    copied[table] += _copy_rows(conn, table, f"user_id IN ({users_sql})")
+                copied["entry_archive"] += _copy_rows(
+                    conn, "entry_archive",
+                    f"entry_id IN (SELECT id FROM source.daily_entries WHERE user_id IN ({users_sql}))"
+                )
+                if service.capabilities["search_index"]:
+                    service._rebuild_search_index(conn.cursor())
+        finally:
+            conn.execute("DETACH DATABASE source")
+
+        print(f"🧩 {name}: {len(shard_users)} usuarios")
+
+    service.query_cache.clear()
+    return {"users": len(user_ids), "shards": len(by_shard), "rows": copied}
@@ -0,0 +1,210 @@
+"""
+📝 Borradores de la entrada del día - ReflectApp
+✅ NUEVO: Texto en curso, tags temporales y worth_it guardados en la tabla drafts
+✅ NUEVO: Escritura diferida: los cambios se acumulan en memoria y cada borrador
+          se escribe como mucho una vez por intervalo (teclear no escribe en cada tecla)
+✅ NUEVO: Lecturas que ven los cambios aún no escritos (read-your-writes)
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_SAVE_INTERVAL_MS = 1000
+
+
+def empty_draft() -> Dict[str, Any]:
+    return {"reflection": "", "tags": [], "worth_it": None}
+
+
+class DraftStore:
+    """Borradores sucios en memoria con un hilo que los vuelca en lote cada intervalo"""
+
+    def __init__(self, db_service, save_interval_ms: int = DEFAULT_SAVE_INTERVAL_MS):
+        self.db_service = db_service
+        self.save_interval = save_interval_ms / 1000
+
+        # (user_id, entry_date) → borrador más nuevo que el de la base de datos
+        self._dirty: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._has_dirty = threading.Event()  # Activo mientras haya borradores sin escribir
+        self._flusher_thread = None
+        self.is_running = False
+
+        # Contadores para diagnóstico y benchmarks
+        self.updates = 0
+        self.written_drafts = 0
+        self.flush_count = 0
+
+    # ===============================
+    # CAMBIOS
+    # ===============================
+    def update(self, user_id: int, reflection: Optional[str] = None, worth_it: Optional[bool] = None,
+               tag: Optional[Dict[str, str]] = None) -> Optional[str]:
+        """
+        Aplicar un cambio al borrador de hoy (None = sin cambios en ese campo)
+
+        Returns:
+            str: id del tag añadido (si se pasó tag), o None
+        """
+        key = (user_id, date.today().isoformat())
+        with self._lock:
+            draft = self._dirty.get(key)
+        if draft is None:
+            # Primer cambio desde el último volcado: partir de lo que hay en la base de datos
+            loaded = self.db_service._read_draft(user_id, key[1]) or empty_draft()
+            with self._lock:
+                draft = self._dirty.setdefault(key, {**loaded, "version": 0})
+
+        tag_id = None
+        with self._lock:
+            if reflection is not None:
+                draft["reflection"] = reflection
+            if worth_it is not None:
+                draft["worth_it"] = worth_it
+            if tag is not None:
+                tag_id = self._add_tag(draft, tag)
+            draft["version"] += 1
+            # Una entrada volcada entre la lectura y este cambio se vuelve a marcar como sucia
+            self._dirty[key] = draft
+            self._has_dirty.set()
+            self.updates += 1
+
+        self._ensure_flusher()
+        return tag_id
+
+    @staticmethod
+    def _add_tag(draft: Dict[str, Any], tag: Dict[str, str]) -> str:
+        """Añadir un tag sin duplicar (mismo nombre, contexto y tipo); llamar con el lock tomado"""
+        for existing in draft["tags"]:
+            if (existing["name"], existing["context"], existing["type"]) == (tag["name"], tag["context"], tag["type"]):
+                return existing["id"]
+        tag = {"id": str(int(datetime.now().timestamp() * 1000) * 100 + len(draft["tags"])), **tag}
+        draft["tags"] = draft["tags"] + [tag]
+        return tag["id"]
+
+    def get(self, user_id: int, entry_date: str) -> Optional[Dict[str, Any]]:
+        """Borrador del día: el de memoria si tiene cambios sin escribir, si no el de la base de datos"""
+        with self._lock:
+            draft = self._dirty.get((user_id, entry_date))
+            if draft is not None:
+                return {"reflection": draft["reflection"], "tags": list(draft["tags"]),
+                        "worth_it": draft["worth_it"]}
+        return self.db_service._read_draft(user_id, entry_date)
+
+    def discard(self, user_id: int, entry_date: str) -> bool:
+        """Olvidar los cambios sin escribir (al descartar el borrador)"""
+        # Esperar a que termine un volcado en curso para no resucitar el borrador
+        with self._flush_lock:
+            return self.forget(user_id, entry_date)
+
+    @contextmanager
+    def paused(self):
+        """
+        Sin volcados mientras dura el bloque (al pasar el borrador a la entrada)
+
+        Dentro se guarda la entrada y, tras el commit, se llama a forget():
+        un volcado no puede escribir el borrador entre el commit y el olvido,
+        y si el guardado falla los cambios siguen en memoria.
+        """
+        with self._flush_lock:
+            yield
+
+    def forget(self, user_id: int, entry_date: str) -> bool:
+        """Olvidar los cambios sin escribir; llamar dentro de paused() o desde discard()"""
+        with self._lock:
+            return self._dirty.pop((user_id, entry_date), None) is not None
+
+    # ===============================
+    # VOLCADO
+    # ===============================
+    def flush(self, user_id: Optional[int] = None) -> int:
+        """
+        Escribir ya los borradores sucios (una transacción por fichero de base de datos)
+
+        Returns:
+            int: Número de borradores escritos
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = [
+                    {"user_id": key[0], "entry_date": key[1], "reflection": draft["reflection"],
+                     "tags": list(draft["tags"]), "worth_it": draft["worth_it"], "version": draft["version"]}
+                    for key, draft in self._dirty.items()
+                    if user_id is None or key[0] == user_id
+                ]
+
+            if not batch:
+                return 0
+
+            groups: Dict[str, List[Dict[str, Any]]] = {}
+            for row in batch:
+                groups.setdefault(self.db_service.shard_name(row["user_id"]), []).append(row)
+
+            written = 0
+            for group in groups.values():
+                self.db_service._write_drafts(group)
+                written += len(group)
+
+                # Solo dejan de estar sucios si no cambiaron mientras se escribían
+                with self._lock:
+                    for row in group:
+                        key = (row["user_id"], row["entry_date"])
+                        draft = self._dirty.get(key)
+                        if draft is not None and draft["version"] == row["version"]:
+                            del self._dirty[key]
+
+            self.written_drafts += written
+            self.flush_count += 1
+            return written
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._dirty)
+
+    def _ensure_flusher(self) -> None:
+        """Arrancar el hilo de volcado la primera vez que cambia un borrador"""
+        if self.is_running:
+            return
+
+        with self._lock:
+            if self.is_running:
+                return
+            self.is_running = True
+
+        def run_flusher():
+            while self.is_running:
+                # ✅ MEJORADO: Sin borradores sucios no hay temporizador: el hilo duerme hasta el siguiente cambio
+                self._has_dirty.wait()
+                if not self.is_running:
+                    return
+
+                # Un intervalo desde el primer cambio: las teclas siguientes van en el mismo volcado
+                self._wakeup.wait(self.save_interval)
+                self._wakeup.clear()
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"❌ Error guardando borradores: {e}")
+                    time.sleep(self.save_interval)
+
+                with self._lock:
+                    if not self._dirty:
+                        self._has_dirty.clear()
+
+        self._flusher_thread = threading.Thread(target=run_flusher, daemon=True)
+        self._flusher_thread.start()
+
+    def stop(self) -> None:
+        """Detener el hilo de volcado tras escribir lo pendiente"""
+        self.is_running = False
+        self._wakeup.set()
+        self._has_dirty.set()
+        if self._flusher_thread:
+            self._flusher_thread.join(timeout=2)
+            self._flusher_thread = None
+        self.flush()
@@ -0,0 +1,123 @@
+"""
+🧊 Archivo en frío de reflexiones - ReflectApp
+✅ NUEVO: El texto de las entradas antiguas se guarda comprimido (zlib con diccionario) en entry_archive
+✅ NUEVO: daily_entries conserva la fila (fecha, mood, worth_it, recuento de palabras) sin el texto:
+          rollups, rachas, estadísticas y tags siguen igual
+✅ NUEVO: Función SQL reflect_unzip() para leer el texto archivado de forma transparente
+✅ NUEVO: El índice de búsqueda conserva el texto original (no se reindexa al archivar)
+"""
+
+import sqlite3
+import zlib
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+DEFAULT_ARCHIVE_HORIZON_DAYS = 365
+
+# Diccionario zlib: las reflexiones son cortas (decenas o cientos de bytes) y sin
+# diccionario apenas se comprimen. Contiene las palabras y frases más habituales
+# del diario; lo más frecuente va al final (zlib prioriza las distancias cortas).
+# Nunca modificar un diccionario publicado: añadir uno nuevo con otra versión.
+ARCHIVE_DICTIONARIES: Dict[int, bytes] = {
+    1: (
+        "trabajo reunión proyecto entrega clase examen estudio jefe compañeros oficina "
+        "familia mamá papá hermano hermana pareja amigos amiga amigo hijos perro gato "
+        "casa cocina comida cena desayuno almuerzo café té paseo parque playa montaña "
+        "deporte gimnasio correr bici yoga meditación música canción película serie libro lectura "
+        "lluvia sol frío calor tarde noche mañana fin de semana lunes martes miércoles jueves viernes "
+        "cansado cansada cansancio estrés ansiedad tranquilo tranquila calma paz alegría "
+        "feliz contento contenta triste enfadado agradecido agradecida orgulloso orgullosa "
+        "me sentí me siento he sentido hoy ha sido un día muy bastante un poco demasiado "
+        "mejor peor bien mal bonito difícil tranquilo productivo largo intenso "
+        "Entrada creada desde Momentos Interactivos "
+        "Día completado con momentos capturados "
+        "Reflexión del día - momentos registrados "
+        "Momento general a las Momento quick a las Momento mood a las Momento timeline a las "
+        "porque pero también cuando después antes mucho poco nada todo algo "
+        "que de la el en y a los las se con por para una un del al lo no me mi "
+    ).encode("utf-8"),
+}
+CURRENT_DICTIONARY = max(ARCHIVE_DICTIONARIES)
+
+# Texto de la reflexión para consultas que leen daily_entries d LEFT JOIN entry_archive a
+REFLECTION_SQL = "CASE WHEN d.archived = 1 THEN reflect_unzip(a.reflection_z) ELSE d.free_reflection END"
+ARCHIVE_JOIN_SQL = "LEFT JOIN entry_archive a ON a.entry_id = d.id"
+
+
+# ===============================
+# COMPRESIÓN
+# ===============================
+def compress_reflection(text: str) -> bytes:
+    """Primer byte: versión del diccionario; resto: deflate crudo con ese diccionario"""
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY,
+                                  ARCHIVE_DICTIONARIES[CURRENT_DICTIONARY])
+    return bytes([CURRENT_DICTIONARY]) + compressor.compress(text.encode("utf-8")) + compressor.flush()
+
+
+def decompress_reflection(blob: Optional[bytes]) -> Optional[str]:
+    if blob is None:
+        return None
+    decompressor = zlib.decompressobj(-15, ARCHIVE_DICTIONARIES[blob[0]])
+    return (decompressor.decompress(blob[1:]) + decompressor.flush()).decode("utf-8")
+
+
+def register_sql_functions(conn: sqlite3.Connection) -> None:
+    """Registrar reflect_unzip() en cada conexión nueva"""
+    conn.create_function("reflect_unzip", 1, decompress_reflection, deterministic=True)
+
+
+# ===============================
+# ARCHIVADO
+# ===============================
+def archive_entries(cursor, older_than_days: int = DEFAULT_ARCHIVE_HORIZON_DAYS,
+                    user_id: Optional[int] = None, chunk_size: int = 500) -> Dict[str, int]:
+    """
+    Comprimir el texto de las entradas anteriores al horizonte (dentro de la transacción del llamador)
+
+    Returns:
+        Dict con entradas archivadas y bytes de texto antes/después
+    """
+    cutoff = (date.today() - timedelta(days=older_than_days)).isoformat()
+
+    query = "SELECT id FROM daily_entries WHERE archived = 0 AND entry_date < ?"
+    params = [cutoff]
+    if user_id is not None:
+        query += " AND user_id = ?"
+        params.append(user_id)
+
+    # Solo ids en memoria: el texto se lee por bloques mientras se modifica la tabla
+    cursor.execute(query, params)
+    entry_ids = [row[0] for row in cursor.fetchall()]
+
+    text_bytes = 0
+    compressed_bytes = 0
+
+    for start in range(0, len(entry_ids), chunk_size):
+        chunk = entry_ids[start:start + chunk_size]
+        cursor.execute(
+            f"SELECT id, free_reflection FROM daily_entries WHERE id IN ({', '.join('?' * len(chunk))})",
+            chunk
+        )
+
+        archive_rows = []
+        for entry_id, reflection in cursor.fetchall():
+            blob = compress_reflection(reflection or "")
+            archive_rows.append((entry_id, blob))
+            text_bytes += len((reflection or "").encode("utf-8"))
+            compressed_bytes += len(blob)
+
+        cursor.executemany(
+            "INSERT OR REPLACE INTO entry_archive (entry_id, reflection_z) VALUES (?, ?)", archive_rows
+        )
+        # El trigger del índice de búsqueda ignora las filas archivadas: el texto sigue indexado
+        cursor.executemany(
+            "UPDATE daily_entries SET free_reflection = '', archived = 1 WHERE id = ?",
+            [(entry_id,) for entry_id, _ in archive_rows]
+        )
+
+    return {
+        "archived": len(entry_ids),
+        "text_bytes": text_bytes,
+        "compressed_bytes": compressed_bytes,
+        "cutoff": cutoff,
+    }
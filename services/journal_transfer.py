@@ -0,0 +1,394 @@
+"""
+📦 Exportación e importación del diario - ReflectApp
+✅ NUEVO: Exportación en streaming (NDJSON o CSV, opcionalmente gzip) en memoria constante
+✅ NUEVO: Todo se lee dentro de una única transacción de lectura (foto consistente)
+✅ NUEVO: Importación masiva con executemany en lotes, índices al final y filas/s
+
+Formato: un registro por línea con un campo "type":
+    meta → user → entry* → tag* → moment* → statistics*
+En CSV todas las filas comparten cabecera (type + unión de campos) y los
+campos que no aplican a un tipo quedan vacíos.
+"""
+
+import csv
+import gzip
+import itertools
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .day_numbers import DAY_NUMBER_SQL
+from .entry_archive import ARCHIVE_JOIN_SQL, REFLECTION_SQL
+
+FORMAT_VERSION = 1
+
+# Campos exportados por tipo de registro (el password_hash nunca sale del dispositivo)
+RECORD_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "user": ("id", "email", "name", "avatar_emoji", "bio", "preferences", "created_at"),
+    "entry": ("id", "entry_date", "free_reflection", "worth_it", "mood_score", "word_count",
+              "created_at", "updated_at"),
+    "tag": ("entry_id", "tag_type", "position", "name", "context", "emoji"),
+    "moment": ("id", "moment_id", "entry_id", "emoji", "text", "moment_type", "intensity",
+               "category", "time_str", "entry_date", "created_at", "is_active"),
+    "statistics": ("stat_date", "entries_count", "positive_moments", "negative_moments",
+                   "total_words", "avg_mood_score", "streak_days", "longest_streak", "last_entry_date"),
+}
+
+# (tabla, columna del usuario, orden) de cada tipo
+RECORD_SOURCES: Dict[str, Tuple[str, str, str]] = {
+    "user": ("users", "id", "id"),
+    "entry": (f"daily_entries d {ARCHIVE_JOIN_SQL}", "d.user_id", "d.entry_date, d.id"),
+    "tag": ("entry_tags", "user_id", "entry_id, tag_type, position"),
+    "moment": ("interactive_moments", "user_id", "entry_date, id"),
+    "statistics": ("user_statistics", "user_id", "stat_date"),
+}
+
+# Columnas que no se leen tal cual (las entradas archivadas guardan el texto comprimido)
+COLUMN_EXPRESSIONS: Dict[str, Dict[str, str]] = {
+    "entry": {"free_reflection": REFLECTION_SQL},
+}
+
+META_FIELDS = ("format_version", "schema_version", "exported_at")
+
+CSV_COLUMNS = ["type"] + list(dict.fromkeys(
+    field for fields in (META_FIELDS,) + tuple(RECORD_FIELDS.values()) for field in fields
+))
+
+INT_FIELDS = {
+    "id", "entry_id", "worth_it", "mood_score", "word_count", "position", "intensity", "is_active",
+    "entries_count", "positive_moments", "negative_moments", "total_words", "streak_days",
+    "longest_streak", "format_version", "schema_version",
+}
+FLOAT_FIELDS = {"avg_mood_score"}
+
+
+# ===============================
+# FICHEROS
+# ===============================
+def _detect_format(path: str) -> str:
+    name = path[:-3] if path.endswith(".gz") else path
+    return "csv" if name.endswith(".csv") else "ndjson"
+
+
+def _open_text(path: str, mode: str, compress: bool):
+    if compress:
+        # Nivel 6: casi el mismo tamaño que 9 y bastante más rápido
+        return gzip.open(path, mode + "t", compresslevel=6, encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def _csv_value(field: str, value: str) -> Any:
+    """CSV solo guarda texto: recuperar None, enteros y reales"""
+    if value == "":
+        return None
+    if field in INT_FIELDS:
+        return int(value)
+    if field in FLOAT_FIELDS:
+        return float(value)
+    return value
+
+
+def _read_records(path: str, fmt: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Leer el fichero registro a registro (memoria constante)"""
+    with _open_text(path, "r", path.endswith(".gz")) as handle:
+        if fmt == "csv":
+            for row in csv.DictReader(handle):
+                record_type = row.pop("type")
+                fields = META_FIELDS if record_type == "meta" else RECORD_FIELDS.get(record_type, ())
+                yield record_type, {field: _csv_value(field, row.get(field, "")) for field in fields}
+        else:
+            for line in handle:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.pop("type"), record
+
+
+def _require_user(service, user_id: int) -> None:
+    """El usuario debe existir en users (el catálogo si hay sharding)"""
+    with service._connections.transaction() as conn:
+        row = conn.execute("SELECT 1 FROM users WHERE id = ?", (user_id,)).fetchone()
+    if not row:
+        raise ValueError(f"Usuario {user_id} no encontrado")
+
+
+# ===============================
+# EXPORTACIÓN
+# ===============================
+def export_user(service, user_id: int, dest_path: str, fmt: Optional[str] = None,
+                compress: Optional[bool] = None, chunk_size: int = 500) -> Dict[str, Any]:
+    """
+    Escribir el diario completo de un usuario en dest_path
+
+    Args:
+        service: DatabaseService
+        user_id: Usuario a exportar
+        dest_path: Fichero de salida (.ndjson, .csv, con .gz opcional)
+        fmt: "ndjson" o "csv" (por defecto según la extensión)
+        compress: gzip (por defecto si la ruta termina en .gz)
+        chunk_size: Filas pedidas al cursor en cada fetchmany
+
+    Returns:
+        Dict con filas por tipo, total, segundos y filas/s
+    """
+    fmt = fmt or _detect_format(dest_path)
+    if fmt not in ("ndjson", "csv"):
+        raise ValueError(f"Formato de exportación desconocido: {fmt}")
+    if compress is None:
+        compress = dest_path.endswith(".gz")
+
+    # Antes de abrir el fichero: un usuario inexistente no deja una exportación vacía
+    _require_user(service, user_id)
+
+    start = time.perf_counter()
+    counts = {record_type: 0 for record_type in RECORD_FIELDS}
+
+    try:
+        _write_export(service, user_id, dest_path, fmt, compress, chunk_size, counts)
+    except Exception:
+        # Sin ficheros a medias en dest_path
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    return {
+        "path": dest_path,
+        "format": fmt,
+        "compressed": compress,
+        "rows": counts,
+        "total_rows": total,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(total / elapsed) if elapsed else total,
+    }
+
+
+def _write_export(service, user_id: int, dest_path: str, fmt: str, compress: bool,
+                  chunk_size: int, counts: Dict[str, int]) -> None:
+    """Escribir los registros del usuario en dest_path contando las filas por tipo"""
+    with _open_text(dest_path, "w", compress) as handle:
+        if fmt == "csv":
+            writer = csv.DictWriter(handle, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            def write(record):
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        # Una sola foto de la base de datos: entradas, tags y momentos coherentes entre sí
+        with service._user_connections(user_id).transaction(snapshot=True):
+            write({
+                "type": "meta",
+                "format_version": FORMAT_VERSION,
+                "schema_version": service.schema_version,
+                "exported_at": datetime.now().isoformat(timespec="seconds"),
+            })
+
+            for record_type, fields in RECORD_FIELDS.items():
+                table, user_column, order = RECORD_SOURCES[record_type]
+                expressions = COLUMN_EXPRESSIONS.get(record_type, {})
+                prefix = user_column.split(".")[0] + "." if "." in user_column else ""
+                select_list = [expressions.get(field, prefix + field) for field in fields]
+
+                # users vive en el catálogo (sin sharding es la misma conexión y transacción)
+                connections = service._connections if table == "users" else service._user_connections(user_id)
+                with connections.transaction() as conn:
+                    cursor = conn.execute(
+                        f"SELECT {', '.join(select_list)} FROM {table} WHERE {user_column} = ? ORDER BY {order}",
+                        (user_id,)
+                    )
+
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        for row in rows:
+                            record = {"type": record_type}
+                            record.update(zip(fields, row))
+                            write(record)
+                        counts[record_type] += len(rows)
+
+
+# ===============================
+# IMPORTACIÓN
+# ===============================
+STAGING_TABLES = {
+    "entry": ("import_entries", ("old_id", "entry_date", "free_reflection", "worth_it", "mood_score",
+                                 "word_count", "created_at", "updated_at")),
+    "tag": ("import_tags", ("old_entry_id", "tag_type", "position", "name", "context", "emoji")),
+    "moment": ("import_moments", ("old_id", "moment_id", "old_entry_id", "emoji", "text", "moment_type",
+                                  "intensity", "category", "time_str", "entry_date", "created_at", "is_active")),
+}
+
+
+def _resolve_user(service, user_id: Optional[int], record: Dict[str, Any]) -> int:
+    """Sin user_id explícito se importa en la cuenta con el mismo email"""
+    if user_id is not None:
+        _require_user(service, user_id)
+        return user_id
+
+    with service._connections.transaction() as conn:
+        row = conn.execute("SELECT id FROM users WHERE email = ?", (record.get("email"),)).fetchone()
+
+    if not row:
+        raise ValueError(f"No existe una cuenta con el email {record.get('email')}: créala antes de importar")
+    return row[0]
+
+
+def import_user(service, source_path: str, user_id: Optional[int] = None,
+                fmt: Optional[str] = None, batch_size: int = 1000) -> Dict[str, Any]:
+    """
+    Cargar un fichero exportado en la cuenta user_id
+
+    Las filas se cargan con executemany, en transacciones de batch_size filas,
+    en tablas temporales sin índices; los índices se crean al terminar y luego
+    se pasan a las tablas reales en una sola transacción. Los días que el
+    usuario ya tiene se conservan (la entrada importada se descarta).
+
+    Returns:
+        Dict con filas por tipo, entradas descartadas, segundos y filas/s
+    """
+    fmt = fmt or _detect_format(source_path)
+    start = time.perf_counter()
+    records = _read_records(source_path, fmt)
+
+    # El registro del usuario va antes que los datos: decide en qué base de datos
+    # (shard) se preparan las tablas temporales y se hace la fusión
+    pending = []
+    resolved = False
+    for record_type, record in records:
+        if record_type == "user":
+            user_id = _resolve_user(service, user_id, record)
+            resolved = True
+        elif record_type != "meta":
+            pending.append((record_type, record))
+        if record_type != "meta":
+            break
+
+    if user_id is None:
+        raise ValueError("El fichero no contiene el registro del usuario")
+    if not resolved:
+        # Sin registro de usuario en el fichero no pasó por _resolve_user
+        _require_user(service, user_id)
+
+    connections = service._user_connections(user_id)
+
+    with connections.transaction() as conn:
+        for table, columns in STAGING_TABLES.values():
+            conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+            conn.execute(f"CREATE TEMP TABLE {table} ({', '.join(columns)})")
+
+    buffers = {record_type: [] for record_type in STAGING_TABLES}
+    staged = {record_type: 0 for record_type in STAGING_TABLES}
+
+    def flush(record_type: str) -> None:
+        rows = buffers[record_type]
+        if not rows:
+            return
+        table, columns = STAGING_TABLES[record_type]
+        with connections.transaction() as conn:
+            conn.executemany(
+                f"INSERT INTO temp.{table} VALUES ({', '.join('?' * len(columns))})", rows
+            )
+        staged[record_type] += len(rows)
+        buffers[record_type] = []
+
+    try:
+        for record_type, record in itertools.chain(pending, records):
+            if record_type not in STAGING_TABLES:
+                continue  # user, meta y statistics: las estadísticas se recalculan
+
+            fields = RECORD_FIELDS[record_type]
+            buffers[record_type].append(tuple(record.get(field) for field in fields))
+            if len(buffers[record_type]) >= batch_size:
+                flush(record_type)
+
+        for record_type in STAGING_TABLES:
+            flush(record_type)
+
+        with connections.transaction() as conn:
+            # Índices al final: cargar sin ellos es más rápido
+            conn.execute("CREATE INDEX temp.idx_import_entries_old ON import_entries(old_id)")
+            conn.execute("CREATE INDEX temp.idx_import_tags_entry ON import_tags(old_entry_id)")
+
+        with connections.transaction(immediate=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM daily_entries")
+            last_entry_id = cursor.fetchone()[0]
+
+            cursor.execute(f"""
+                INSERT INTO daily_entries (
+                    user_id, free_reflection, worth_it, mood_score, word_count,
+                    entry_date, day_number, created_at, updated_at
+                )
+                SELECT ?, COALESCE(free_reflection, ''), worth_it, COALESCE(mood_score, 5),
+                       COALESCE(word_count, 0), entry_date, {DAY_NUMBER_SQL.format(column="entry_date")},
+                       COALESCE(created_at, CURRENT_TIMESTAMP), COALESCE(updated_at, CURRENT_TIMESTAMP)
+                FROM temp.import_entries
+                WHERE 1
+                ON CONFLICT (user_id, entry_date) DO NOTHING
+            """, (user_id,))
+            imported_entries = cursor.rowcount
+
+            # AUTOINCREMENT: las entradas recién creadas son las de id > last_entry_id
+            cursor.execute("""
+                CREATE TEMP TABLE import_entry_map AS
+                SELECT ie.old_id, e.id AS new_id
+                FROM temp.import_entries ie
+                JOIN daily_entries e ON e.user_id = ? AND e.entry_date = ie.entry_date
+                WHERE e.id > ?
+            """, (user_id, last_entry_id))
+            cursor.execute("CREATE INDEX temp.idx_import_entry_map ON import_entry_map(old_id)")
+
+            cursor.execute("""
+                INSERT INTO entry_tags (entry_id, user_id, tag_type, position, name, context, emoji)
+                SELECT m.new_id, ?, t.tag_type, COALESCE(t.position, 0), t.name,
+                       COALESCE(t.context, ''), COALESCE(t.emoji, '✨')
+                FROM temp.import_tags t
+                JOIN temp.import_entry_map m ON m.old_id = t.old_entry_id
+            """, (user_id,))
+            imported_tags = cursor.rowcount
+
+            # Los momentos de una entrada descartada ya están en la entrada existente,
+            # y un momento pendiente ya importado antes no se duplica
+            cursor.execute(f"""
+                INSERT INTO interactive_moments (
+                    user_id, moment_id, entry_id, emoji, text, moment_type, intensity,
+                    category, time_str, entry_date, day_number, created_at, is_active
+                )
+                SELECT ?, im.moment_id, m.new_id, im.emoji, im.text, im.moment_type, im.intensity,
+                       COALESCE(im.category, 'general'), im.time_str, im.entry_date,
+                       {DAY_NUMBER_SQL.format(column="im.entry_date")},
+                       COALESCE(im.created_at, CURRENT_TIMESTAMP), COALESCE(im.is_active, 1)
+                FROM temp.import_moments im
+                LEFT JOIN temp.import_entry_map m ON m.old_id = im.old_entry_id
+                WHERE (im.old_entry_id IS NULL OR m.new_id IS NOT NULL)
+                      AND NOT EXISTS (
+                          SELECT 1 FROM interactive_moments x
+                          WHERE x.user_id = ? AND x.entry_date = im.entry_date AND x.moment_id = im.moment_id
+                      )
+            """, (user_id, user_id))
+            imported_moments = cursor.rowcount
+
+            service._rebuild_rollups(cursor, user_id)
+            service._rebuild_statistics(cursor, user_id)
+
+        service.query_cache.invalidate_user(user_id)
+
+    finally:
+        with connections.transaction() as conn:
+            for table in [table for table, _ in STAGING_TABLES.values()] + ["import_entry_map"]:
+                conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+
+    elapsed = time.perf_counter() - start
+    total = sum(staged.values())
+    return {
+        "user_id": user_id,
+        "rows": {"entry": imported_entries, "tag": imported_tags, "moment": imported_moments},
+        "skipped_entries": staged["entry"] - imported_entries,
+        "total_rows": total,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(total / elapsed) if elapsed else total,
+    }
@@ -0,0 +1,187 @@
+"""
+📝 Cola de escritura de momentos - ReflectApp
+✅ NUEVO: Agrupa los auto-guardados de momentos en una sola transacción (group commit)
+✅ NUEVO: Vaciado cada N milisegundos o al llegar a M momentos pendientes
+✅ NUEVO: Lecturas que ven los momentos aún no escritos (read-your-writes)
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from typing import Optional, List, Dict, Any
+
+from .day_numbers import today_number
+
+
+class MomentWriteQueue:
+    """Cola write-behind para interactive_moments con vaciado periódico en segundo plano"""
+
+    def __init__(self, db_service, flush_interval_ms: int = 250, max_batch: int = 32):
+        self.db_service = db_service
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._has_pending = threading.Event()  # Activo mientras haya momentos en la cola
+        self._flusher_thread = None
+        self.is_running = False
+
+        # Contadores para diagnóstico y benchmarks
+        self.flushed_moments = 0
+        self.flush_count = 0
+
+    # ===============================
+    # ENCOLADO
+    # ===============================
+    def enqueue(self, user_id: int, moment_data: dict) -> str:
+        """
+        Encolar un momento para guardarlo en el siguiente vaciado
+
+        Returns:
+            str: moment_id del momento (el mismo que se guardará en la base de datos)
+        """
+        now = datetime.now()
+        row = {
+            "user_id": user_id,
+            "moment_id": str(moment_data.get('id', int(now.timestamp() * 1000))),
+            "emoji": moment_data.get('emoji', ''),
+            "text": moment_data.get('text', ''),
+            "moment_type": moment_data.get('type', 'positive'),
+            "intensity": moment_data.get('intensity', 5),
+            "category": moment_data.get('category', 'general'),
+            "time_str": moment_data.get('time', now.strftime("%H:%M")),
+            # Fecha fijada al encolar: un vaciado tras medianoche no cambia de día
+            "entry_date": date.today().isoformat(),
+            "day_number": today_number(),
+            "created_at": now.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+        with self._lock:
+            self._pending.append(row)
+            pending_count = len(self._pending)
+            self._has_pending.set()
+
+        self._ensure_flusher()
+        if pending_count >= self.max_batch:
+            self._wakeup.set()
+
+        return row["moment_id"]
+
+    def pending_for(self, user_id: int, entry_date: str) -> List[Dict[str, Any]]:
+        """Momentos pendientes de un usuario y día (copia)"""
+        with self._lock:
+            return [dict(row) for row in self._pending
+                    if row["user_id"] == user_id and row["entry_date"] == entry_date]
+
+    def discard(self, user_id: int, entry_date: str) -> int:
+        """Descartar los momentos pendientes de un usuario y día (p. ej. al limpiar)"""
+        # Esperar a que termine un vaciado en curso para no resucitar momentos
+        with self._flush_lock:
+            with self._lock:
+                before = len(self._pending)
+                self._pending = [row for row in self._pending
+                                 if not (row["user_id"] == user_id and row["entry_date"] == entry_date)]
+                return before - len(self._pending)
+
+    # ===============================
+    # VACIADO
+    # ===============================
+    def flush(self, user_id: Optional[int] = None) -> int:
+        """
+        Escribir de forma síncrona los momentos pendientes
+
+        Args:
+            user_id: Si se indica, solo los de ese usuario
+
+        Returns:
+            int: Número de momentos escritos
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch = [row for row in self._pending
+                         if user_id is None or row["user_id"] == user_id]
+
+            if not batch:
+                return 0
+
+            # Una transacción por fichero de base de datos (con sharding, una por shard)
+            groups: Dict[str, List[Dict[str, Any]]] = {}
+            for row in batch:
+                groups.setdefault(self.db_service.shard_name(row["user_id"]), []).append(row)
+
+            written, done = 0, []
+            try:
+                for group in groups.values():
+                    try:
+                        written += self.db_service._write_moments_batch(group)
+                        done.extend(group)
+                    except sqlite3.IntegrityError:
+                        # Un momento inválido no debe bloquear al resto: se escriben de uno en uno
+                        for row in group:
+                            try:
+                                written += self.db_service._write_moments_batch([row])
+                            except sqlite3.IntegrityError as e:
+                                print(f"⚠️ Momento descartado ({row['emoji']} {row['text']}): {e}")
+                            done.append(row)
+            finally:
+                # Se quitan de la cola solo tras el commit: las lecturas nunca dejan de verlos
+                # (y si falla un shard, los ya escritos en otros no se repiten)
+                done_ids = {id(row) for row in done}
+                with self._lock:
+                    self._pending = [row for row in self._pending if id(row) not in done_ids]
+
+            self.flushed_moments += written
+            self.flush_count += 1
+            return written
+
+    def pending_count(self) -> int:
+        """Número de momentos todavía en memoria"""
+        with self._lock:
+            return len(self._pending)
+
+    def _ensure_flusher(self) -> None:
+        """Arrancar el hilo de vaciado la primera vez que se encola algo"""
+        if self.is_running:
+            return
+
+        with self._lock:
+            if self.is_running:
+                return
+            self.is_running = True
+
+        def run_flusher():
+            while self.is_running:
+                # ✅ MEJORADO: Con la cola vacía no hay temporizador: el hilo duerme hasta el primer momento
+                self._has_pending.wait()
+                if not self.is_running:
+                    return
+
+                # Cuenta atrás desde el primer momento pendiente (antes si se llena el lote)
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"❌ Error vaciando cola de momentos: {e}")
+                    time.sleep(self.flush_interval)
+
+                with self._lock:
+                    if not self._pending:
+                        self._has_pending.clear()
+
+        self._flusher_thread = threading.Thread(target=run_flusher, daemon=True)
+        self._flusher_thread.start()
+
+    def stop(self) -> None:
+        """Detener el hilo de vaciado tras escribir lo pendiente"""
+        self.is_running = False
+        self._wakeup.set()
+        self._has_pending.set()
+        if self._flusher_thread:
+            self._flusher_thread.join(timeout=2)
+            self._flusher_thread = None
+        self.flush()
@@ -0,0 +1,284 @@
+"""
+📈 Series temporales del estado de ánimo - ReflectApp
+✅ NUEVO: mood_score por día en arrays densos (un hueco por día sin entrada, relleno hacia delante)
+✅ NUEVO: Media móvil, EWMA, volatilidad y agregados semanales/mensuales en una pasada
+✅ NUEVO: Vectorizado con NumPy si está instalado; en el móvil, el mismo cálculo en Python puro
+
+NumPy no es una dependencia obligatoria: se instala con el extra opcional
+`fast` (pip install .[fast]). El APK no lo incluye, así que la ruta en
+Python puro es la que se distribuye y da los mismos resultados.
+
+Todas las series se indexan por día: posición i = day_number del primer día + i.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .day_numbers import day_from_number, month_range
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional (no va en el APK)
+    np = None
+
+DEFAULT_WINDOW = 7
+DEFAULT_EWMA_ALPHA = 0.3
+# Bloques del EWMA vectorizado: (1 - alpha)^-bloque no debe desbordar un float
+EWMA_BLOCK = 128
+
+MOOD_ROWS_SQL = """
+    SELECT day_number, mood_score
+    FROM daily_entries
+    WHERE user_id = ? AND day_number BETWEEN ? AND ? AND mood_score IS NOT NULL
+    ORDER BY day_number
+"""
+
+
+def _week_starts(first: int, last: int) -> List[int]:
+    """Posiciones donde empieza cada semana (lunes); 1970-01-01 fue jueves"""
+    starts = [0]
+    day = first + (-(first + 3)) % 7
+    while day <= last:
+        if day != first:
+            starts.append(day - first)
+        day += 7
+    return starts
+
+
+def _month_starts(first: int, last: int) -> List[int]:
+    """Posiciones donde empieza cada mes natural"""
+    starts = [0]
+    current = day_from_number(first)
+    year, month = current.year, current.month
+    while True:
+        _, month_last = month_range(year, month)
+        if month_last >= last:
+            return starts
+        starts.append(month_last + 1 - first)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def _none_for_nan(values) -> List[Optional[float]]:
+    return [None if value != value else round(value, 4) for value in values]
+
+
+def _array_to_list(values) -> List[Optional[float]]:
+    """Lo mismo que _none_for_nan, sin bucle de Python"""
+    result = np.round(values, 4).astype(object)
+    result[np.isnan(values)] = None
+    return result.tolist()
+
+
+# ===============================
+# NUMPY
+# ===============================
+def _series_numpy(days: Sequence[int], moods: Sequence[float], first: int, last: int,
+                  window: int, alpha: float) -> Dict[str, Any]:
+    n = last - first + 1
+    mood = np.full(n, np.nan)
+    if len(days):
+        mood[np.asarray(days, dtype=np.int64) - first] = np.asarray(moods, dtype=np.float64)
+    mask = ~np.isnan(mood)
+
+    # Relleno hacia delante (y hacia atrás antes de la primera entrada)
+    index = np.where(mask, np.arange(n), 0)
+    np.maximum.accumulate(index, out=index)
+    filled = mood[index]
+    if mask.any():
+        filled[:np.argmax(mask)] = mood[np.argmax(mask)]
+
+    # Ventanas móviles con sumas acumuladas (solo días con entrada)
+    values = np.where(mask, mood, 0.0)
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    squares = np.concatenate(([0.0], np.cumsum(values * values)))
+    counts = np.concatenate(([0], np.cumsum(mask)))
+    lower = np.maximum(np.arange(1, n + 1) - window, 0)
+    upper = np.arange(1, n + 1)
+    window_count = counts[upper] - counts[lower]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rolling = (sums[upper] - sums[lower]) / window_count
+        variance = (squares[upper] - squares[lower]) / window_count - rolling * rolling
+        volatility = np.sqrt(np.maximum(variance, 0.0))
+    volatility[window_count < 2] = np.nan
+
+    # EWMA sobre la serie rellena, por bloques para no desbordar (1 - alpha)^-k
+    ewma = np.full(n, np.nan)
+    decay = 1.0 - alpha
+    if mask.any() and decay == 0.0:
+        ewma = filled.copy()
+    elif mask.any():
+        state = filled[0]
+        for start in range(0, n, EWMA_BLOCK):
+            block = filled[start:start + EWMA_BLOCK]
+            k = np.arange(len(block))
+            weighted = np.cumsum(block * decay ** -k)
+            ewma[start:start + len(block)] = decay ** (k + 1) * state + alpha * decay ** k * weighted
+            state = ewma[start + len(block) - 1]
+
+    def aggregate(starts: List[int]) -> Dict[str, Any]:
+        entries = np.add.reduceat(mask.astype(np.int64), starts)
+        total = np.add.reduceat(values, starts)
+        lowest = np.minimum.reduceat(np.where(mask, mood, np.inf), starts)
+        highest = np.maximum.reduceat(np.where(mask, mood, -np.inf), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = total / entries
+        return {"entries": entries.tolist(), "mean": _array_to_list(means),
+                "min": _array_to_list(np.where(entries > 0, lowest, np.nan)),
+                "max": _array_to_list(np.where(entries > 0, highest, np.nan))}
+
+    observed = mood[mask]
+    changes = np.diff(observed)
+    return {
+        "mood": _array_to_list(mood), "filled": _array_to_list(filled),
+        "has_entry": mask.tolist(), "rolling_mean": _array_to_list(rolling), "ewma": _array_to_list(ewma),
+        "volatility": _array_to_list(volatility),
+        "weekly": aggregate(_week_starts(first, last)), "monthly": aggregate(_month_starts(first, last)),
+        "summary": {
+            "entries": int(observed.size),
+            "mean": float(observed.mean()) if observed.size else None,
+            "min": float(observed.min()) if observed.size else None,
+            "max": float(observed.max()) if observed.size else None,
+            "volatility": float(changes.std()) if changes.size >= 2 else None,
+        },
+    }
+
+
+# ===============================
+# PYTHON PURO
+# ===============================
+def _series_python(days: Sequence[int], moods: Sequence[float], first: int, last: int,
+                   window: int, alpha: float) -> Dict[str, Any]:
+    n = last - first + 1
+    nan = math.nan
+    mood = [nan] * n
+    for day, value in zip(days, moods):
+        mood[day - first] = float(value)
+    mask = [value == value for value in mood]
+
+    filled = [nan] * n
+    previous = next((value for value in mood if value == value), nan)
+    for i, value in enumerate(mood):
+        if value == value:
+            previous = value
+        filled[i] = previous
+
+    rolling, volatility = [nan] * n, [nan] * n
+    total = squares = 0.0
+    count = 0
+    for i in range(n):
+        if mask[i]:
+            total += mood[i]
+            squares += mood[i] * mood[i]
+            count += 1
+        if i >= window and mask[i - window]:
+            total -= mood[i - window]
+            squares -= mood[i - window] * mood[i - window]
+            count -= 1
+        if count:
+            rolling[i] = total / count
+        if count >= 2:
+            volatility[i] = math.sqrt(max(squares / count - rolling[i] * rolling[i], 0.0))
+
+    ewma = [nan] * n
+    if any(mask):
+        state = filled[0]
+        for i in range(n):
+            state = alpha * filled[i] + (1.0 - alpha) * state
+            ewma[i] = state
+
+    def aggregate(starts: List[int]) -> Dict[str, Any]:
+        result = {"entries": [], "mean": [], "min": [], "max": []}
+        for position, start in enumerate(starts):
+            end = starts[position + 1] if position + 1 < len(starts) else n
+            observed = [value for value in mood[start:end] if value == value]
+            result["entries"].append(len(observed))
+            result["mean"].append(round(sum(observed) / len(observed), 4) if observed else None)
+            result["min"].append(min(observed) if observed else None)
+            result["max"].append(max(observed) if observed else None)
+        return result
+
+    observed = [value for value in mood if value == value]
+    changes = [b - a for a, b in zip(observed, observed[1:])]
+    change_std = None
+    if len(changes) >= 2:
+        change_mean = sum(changes) / len(changes)
+        change_std = math.sqrt(sum((c - change_mean) ** 2 for c in changes) / len(changes))
+
+    return {
+        "mood": _none_for_nan(mood), "filled": _none_for_nan(filled), "has_entry": mask,
+        "rolling_mean": _none_for_nan(rolling), "ewma": _none_for_nan(ewma),
+        "volatility": _none_for_nan(volatility),
+        "weekly": aggregate(_week_starts(first, last)), "monthly": aggregate(_month_starts(first, last)),
+        "summary": {
+            "entries": len(observed),
+            "mean": sum(observed) / len(observed) if observed else None,
+            "min": min(observed) if observed else None,
+            "max": max(observed) if observed else None,
+            # Volatilidad del periodo: desviación típica de los cambios entre entradas consecutivas
+            "volatility": change_std,
+        },
+    }
+
+
+# ===============================
+# API
+# ===============================
+def build_mood_series(rows: Sequence[Tuple[int, float]], first: int, last: int,
+                      window: int = DEFAULT_WINDOW, ewma_alpha: float = DEFAULT_EWMA_ALPHA,
+                      use_numpy: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Series diarias densas entre los day_number first y last (incluidos)
+
+    Args:
+        rows: (day_number, mood_score) ordenados, como mucho uno por día
+        window: Días de la media móvil y de la volatilidad
+        ewma_alpha: Peso del día actual en la media exponencial (0-1]
+        use_numpy: None = NumPy si está instalado
+
+    Returns:
+        Dict con arrays de un valor por día (None en los huecos), agregados
+        semanales/mensuales y un resumen del periodo
+    """
+    if last < first:
+        raise ValueError("El final del periodo es anterior al inicio")
+    if window < 1 or not 0 < ewma_alpha <= 1:
+        raise ValueError("window debe ser >= 1 y ewma_alpha estar en (0, 1]")
+
+    days = [row[0] for row in rows]
+    moods = [row[1] for row in rows]
+    if use_numpy is None:
+        use_numpy = np is not None
+    compute = _series_numpy if use_numpy else _series_python
+    series = compute(days, moods, first, last, window, ewma_alpha)
+
+    def periods(starts: List[int], aggregate: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [
+            {"start": day_from_number(first + start).isoformat(), "entries": entries,
+             "mean": mean, "min": low, "max": high}
+            for start, entries, mean, low, high in zip(starts, aggregate["entries"], aggregate["mean"],
+                                                       aggregate["min"], aggregate["max"])
+        ]
+
+    summary = series["summary"]
+    for key in ("mean", "volatility"):
+        if summary[key] is not None:
+            summary[key] = round(summary[key], 4)
+
+    return {
+        "start": day_from_number(first).isoformat(),
+        "end": day_from_number(last).isoformat(),
+        "first_day_number": first,
+        "days": last - first + 1,
+        "window": window,
+        "ewma_alpha": ewma_alpha,
+        "engine": "numpy" if use_numpy else "python",
+        "mood": series["mood"],
+        "filled": series["filled"],
+        "has_entry": series["has_entry"],
+        "rolling_mean": series["rolling_mean"],
+        "ewma": series["ewma"],
+        "volatility": series["volatility"],
+        "weekly": periods(_week_starts(first, last), series["weekly"]),
+        "monthly": periods(_month_starts(first, last), series["monthly"]),
+        "summary": summary,
+    }
@@ -0,0 +1,222 @@
+"""
+🗃️ Caché de consultas - ReflectApp
+✅ NUEVO: Caché read-through delante de los métodos de lectura de DatabaseService
+✅ NUEVO: Expulsión LRU con límite de memoria (perfil mobile/server)
+✅ NUEVO: Invalidación precisa por usuario y fecha desde las escrituras
+✅ NUEVO: Contadores de aciertos y fallos
+"""
+
+import copy
+import functools
+import inspect
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+
+def _estimate_size(obj: Any) -> int:
+    """Tamaño aproximado en bytes de un resultado (dicts, listas y escalares)"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(_estimate_size(item) for item in obj)
+    return size
+
+
+class QueryCache:
+    """LRU thread-safe de resultados de consultas, acotada por número de entradas y por bytes"""
+
+    def __init__(self, max_bytes: int = 1024 * 1024, max_entries: int = 1024):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        # Cada invalidación sube la versión: una lectura que empezó antes no se guarda
+        self._version = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # ===============================
+    # LECTURA Y ESCRITURA
+    # ===============================
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """Devolver (encontrado, valor); el valor es una copia para que el llamador pueda mutarlo"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[0]
+
+        return True, copy.deepcopy(value)
+
+    def put(self, key: Tuple, value: Any, version: int) -> None:
+        """Guardar un resultado leído con la versión `version` (se ignora si hubo invalidación)"""
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        value = copy.deepcopy(value)
+
+        with self._lock:
+            if version != self._version:
+                return
+
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            self._entries[key] = (value, size)
+            self._bytes += size
+
+            while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    # ===============================
+    # INVALIDACIÓN
+    # ===============================
+    def invalidate(self, predicate: Callable[[Tuple, Any], bool]) -> int:
+        """Eliminar las entradas cuya clave/valor cumplan `predicate`"""
+        with self._lock:
+            self._version += 1
+            stale = [key for key, (value, _) in self._entries.items() if predicate(key, value)]
+            for key in stale:
+                self._bytes -= self._entries.pop(key)[1]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def invalidate_user(self, user_id: int, entry_date: Optional[str] = None,
+                        methods: Optional[Iterable[str]] = None) -> int:
+        """
+        Invalidar los resultados de un usuario
+
+        Args:
+            user_id: Usuario afectado por la escritura
+            entry_date: Si se indica (YYYY-MM-DD), los métodos con argumentos de fecha
+                        (año, mes, día) solo se invalidan si su rango contiene ese día
+            methods: Limitar la invalidación a estos métodos
+        """
+        methods = set(methods) if methods is not None else None
+        day_parts = None
+        if entry_date:
+            parsed = date.fromisoformat(entry_date)
+            day_parts = (parsed.year, parsed.month, parsed.day)
+
+        def matches(key: Tuple, value: Any) -> bool:
+            method, date_args, args = key[0], key[1], key[2:]
+            if methods is not None and method not in methods:
+                return False
+            if not args or args[0] != user_id:
+                return False
+            if day_parts and date_args:
+                return tuple(args[1:1 + date_args]) == day_parts[:date_args]
+            return True
+
+        return self.invalidate(matches)
+
+    def clear(self) -> None:
+        """Vaciar la caché completa"""
+        self.invalidate(lambda key, value: True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Contadores de la caché"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Lectura en curso de cada hilo que ha devuelto un valor de respaldo (except): no se guarda
+_call_state = threading.local()
+
+
+def mark_read_failed() -> None:
+    """
+    Llamar desde el except de un método con @cached_query antes de devolver
+    su valor de respaldo (False, 0, [] ...): ese valor no entra en la caché
+    """
+    _call_state.failed = True
+
+
+def cached_query(date_args: int = 0, per_day: bool = False, cache_none: bool = False):
+    """
+    Decorador read-through para métodos de lectura de DatabaseService
+
+    La clave es (método, date_args, argumentos...) con los argumentos ya
+    normalizados (posicionales, nombrados y valores por defecto dan la misma clave).
+
+    Args:
+        date_args: Cuántos argumentos tras user_id son (año, mes, día) para la invalidación por fecha
+        per_day: El resultado depende de date.today() (se añade a la clave)
+        cache_none: Guardar también resultados None (por defecto no: suelen ser errores o "no existe")
+
+    Los valores de respaldo de los except no se guardan si el método llama
+    a mark_read_failed().
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, "query_cache", None)
+            if cache is None:
+                return method(self, *args, **kwargs)
+
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            key_args = tuple(bound.arguments.values())[1:]
+            key = (method.__name__, date_args) + key_args
+            if per_day:
+                key += (date.today().isoformat(),)
+
+            try:
+                hash(key)
+            except TypeError:
+                return method(self, *args, **kwargs)
+
+            found, value = cache.get(key)
+            if found:
+                return value
+
+            version = cache.version
+            outer_failed = getattr(_call_state, "failed", False)
+            _call_state.failed = False
+            try:
+                value = method(self, *args, **kwargs)
+                failed = _call_state.failed
+            finally:
+                # Si falla una lectura anidada, el resultado de fuera tampoco se guarda
+                _call_state.failed = outer_failed or _call_state.failed
+
+            if not failed and (value is not None or cache_none):
+                cache.put(key, value, version)
+            return value
+
+        return wrapper
+
+    return decorator